@@ -0,0 +1,280 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import platform
+import argparse
+import tempfile
+import contextlib
+import subprocess
+from collections import Counter
+
+import httpx
+import pandas as pd
+
+# End-to-end dialer benchmark against mock_vapi.py: no real calls are placed.
+# Results go to a JSON report tagged with the git commit; pass --compare to
+# diff against a report from another commit.
+
+# Dialer config is read at import, so it has to be set first
+BENCH_ENV = {
+    "VAPI_API_KEY": "bench",
+    "ASSISTANT_ID": "bench-assistant",
+    "PHONE_NUMBER_ID": "bench-number",
+    "CALL_WINDOW": "00:00-24:00",           # every synthetic row is inside its window
+    "THROUGHPUT_REPORT_SECONDS": "0",
+    "MAX_CALLS_PER_RUN": "0",               # dial the whole synthetic queue
+    "OUTCOME_POLL_SECONDS": "0",            # dial throughput only, no outcome polling
+    "VAPI_BACKOFF_BASE": "0.05",
+}
+
+
+# Helpers
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def free_port():
+    import socket
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Mock Server
+def start_mock(args):
+    port = free_port()
+    process = subprocess.Popen([
+        sys.executable, "mock_vapi.py",
+        "--port", str(port),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--error-rate", str(args.error_rate),
+        "--rate-limit-rate", str(args.rate_limit_rate),
+        "--max-rps", str(args.max_rps),
+        "--retry-after", str(args.retry_after),
+        "--seed", "7",
+    ])
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base_url}/stats", timeout=0.5)
+            return process, base_url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("mock_vapi.py did not start")
+
+
+# Synthetic Queue
+def build_queue(rows, invalid_share=0.01, seed=7):
+    rng = random.Random(seed)
+    phones = [
+        rng.choice(["9.1E+11", "12345", "n/a"]) if rng.random() < invalid_share else f"+91{9000000000 + i}"
+        for i in range(rows)
+    ]
+    return pd.DataFrame({
+        "sr_no": [str(i + 1) for i in range(rows)],
+        "user_name": [f"user {i}" for i in range(rows)],
+        "phone_number": phones,
+        "email": [f"user{i}@test.com" for i in range(rows)],
+        "status": ["queued"] * rows,
+        "called_at": [None] * rows,
+        "next_try": [None] * rows,
+        "request_id": [None] * rows,
+        "updated_at": [None] * rows,
+        "no_of_tries": ["0"] * rows,
+    })
+
+def open_bench_queue(backend, df, workdir, flush_interval, retry_gap_hours):
+    from call_queue import ExcelCallQueue, SQLiteCallQueue
+
+    if backend == "sqlite":
+        queue = SQLiteCallQueue(os.path.join(workdir, f"queue_{len(df)}.db"), retry_gap_hours=retry_gap_hours)
+        queue.import_dataframe(df)
+        return queue
+
+    path = os.path.join(workdir, f"call_data_{len(df)}.xlsx")
+    df.to_excel(path, sheet_name="call_queue", index=False)
+    return ExcelCallQueue(path, "call_queue", flush_interval=flush_interval, retry_gap_hours=retry_gap_hours)
+
+
+# Benchmark
+async def run_size(dialer, rows, args, workdir, base_url):
+    from vapi_client import get_vapi_client
+
+    df = build_queue(rows)
+    build_start = time.perf_counter()
+    queue = open_bench_queue(args.backend, df, workdir, args.flush_seconds, dialer.RETRY_GAP_HOURS)
+    build_seconds = time.perf_counter() - build_start
+
+    runner = dialer.OutboundDialer(queue, quarantine_file = os.path.join(workdir, f"quarantine_{rows}.csv"))
+    httpx.post(f"{base_url}/stats/reset")
+
+    latencies = []
+    statuses = Counter()
+    timings = Counter()
+
+    # Time the POSTs (retries included) as make_call sees them
+    client = get_vapi_client()
+    place_call = client.place_call
+
+    async def timed_place_call(*a, **kw):
+        start = time.perf_counter()
+        try:
+            response = await place_call(*a, **kw)
+        except Exception:
+            statuses["error"] += 1
+            raise
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[str(response.status_code)] += 1
+        return response
+
+    client.place_call = timed_place_call
+
+    # Queue write-back cost: update() on the dial path, workbook saves off it
+    def timed(name, func, is_async):
+        if is_async:
+            async def wrapper(*a, **kw):
+                start = time.perf_counter()
+                try:
+                    return await func(*a, **kw)
+                finally:
+                    timings[name] += time.perf_counter() - start
+                    timings[f"{name}_count"] += 1
+        else:
+            def wrapper(*a, **kw):
+                start = time.perf_counter()
+                try:
+                    return func(*a, **kw)
+                finally:
+                    timings[name] += time.perf_counter() - start
+                    timings[f"{name}_count"] += 1
+        wrapper.__wrapped__ = func
+        return wrapper
+
+    queue.update = timed("queue_update", queue.update, True)
+    if hasattr(queue, "store"):
+        queue.store._save = timed("workbook_save", queue.store._save, False)
+    prepare_calls = getattr(dialer.prepare_calls, "__wrapped__", dialer.prepare_calls)
+    dialer.prepare_calls = timed("prepare", prepare_calls, False)
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        await runner.main()
+    elapsed = time.perf_counter() - start
+
+    placed = statuses.get("201", 0)
+    return {
+        "rows": rows,
+        "backend": args.backend,
+        "queue_build_seconds": round(build_seconds, 3),
+        "elapsed_seconds": round(elapsed, 3),
+        "calls_placed": placed,
+        "dials_per_second": round(placed / elapsed, 2) if elapsed else None,
+        "post_latency_ms": {
+            "p50": round(percentile(latencies, 50), 2) if latencies else None,
+            "p90": round(percentile(latencies, 90), 2) if latencies else None,
+            "p99": round(percentile(latencies, 99), 2) if latencies else None,
+            "max": round(max(latencies), 2) if latencies else None,
+        },
+        "final_statuses": dict(statuses),
+        "mock": httpx.get(f"{base_url}/stats").json(),
+        "prepare_seconds": round(timings["prepare"], 3),
+        "queue_update_seconds": round(timings["queue_update"], 3),
+        "queue_updates": timings["queue_update_count"],
+        "workbook_saves": timings["workbook_save_count"],
+        "workbook_save_seconds": round(timings["workbook_save"], 3),
+    }
+
+def compare(report, baseline_path):
+    with open(baseline_path) as baseline_file:
+        baseline = {r["rows"]: r for r in json.load(baseline_file)["results"]}
+
+    print(f"\nvs {baseline_path}")
+    for result in report["results"]:
+        old = baseline.get(result["rows"])
+        if not old:
+            continue
+        for metric in ("dials_per_second", "elapsed_seconds"):
+            if old.get(metric) and result.get(metric) is not None:
+                change = (result[metric] - old[metric]) / old[metric] * 100
+                print(f"{result['rows']:>7} rows  {metric:<18} {old[metric]:>10} -> {result[metric]:>10} ({change:+.1f}%)")
+        old_p99, new_p99 = old["post_latency_ms"]["p99"], result["post_latency_ms"]["p99"]
+        if old_p99 and new_p99:
+            print(f"{result['rows']:>7} rows  {'post_p99_ms':<18} {old_p99:>10} -> {new_p99:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dialer throughput benchmark against a local mock VAPI")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated queue sizes")
+    parser.add_argument("--backend", choices=["excel", "sqlite"], default="excel")
+    parser.add_argument("--in-flight", type=int, default=50)
+    parser.add_argument("--calls-per-second", type=float, default=500)
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--flush-seconds", type=float, default=5)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=40)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0)
+    parser.add_argument("--max-rps", type=float, default=0)
+    parser.add_argument("--retry-after", default="1")
+    parser.add_argument("--output", default="bench_dialer.json")
+    parser.add_argument("--compare", help="earlier report to diff against")
+    args = parser.parse_args()
+
+    mock, base_url = start_mock(args)
+    for name, value in BENCH_ENV.items():
+        os.environ.setdefault(name, value)
+    os.environ["VAPI_URL"] = f"{base_url}/call/phone"
+    os.environ["MAX_IN_FLIGHT"] = str(args.in_flight)
+    os.environ["CALLS_PER_SECOND"] = str(args.calls_per_second)
+    os.environ["CALL_BURST"] = str(args.burst)
+    os.environ["VAPI_MAX_CONNECTIONS"] = str(args.in_flight)
+    os.environ["VAPI_MAX_KEEPALIVE"] = str(args.in_flight)
+
+    import outbound_dialer as dialer
+
+    workdir = tempfile.mkdtemp(prefix="bench_dialer_")
+    results = []
+    try:
+        for rows in [int(size) for size in args.sizes.split(",")]:
+            result = asyncio.run(run_size(dialer, rows, args, workdir, base_url))
+            results.append(result)
+            print(
+                f"{rows:>7} rows | {result['dials_per_second']} dials/s | "
+                f"p50 {result['post_latency_ms']['p50']} ms p99 {result['post_latency_ms']['p99']} ms | "
+                f"updates {result['queue_update_seconds']}s saves {result['workbook_save_seconds']}s"
+            )
+    finally:
+        mock.terminate()
+        mock.wait()
+
+    report = {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "results": results,
+    }
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Report written to {args.output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
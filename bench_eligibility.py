@@ -0,0 +1,131 @@
+import time
+import json
+import random
+import argparse
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+
+from eligibility import FRESH_STATUSES, RETRY_STATUS, TRIES_COLUMN, eligible_mask
+
+# Settings the dialers pass to eligible_mask: Excel is local wall clock, the Sheets queue UTC with a try cap
+MODES = {
+    "excel": {"utc": False, "retry_gap_hours": 24},
+    "sheets": {"utc": True, "retry_gap_hours": 24, "max_tries": 2},
+}
+
+STATUSES = ["", None, "queued", "no-response", "no-response", "success", "failure", "error"]
+
+
+# Synthetic Queue
+def build_queue(rows, utc, seed=7):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc) if utc else datetime.now()
+
+    def stamp():
+        # whole hours plus 30 minutes keeps every row clear of the "now" boundary
+        value = now + timedelta(hours=rng.randint(-72, 72), minutes=30)
+        text = value.isoformat()
+        return text.replace("+00:00", "Z") if utc and rng.random() < 0.5 else text
+
+    records = []
+    for i in range(rows):
+        records.append({
+            "sr_no": str(i + 1),
+            "user_name": f"user {i}",
+            "phone_number": f"+9190000{i:05d}",
+            "email": f"user{i}@test.com",
+            "status": rng.choice(STATUSES),
+            "called_at": stamp() if rng.random() < 0.7 else None,
+            "next_try": stamp() if rng.random() < 0.4 else None,
+            "no_of_tries": str(rng.randint(0, 4)) if rng.random() < 0.8 else "",
+        })
+    return pd.DataFrame(records)
+
+
+# Per-row Baseline: the is_valid_for_call the dialers ran row by row before eligibility.py
+def parse_row_time(value, utc):
+    if value is None or (not isinstance(value, str) and pd.isna(value)) or str(value).strip() == "":
+        return None
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if utc:
+        # Naive values are taken as UTC
+        return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+    # Naive values are local wall clock; aware ones are converted to it
+    return dt if dt.tzinfo is None else dt.astimezone().replace(tzinfo=None)
+
+def row_tries(row):
+    try:
+        value = row.get(TRIES_COLUMN, 0)
+        if pd.isna(value) or value == "":
+            return 0
+        return int(value)
+    except Exception:
+        return 0
+
+def is_valid_for_call(row, now=None, utc=True, retry_gap_hours=24, max_tries=None):
+    raw_status = row.get("status", "")
+    status = str(raw_status).strip().lower()
+
+    if max_tries is not None and row_tries(row) > max_tries:
+        return False
+
+    if now is None:
+        now = datetime.now(timezone.utc) if utc else datetime.now()
+
+    # Empty or NaN or queued -> call
+    if raw_status is None or pd.isna(raw_status) or status in FRESH_STATUSES:
+        return True
+
+    if status == RETRY_STATUS:
+        # next_try wins, else called_at + gap
+        next_try = parse_row_time(row.get("next_try"), utc)
+        if next_try:
+            return next_try <= now
+        called_at = parse_row_time(row.get("called_at"), utc)
+        if called_at:
+            return called_at + timedelta(hours=retry_gap_hours) <= now
+        return False
+
+    # All other statuses
+    return False
+
+
+# Benchmark
+def run(rows, mode):
+    kwargs = MODES[mode]
+    df = build_queue(rows, utc=kwargs["utc"])
+
+    start = time.perf_counter()
+    per_row = df.apply(is_valid_for_call, axis=1, **kwargs).astype(bool)
+    per_row_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = eligible_mask(df, **kwargs)
+    vectorized_seconds = time.perf_counter() - start
+
+    mismatches = int((per_row != vectorized).sum())
+    return {
+        "mode": mode,
+        "rows": rows,
+        "eligible": int(vectorized.sum()),
+        "mismatches": mismatches,
+        "per_row_seconds": round(per_row_seconds, 4),
+        "vectorized_seconds": round(vectorized_seconds, 4),
+        "speedup": round(per_row_seconds / max(vectorized_seconds, 1e-9), 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-row vs vectorized eligibility filter")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--mode", choices=["excel", "sheets"], default="excel")
+    args = parser.parse_args()
+
+    results = [run(rows, args.mode) for rows in args.rows]
+    print(json.dumps(results, indent=2))
+
+    if any(r["mismatches"] for r in results):
+        raise SystemExit("Vectorized filter disagrees with is_valid_for_call")
@@ -0,0 +1,157 @@
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import contextlib
+import subprocess
+
+# Tender extraction benchmark: per-cell locators (extract_with_playwright_only)
+# vs one page.evaluate (extract_sections) vs lxml without a browser
+# (tender_static.extract_static) on the same HTML, loaded with set_content so
+# no network is involved. Counts the Playwright protocol round trips each
+# extractor makes and checks all three return the same JSON.
+
+
+# Helpers
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+@contextlib.contextmanager
+def count_round_trips():
+    """Count every request the Python client sends to the Playwright driver."""
+    from playwright._impl._connection import Channel
+
+    counter = {"round_trips": 0}
+    inner_send = Channel._inner_send
+
+    async def counted(self, *args, **kwargs):
+        counter["round_trips"] += 1
+        return await inner_send(self, *args, **kwargs)
+
+    Channel._inner_send = counted
+    try:
+        yield counter
+    finally:
+        Channel._inner_send = inner_send
+
+
+# Fixtures
+def tender_fixture(sections, rows, seed=7):
+    """A NIC GePNIC-style tender page: orange header tables followed by data tables."""
+    rng = random.Random(seed)
+    blocks = ["<html><head><title>Tender Details</title></head><body>"]
+
+    for s in range(sections):
+        blocks.append(f'<table class="tablebg"><tr><td class="pageheader">Section {s} Details</td></tr></table>')
+        if s % 3 == 2:
+            # Tabular section ("Covers Information" style): header row + one row per entry
+            body = ["<tr><th>Cover No</th><th>Cover Type</th><th>Description</th></tr>"]
+            for r in range(rows):
+                body.append(f"<tr><td>{r + 1}</td><td>Fee/PreQual</td><td>Document {rng.randint(1, 10**6)}</td></tr>")
+        else:
+            # Key-value section, with the odd continuation row
+            body = []
+            for r in range(rows):
+                body.append(f"<tr><td>Field {r} :</td><td>  Value {rng.randint(1, 10**6)} </td></tr>")
+                if r % 10 == 9:
+                    body.append(f"<tr><td>continued {r}</td></tr>")
+        blocks.append(f'<table class="list_table">{"".join(body)}</table>')
+
+    blocks.append("</body></html>")
+    return "\n".join(blocks)
+
+def load_fixtures(args):
+    if args.html:
+        for path in args.html:
+            with open(path, encoding="utf-8") as html_file:
+                yield os.path.basename(path), html_file.read()
+        return
+    for rows in [int(size) for size in args.rows.split(",")]:
+        yield f"synthetic {args.sections}x{rows}", tender_fixture(args.sections, rows)
+
+
+# Runs
+def time_extractor(page, extract, repeats):
+    timings = []
+    with count_round_trips() as counter:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                data = extract(page)
+            timings.append(time.perf_counter() - start)
+    return data, min(timings), counter["round_trips"] // repeats
+
+def run(args):
+    from playwright.sync_api import sync_playwright
+
+    from new_plywright import extract_sections, extract_with_playwright_only
+    from tender_static import extract_static
+
+    results = []
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        for name, html in load_fixtures(args):
+            page.set_content(html)
+            cells = page.evaluate("document.querySelectorAll('td, th').length")
+
+            locator_data, locator_seconds, locator_trips = time_extractor(page, extract_with_playwright_only, args.repeats)
+            single_data, single_seconds, single_trips = time_extractor(page, extract_sections, args.repeats)
+            static_data, static_seconds, _ = time_extractor(html, extract_static, args.repeats)
+
+            result = {
+                "fixture": name,
+                "cells": cells,
+                "locator_seconds": round(locator_seconds, 4),
+                "locator_round_trips": locator_trips,
+                "evaluate_seconds": round(single_seconds, 4),
+                "evaluate_round_trips": single_trips,
+                "static_seconds": round(static_seconds, 4),
+                "speedup": round(locator_seconds / max(single_seconds, 1e-9), 1),
+                "static_speedup": round(single_seconds / max(static_seconds, 1e-9), 1),
+                "identical": locator_data == single_data == static_data,
+            }
+            results.append(result)
+            print(
+                f"{name:<24} {cells:>6} cells | locators {result['locator_seconds']:>8}s {locator_trips:>6} trips | "
+                f"evaluate {result['evaluate_seconds']:>8}s {single_trips:>3} trips | "
+                f"lxml {result['static_seconds']:>8}s | x{result['speedup']} identical={result['identical']}"
+            )
+        browser.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-cell locator vs single page.evaluate tender extraction")
+    parser.add_argument("--html", nargs="+", help="saved tender pages; default is synthetic fixtures")
+    parser.add_argument("--sections", type=int, default=8)
+    parser.add_argument("--rows", default="5,20,50", help="comma-separated rows per synthetic section")
+    parser.add_argument("--repeats", type=int, default=3, help="best of N per extractor")
+    parser.add_argument("--output", default="bench_scraper.json")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    report = {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "results": results,
+    }
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Report written to {args.output}")
+
+    if not all(r["identical"] for r in results):
+        sys.exit("extractors disagree: compare extract_with_playwright_only, extract_sections and extract_static")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import platform
+import importlib
+import contextlib
+import subprocess
+from collections import Counter
+
+import httpx
+
+# In-process load test of webhook_app.py and new-webhook_app.py.
+# Requests go through httpx's ASGI transport (no sockets) and Mongo is
+# mongomock-motor by default, or a real/ephemeral mongod via --mongo-uri.
+# mongomock has no real indexes, so every upsert scans the collection; upsert
+# runs are capped small there, and its numbers show app overhead only.
+
+BENCH_ENV = {
+    "MONGO_URI": "mongodb://127.0.0.1:27017",
+    "DB_NAME": "webhook_bench",
+    "COLLECTION_NAME_1": "webhook_events",
+    "COLLECTION_NAME_2": "webhook_events_2",
+    "OBD_ITEMS": "out_bound_call_items",
+    "OBD_CALLS": "out_bound_calls",
+    "WEBHOOK_SPILL_FILE": "bench_webhook_spill.jsonl",
+}
+SHEET_NAME = "main_sheet"
+
+
+# Helpers
+def rss_mb() -> float:
+    # Current resident set size; /proc is Linux-only, fall back to the peak
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def mongo_database(mongo_uri, db_name):
+    if mongo_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        return AsyncIOMotorClient(mongo_uri)[db_name]
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        raise SystemExit("pip install mongomock-motor, or pass --mongo-uri of a throwaway mongod")
+    return AsyncMongoMockClient()[db_name]
+
+
+# Payloads
+def sheet_records(count, replay_share=0.0):
+    records = []
+    for i in range(count):
+        # A replayed record reuses a fixed hash, so it should come back as skipped
+        replay = i < int(count * replay_share)
+        key = f"replay-{i}" if replay else uuid.uuid4().hex
+        records.append({
+            "row_number": i + 2,
+            "event_id": f"evt-{key}",
+            "hash": key,
+            "data": {"Name": f"user {i}", "Phone": 919000000000 + i, "Email": f"user{i}@test.com"},
+        })
+    return records
+
+def build_request(scenario, records, replay_share):
+    if scenario == "webhook":
+        return "/api/webhook", {"json": {"source": {"sheet_name": SHEET_NAME}, "records": sheet_records(records)}}
+    if scenario == "vapi-event":
+        return "/api/vapi/webhook", {"json": {"message": {
+            "type": "end-of-call-report",
+            "endedReason": "customer-ended-call",
+            "cost": 0.05,
+            "call": {"id": uuid.uuid4().hex},
+        }}}
+    if scenario == "call-items":
+        return "/api/out-bound-call-item", {"json": {
+            "source": {"sheet_name": SHEET_NAME},
+            "records": sheet_records(records, replay_share),
+        }}
+    if scenario == "call-items-stream":
+        body = "\n".join(json.dumps(r) for r in sheet_records(records, replay_share)).encode()
+        return f"/api/out-bound-call-item/stream?sheet_name={SHEET_NAME}", {"content": body}
+    raise ValueError(f"Unknown scenario {scenario}")
+
+
+# App Wiring
+def load_apps(db):
+    webhook_app = importlib.import_module("webhook_app")
+    webhook_app.collcetion = db[BENCH_ENV["COLLECTION_NAME_1"]]
+    webhook_app.collection_call_items = db[BENCH_ENV["OBD_ITEMS"]]
+    webhook_app.webhook_buffer.collection = webhook_app.collcetion
+
+    items_app = importlib.import_module("new-webhook_app")
+    items_app.collection_odb_calls = db[BENCH_ENV["OBD_CALLS"]]
+    items_app.collection_odb_call_items = db[BENCH_ENV["OBD_ITEMS"]]
+    return {"webhook_app": webhook_app, "new-webhook_app": items_app}
+
+SCENARIOS = {
+    "webhook": "webhook_app",
+    "vapi-event": "webhook_app",
+    "call-items": "new-webhook_app",
+    "call-items-stream": "new-webhook_app",
+}
+
+
+# Load Generator
+async def fire(client, scenario, records, requests, concurrency, replay_share):
+    latencies = []
+    statuses = Counter()
+    payloads = [build_request(scenario, records, replay_share) for _ in range(requests)]
+    pending = iter(payloads)
+
+    async def worker():
+        for path, body in pending:
+            start = time.perf_counter()
+            response = await client.post(path, **body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[response.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, statuses
+
+async def run_scenario(db, module, scenario, records, requests, concurrency, replay_share):
+    app = module.app
+    # Each run starts from empty collections so sizes don't skew each other
+    for name in (BENCH_ENV["COLLECTION_NAME_1"], BENCH_ENV["OBD_ITEMS"]):
+        await db[name].drop()
+    rss_before = rss_mb()
+
+    # ASGITransport skips lifespan, so startup/shutdown run here (indexes, write-behind buffer)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            # The apps print per request; keep the report readable
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                elapsed, latencies, statuses = await fire(client, scenario, records, requests, concurrency, replay_share)
+        drain_start = time.perf_counter()
+    # Leaving the lifespan flushes the write-behind buffer; count it for webhook_app
+    drain_seconds = time.perf_counter() - drain_start
+
+    total_records = requests * (1 if scenario == "vapi-event" else records)
+    total_seconds = elapsed + (drain_seconds if scenario == "webhook" else 0)
+    return {
+        "app": SCENARIOS[scenario],
+        "scenario": scenario,
+        "records_per_request": records if scenario != "vapi-event" else 1,
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "drain_seconds": round(drain_seconds, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+        "records_per_second": round(total_records / total_seconds, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies), 2),
+        },
+        "statuses": {str(code): count for code, count in statuses.items()},
+        "rss_mb_before": round(rss_before, 1),
+        "rss_mb_after": round(rss_mb(), 1),
+        "rss_growth_mb": round(rss_mb() - rss_before, 1),
+    }
+
+async def run(args):
+    for name, value in BENCH_ENV.items():
+        os.environ.setdefault(name, value)
+
+    db = mongo_database(args.mongo_uri, os.environ["DB_NAME"])
+    apps = load_apps(db)
+
+    # The call-items app only accepts sheets whose parent out_bound_calls exists
+    from bson import ObjectId
+
+    parent_id = ObjectId(apps["new-webhook_app"].mapping[SHEET_NAME])
+    await db[BENCH_ENV["OBD_CALLS"]].update_one({"_id": parent_id}, {"$set": {"processed": True}}, upsert=True)
+
+    max_records = args.max_records or (100_000 if args.mongo_uri else 1_000)
+    results = []
+    try:
+        for scenario in args.scenarios.split(","):
+            sizes = [1] if scenario == "vapi-event" else [int(size) for size in args.records.split(",")]
+            for records in sizes:
+                requests = max(1, min(args.requests, max_records // records))
+                result = await run_scenario(
+                    db, apps[SCENARIOS[scenario]], scenario, records, requests, args.concurrency, args.replay_share
+                )
+                results.append(result)
+                print(
+                    f"{scenario:<18} {records:>6} rec/req | {result['requests_per_second']:>8} req/s "
+                    f"{result['records_per_second']:>10} rec/s | p99 {result['latency_ms']['p99']} ms | "
+                    f"rss +{result['rss_growth_mb']} MB"
+                )
+    finally:
+        if args.mongo_uri:
+            await db.client.drop_database(os.environ["DB_NAME"])
+        if os.path.exists(os.environ["WEBHOOK_SPILL_FILE"]):
+            os.remove(os.environ["WEBHOOK_SPILL_FILE"])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for webhook_app.py and new-webhook_app.py")
+    parser.add_argument("--scenarios", default="webhook,vapi-event,call-items,call-items-stream")
+    parser.add_argument("--records", default="1,10,100,1000", help="records per request")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--max-records", type=int, help="caps requests x records per run (default 1000 mongomock, 100000 mongod)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--replay-share", type=float, default=0.1, help="share of records resent with a known hash")
+    parser.add_argument("--mongo-uri", help="real/ephemeral mongod instead of mongomock (its DB is dropped after)")
+    parser.add_argument("--output", default="bench_webhooks.json")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    report = {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "mongo": "mongod" if args.mongo_uri else "mongomock-motor",
+        "config": vars(args),
+        "results": results,
+    }
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
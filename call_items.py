@@ -0,0 +1,131 @@
+import json
+
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from metrics import MONGO_BATCH_SIZE
+
+DUPLICATE_KEY = 11000
+
+# Fields a re-sent record may legitimately change without being new work
+MUTABLE_FIELDS = ["row_number", "event_id", "sheet_name"]
+
+
+# Documents
+def record_data(record) -> dict:
+    if not isinstance(record, dict):
+        raise ValueError("Each record must be a dictionary.")
+
+    data = record.get("data")
+    if not isinstance(data, dict):
+        raise ValueError("record data must be dictionary.")
+    return data
+
+def build_call_item(record, data, excel_id, sheet_name, now) -> dict:
+    return {
+        "excel_id": excel_id,
+        "name": data.get("Name"),
+        "phone": str(data.get("Phone")),
+        "email": data.get("Email"),
+        "row_number": record.get("row_number"),
+        "event_id": record.get("event_id"),
+        "sheet_name": sheet_name,
+        "hash": record.get("hash"),
+        "status": "queued",
+        "no_of_conversation": 0,
+        "cost": 0,
+        "count_status": False,
+        "isDeleted": False,
+        "createdAt": now,
+        "updatedAt": now,
+    }
+
+def dedup_key(doc):
+    # Same sheet + same content hash is the same queue item; event_id is the fallback
+    if doc.get("hash"):
+        return {"excel_id": doc["excel_id"], "hash": doc["hash"]}
+    if doc.get("event_id"):
+        return {"excel_id": doc["excel_id"], "event_id": doc["event_id"]}
+    return None
+
+def build_write(doc, key):
+    if key is None:
+        return InsertOne(doc)
+
+    mutable = {f: doc[f] for f in MUTABLE_FIELDS if f not in key and doc.get(f) is not None}
+    on_insert = {f: v for f, v in doc.items() if f not in key and f not in mutable}
+    update = {"$setOnInsert": on_insert}
+    if mutable:
+        update["$set"] = mutable
+    return UpdateOne(key, update, upsert=True)
+
+
+# Bulk Write
+async def write_call_items(collection, documents) -> dict:
+    """Idempotent bulk upsert; returns inserted / updated / skipped counts.
+
+    Replayed records hit an existing (excel_id, hash) or (excel_id, event_id)
+    and are skipped; a known record whose row_number or event_id moved is
+    counted as updated.
+    """
+    operations = []
+    seen = set()
+    for doc in documents:
+        key = dedup_key(doc)
+        if key is not None:
+            marker = tuple(sorted((k, str(v)) for k, v in key.items()))
+            if marker in seen:
+                continue
+            seen.add(marker)
+        operations.append(build_write(doc, key))
+
+    if not operations:
+        return {"inserted": 0, "updated": 0, "skipped": len(documents)}
+
+    MONGO_BATCH_SIZE.labels("call_items_bulk_write").observe(len(operations))
+    try:
+        result = await collection.bulk_write(operations, ordered=False)
+        inserted = result.upserted_count + result.inserted_count
+        updated = result.modified_count
+    except BulkWriteError as e:
+        # Unique-index collisions (concurrent replays) are duplicates, anything else is real
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != DUPLICATE_KEY for error in errors):
+            raise
+        inserted = e.details.get("nUpserted", 0) + e.details.get("nInserted", 0)
+        updated = e.details.get("nModified", 0)
+
+    return {"inserted": inserted, "updated": updated, "skipped": len(documents) - inserted - updated}
+
+
+# NDJSON Streaming
+async def iter_ndjson(byte_chunks, max_line_bytes=1_048_576):
+    """Yield ``(line_number, record_or_error)`` from an async stream of bytes.
+
+    Only the current partial line is buffered, so memory stays bounded by
+    ``max_line_bytes`` however large the upload is. Lines that are not valid
+    JSON yield a ``ValueError`` instead of a record.
+    """
+    pending = b""
+    line_number = 0
+
+    def parse(line):
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            return ValueError(f"invalid JSON: {e}")
+
+    async for chunk in byte_chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, parse(line)
+
+        # Complete lines of this chunk go out first, so they are written before the error
+        if len(pending) > max_line_bytes:
+            raise ValueError(f"NDJSON line {line_number + 1} exceeds {max_line_bytes} bytes")
+
+    if pending.strip():
+        yield line_number + 1, parse(pending)
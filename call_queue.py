@@ -0,0 +1,566 @@
+import os
+import abc
+import socket
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+# Row shape the dialers work with (Excel / Google Sheet column names)
+QUEUE_COLUMNS = [
+    "sr_no", "user_name", "phone_number", "email", "status",
+    "called_at", "next_try", "request_id", "updated_at", "no_of_tries",
+]
+TIMESTAMP_COLUMNS = ["called_at", "next_try", "updated_at"]
+FRESH_STATUSES = ["", "queued"]
+RETRY_STATUS = "no-response"
+CLAIMED_STATUS = "dialing"
+LEASE_SECONDS = 300
+
+
+# Helpers
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def to_utc(value):
+    if value is None or value == "" or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    # Naive timestamps are taken as UTC, like the Sheets dialer does
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+def to_utc_text(value):
+    dt = to_utc(value)
+    return dt.isoformat(timespec="milliseconds") if dt else None
+
+
+class CallQueue(abc.ABC):
+    """Where the dialer gets due rows from and writes call state back to.
+
+    ``claim(limit)`` returns a DataFrame of up to ``limit`` eligible rows
+    (all of them when ``limit`` is None) that no other claim in this run,
+    or for the database backends any other process, will hand out again.
+
+    Backends with ``supports_leases`` hold each claimed row under a lease
+    (``claimed_by`` / ``lease_expires_at``): the worker renews it while the
+    call is in flight and releases it afterwards, and a row whose lease ran
+    out (crashed worker) becomes claimable again.
+    """
+
+    name = "base"
+    key_column = "sr_no"
+    supports_leases = False
+
+    async def start(self):
+        pass
+
+    @abc.abstractmethod
+    async def claim(self, limit=None, worker_id=None, lease_seconds=LEASE_SECONDS) -> pd.DataFrame:
+        ...
+
+    async def renew(self, sr_nos, worker_id, lease_seconds=LEASE_SECONDS) -> int:
+        return 0
+
+    async def release(self, sr_no, worker_id, retry_at=None):
+        pass
+
+    @abc.abstractmethod
+    async def update(self, sr_no, fields: dict):
+        ...
+
+    @abc.abstractmethod
+    async def summary(self) -> dict:
+        """``{"rows", "due", "statuses": {status: count}}`` without claiming anything."""
+
+    async def close(self):
+        pass
+
+
+# File Backends: whole dataset in memory, filtered with the vectorized engine
+class _FrameCallQueue(CallQueue):
+    def __init__(self, store, utc=True, retry_gap_hours=24, max_tries=None, tries_column="no_of_tries"):
+        self.store = store
+        self.eligibility = {
+            "utc": utc,
+            "retry_gap_hours": retry_gap_hours,
+            "max_tries": max_tries,
+            "tries_column": tries_column,
+        }
+        self._claimed = set()
+
+    @property
+    def utc(self):
+        return self.eligibility["utc"]
+
+    async def claim(self, limit=None, worker_id=None, lease_seconds=LEASE_SECONDS, horizon_seconds=0) -> pd.DataFrame:
+        """Claim rows due now, or within ``horizon_seconds`` for a scheduler to hold."""
+        from eligibility import eligible_mask
+
+        df = self.store.df
+        if df.empty:
+            return df
+
+        now = None
+        if horizon_seconds:
+            now = (datetime.now(timezone.utc) if self.utc else datetime.now()) + timedelta(seconds=horizon_seconds)
+
+        keys = df[self.key_column].astype(str)
+        due = df[eligible_mask(df, now=now, **self.eligibility) & ~keys.isin(self._claimed)]
+        if limit:
+            due = due.head(limit)
+
+        self._claimed.update(due[self.key_column].astype(str))
+        return due.reset_index(drop=True)
+
+    async def update(self, sr_no, fields: dict):
+        # A written status ends the claim; if the row comes due again (a retry) it can be re-claimed
+        if "status" in fields:
+            self._claimed.discard(str(sr_no))
+        self.store.update(sr_no, fields)
+
+    async def summary(self) -> dict:
+        from eligibility import eligible_mask
+
+        df = self.store.df
+        if df.empty:
+            return {"rows": 0, "due": 0, "statuses": {}}
+        status = df["status"].astype(str).str.strip() if "status" in df.columns else pd.Series("", index=df.index)
+        status = status.mask(status.isin(["", "nan", "None"]), "queued")
+        return {
+            "rows": len(df),
+            "due": int(eligible_mask(df, **self.eligibility).sum()),
+            "statuses": {name: int(count) for name, count in status.value_counts().items()},
+        }
+
+    async def close(self):
+        await self.store.close()
+
+
+class ExcelCallQueue(_FrameCallQueue):
+    name = "excel"
+
+    def __init__(self, path, sheet_name, flush_interval=5.0, **eligibility):
+        from excel_store import ExcelStateStore
+
+        eligibility.setdefault("utc", False)
+        super().__init__(ExcelStateStore(path, sheet_name, self.key_column, flush_interval), **eligibility)
+        self._loaded = False
+
+    async def start(self):
+        self.store.load()
+        self.store.start()
+        self._loaded = True
+
+    async def claim(self, limit=None, worker_id=None, lease_seconds=LEASE_SECONDS, horizon_seconds=0) -> pd.DataFrame:
+        # Later passes (--worker horizons) re-read the workbook for rows added or edited since
+        if self._loaded:
+            self._loaded = False
+        else:
+            await self.store.reload()
+        return await super().claim(limit, worker_id, lease_seconds, horizon_seconds)
+
+
+class SheetsCallQueue(_FrameCallQueue):
+    name = "sheets"
+
+    def __init__(self, worksheet, flush_interval=5.0, snapshot_path=None, **eligibility):
+        from sheet_store import SheetStore
+
+        super().__init__(SheetStore(worksheet, self.key_column, flush_interval, snapshot_path), **eligibility)
+        self._loaded = False
+
+    async def start(self):
+        # A zero-argument callable defers Google auth until the queue is actually used
+        if callable(self.store.worksheet):
+            self.store.worksheet = self.store.worksheet()
+        self.store.load()
+        self.store.start()
+        self._loaded = True
+
+    async def claim(self, limit=None, worker_id=None, lease_seconds=LEASE_SECONDS, horizon_seconds=0) -> pd.DataFrame:
+        # Later passes (--worker reloads) merge only the rows changed on the sheet since
+        if self._loaded:
+            self._loaded = False
+        else:
+            await self.store.flush()
+            self.store.sync()
+        return await super().claim(limit, worker_id, lease_seconds, horizon_seconds)
+
+
+# SQLite Backend
+class SQLiteCallQueue(CallQueue):
+    name = "sqlite"
+    supports_leases = True
+
+    def __init__(self, path="call_queue.db", table="call_queue", retry_gap_hours=24, max_tries=None, **_):
+        self.path = path
+        self.table = table
+        self.retry_gap_hours = retry_gap_hours
+        self.max_tries = max_tries
+        self.conn = None
+        self.columns = []
+        self._lock = asyncio.Lock()
+
+    async def _run(self, method, *args):
+        # sqlite3 blocks (up to the 30 s busy timeout on a locked database), so every
+        # call runs in a thread; the lock keeps the shared connection to one at a time
+        async with self._lock:
+            return await asyncio.to_thread(method, *args)
+
+    def _connect(self):
+        if self.conn is not None:
+            return self.conn
+
+        self.conn = sqlite3.connect(self.path, isolation_level=None, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "sr_no TEXT PRIMARY KEY, user_name TEXT, phone_number TEXT, email TEXT, "
+            "status TEXT DEFAULT 'queued', called_at TEXT, next_try TEXT, "
+            "request_id TEXT, updated_at TEXT, no_of_tries INTEGER DEFAULT 0, "
+            "claimed_by TEXT, lease_expires_at TEXT)"
+        )
+        self.conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{self.table}_status_next_try "
+            f"ON {self.table} (status, next_try)"
+        )
+        self._load_columns()
+        self._ensure_columns(["claimed_by", "lease_expires_at"])
+        return self.conn
+
+    def _load_columns(self):
+        self.columns = [row["name"] for row in self.conn.execute(f"PRAGMA table_info({self.table})")]
+
+    def _ensure_columns(self, names):
+        for name in names:
+            if name not in self.columns:
+                self.conn.execute(f'ALTER TABLE {self.table} ADD COLUMN "{name}" TEXT')
+        self._load_columns()
+
+    def _encode(self, name, value):
+        if name in TIMESTAMP_COLUMNS:
+            return to_utc_text(value)
+        if value is not None and not isinstance(value, (str, int, float)):
+            value = None if pd.isna(value) else str(value)
+        return value
+
+    def _eligible_sql(self):
+        # status/next_try branches are served by the (status, next_try) index
+        sql = (
+            "(status IS NULL OR status IN ('', 'queued') "
+            " OR (status = :retry AND next_try <= :now) "
+            " OR (status = :retry AND next_try IS NULL AND called_at <= :retry_cutoff) "
+            " OR (status = :claimed AND (lease_expires_at IS NULL OR lease_expires_at <= :now)))"
+        )
+        if self.max_tries is not None:
+            sql += " AND COALESCE(no_of_tries, 0) <= :max_tries"
+        return sql
+
+    def _params(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        return {
+            "retry": RETRY_STATUS,
+            "claimed": CLAIMED_STATUS,
+            "now": now.isoformat(timespec="milliseconds"),
+            "retry_cutoff": (now - timedelta(hours=self.retry_gap_hours)).isoformat(timespec="milliseconds"),
+            "max_tries": self.max_tries,
+        }
+
+    async def start(self):
+        await self._run(self._connect)
+
+    async def summary(self) -> dict:
+        return await self._run(self._summary)
+
+    def _summary(self) -> dict:
+        conn = self._connect()
+        statuses = {
+            row["status"] or "queued": row["count"]
+            for row in conn.execute(f"SELECT status, COUNT(*) AS count FROM {self.table} GROUP BY status")
+        }
+        due = conn.execute(f"SELECT COUNT(*) FROM {self.table} WHERE {self._eligible_sql()}", self._params()).fetchone()[0]
+        return {"rows": sum(statuses.values()), "due": due, "statuses": statuses}
+
+    def import_dataframe(self, df: pd.DataFrame) -> int:
+        conn = self._connect()
+        df = df.astype(object).where(df.notna(), None)
+        self._ensure_columns(df.columns)
+
+        names = list(df.columns)
+        rows = [[self._encode(n, v) for n, v in zip(names, values)] for values in df.itertuples(index=False)]
+        quoted = ", ".join(f'"{n}"' for n in names)
+        marks = ", ".join("?" for _ in names)
+
+        before = conn.total_changes
+        conn.execute("BEGIN")
+        conn.executemany(f"INSERT OR IGNORE INTO {self.table} ({quoted}) VALUES ({marks})", rows)
+        conn.execute("COMMIT")
+        return conn.total_changes - before
+
+    async def claim(self, limit=None, worker_id=None, lease_seconds=LEASE_SECONDS) -> pd.DataFrame:
+        return await self._run(self._claim, limit, worker_id, lease_seconds)
+
+    def _claim(self, limit, worker_id, lease_seconds) -> pd.DataFrame:
+        conn = self._connect()
+        now = datetime.now(timezone.utc)
+        params = self._params(now)
+        params.update({
+            "limit": limit or -1,
+            "worker": worker_id or default_worker_id(),
+            "lease": (now + timedelta(seconds=lease_seconds)).isoformat(timespec="milliseconds"),
+        })
+
+        # BEGIN IMMEDIATE takes the write lock first, so two dialers can't claim the same row
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                f"UPDATE {self.table} SET status = :claimed, claimed_by = :worker, lease_expires_at = :lease "
+                f"WHERE sr_no IN (SELECT sr_no FROM {self.table} WHERE {self._eligible_sql()} "
+                f"ORDER BY next_try LIMIT :limit) RETURNING *",
+                params,
+            ).fetchall()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return pd.DataFrame([dict(row) for row in rows], columns=self.columns)
+
+    async def renew(self, sr_nos, worker_id, lease_seconds=LEASE_SECONDS) -> int:
+        sr_nos = [str(sr_no) for sr_no in sr_nos]
+        if not sr_nos:
+            return 0
+        return await self._run(self._renew, sr_nos, worker_id, lease_seconds)
+
+    def _renew(self, sr_nos, worker_id, lease_seconds) -> int:
+        conn = self._connect()
+        lease = (datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)).isoformat(timespec="milliseconds")
+        marks = ", ".join("?" for _ in sr_nos)
+        cursor = conn.execute(
+            f"UPDATE {self.table} SET lease_expires_at = ? "
+            f"WHERE claimed_by = ? AND sr_no IN ({marks})",
+            [lease, worker_id] + sr_nos,
+        )
+        return cursor.rowcount
+
+    async def release(self, sr_no, worker_id, retry_at=None):
+        await self._run(self._release, sr_no, worker_id, retry_at)
+
+    def _release(self, sr_no, worker_id, retry_at):
+        conn = self._connect()
+        now = datetime.now(timezone.utc)
+        retry_at = to_utc_text(retry_at or now + timedelta(hours=self.retry_gap_hours))
+
+        # Still 'dialing' means the call was never placed: retry it after the normal gap
+        conn.execute(
+            f"UPDATE {self.table} SET claimed_by = NULL, lease_expires_at = NULL, "
+            f"next_try = CASE WHEN status = :claimed THEN :retry_at ELSE next_try END, "
+            f"status = CASE WHEN status = :claimed THEN :retry ELSE status END "
+            f"WHERE sr_no = :sr_no AND claimed_by = :worker",
+            {"claimed": CLAIMED_STATUS, "retry": RETRY_STATUS, "retry_at": retry_at,
+             "sr_no": str(sr_no), "worker": worker_id},
+        )
+
+    async def update(self, sr_no, fields: dict):
+        await self._run(self._update, sr_no, fields)
+
+    def _update(self, sr_no, fields):
+        conn = self._connect()
+        self._ensure_columns(fields)
+        assignments = ", ".join(f'"{name}" = ?' for name in fields)
+        values = [self._encode(name, value) for name, value in fields.items()]
+        conn.execute(f"UPDATE {self.table} SET {assignments} WHERE sr_no = ?", values + [str(sr_no)])
+
+    async def close(self):
+        if self.conn is not None:
+            await self._run(self.conn.close)
+            self.conn = None
+
+
+# Mongo Backend: the out_bound_call_items written by new-webhook_app.py
+class MongoCallQueue(CallQueue):
+    name = "mongo"
+    supports_leases = True
+
+    # dialer column -> out_bound_call_items field
+    FIELD_MAP = {"user_name": "name", "phone_number": "phone"}
+
+    def __init__(self, uri, db_name, collection, excel_id=None, retry_gap_hours=24, max_tries=None, **_):
+        self.uri = uri
+        self.db_name = db_name
+        self.collection_name = collection
+        self.excel_id = excel_id
+        self.retry_gap_hours = retry_gap_hours
+        self.max_tries = max_tries
+        self.client = None
+        self.collection = None
+
+    def _eligible_filter(self, now):
+        query = {
+            "isDeleted": {"$ne": True},
+            "$or": [
+                {"status": {"$in": [None] + FRESH_STATUSES}},
+                {"status": RETRY_STATUS, "next_try": {"$lte": now}},
+                {
+                    "status": RETRY_STATUS,
+                    "next_try": None,
+                    "called_at": {"$lte": now - timedelta(hours=self.retry_gap_hours)},
+                },
+                {"status": CLAIMED_STATUS, "lease_expires_at": {"$not": {"$gt": now}}},
+            ],
+        }
+        if self.excel_id:
+            from bson import ObjectId
+
+            query["excel_id"] = ObjectId(self.excel_id)
+        if self.max_tries is not None:
+            query["no_of_tries"] = {"$not": {"$gt": self.max_tries}}
+        return query
+
+    def _to_row(self, doc):
+        row = {column: doc.get(self.FIELD_MAP.get(column, column)) for column in QUEUE_COLUMNS}
+        row["sr_no"] = str(doc["_id"])
+        return row
+
+    async def start(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from mongo_indexes import ensure_indexes
+
+        self.client = AsyncIOMotorClient(self.uri)
+        self.collection = self.client[self.db_name][self.collection_name]
+        await ensure_indexes(call_items=self.collection)
+
+    async def claim(self, limit=None, worker_id=None, lease_seconds=LEASE_SECONDS) -> pd.DataFrame:
+        from pymongo import ReturnDocument
+
+        now = datetime.now(timezone.utc)
+        query = self._eligible_filter(now)
+        lease = {
+            "status": CLAIMED_STATUS,
+            "claimed_by": worker_id or default_worker_id(),
+            "lease_expires_at": now + timedelta(seconds=lease_seconds),
+            "updatedAt": now,
+        }
+        rows = []
+
+        # find_one_and_update is atomic per document: each row goes to exactly one claimer
+        while limit is None or len(rows) < limit:
+            doc = await self.collection.find_one_and_update(
+                query,
+                {"$set": lease},
+                sort=[("next_try", 1)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if doc is None:
+                break
+            rows.append(self._to_row(doc))
+
+        return pd.DataFrame(rows, columns=QUEUE_COLUMNS)
+
+    async def summary(self) -> dict:
+        query = {"isDeleted": {"$ne": True}}
+        if self.excel_id:
+            from bson import ObjectId
+
+            query["excel_id"] = ObjectId(self.excel_id)
+        statuses = {
+            (group["_id"] or "queued"): group["count"]
+            async for group in self.collection.aggregate([
+                {"$match": query},
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+            ])
+        }
+        due = await self.collection.count_documents(self._eligible_filter(datetime.now(timezone.utc)))
+        return {"rows": sum(statuses.values()), "due": due, "statuses": statuses}
+
+    async def renew(self, sr_nos, worker_id, lease_seconds=LEASE_SECONDS) -> int:
+        from bson import ObjectId
+
+        ids = [ObjectId(sr_no) for sr_no in sr_nos]
+        if not ids:
+            return 0
+
+        lease = datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)
+        result = await self.collection.update_many(
+            {"_id": {"$in": ids}, "claimed_by": worker_id},
+            {"$set": {"lease_expires_at": lease}},
+        )
+        return result.modified_count
+
+    async def release(self, sr_no, worker_id, retry_at=None):
+        from bson import ObjectId
+
+        now = datetime.now(timezone.utc)
+        owned = {"_id": ObjectId(sr_no), "claimed_by": worker_id}
+        unset = {"claimed_by": "", "lease_expires_at": ""}
+
+        # Still 'dialing' means the call was never placed: retry it after the normal gap
+        await self.collection.update_one(
+            dict(owned, status=CLAIMED_STATUS),
+            {"$set": {
+                "status": RETRY_STATUS,
+                "next_try": to_utc(retry_at) or now + timedelta(hours=self.retry_gap_hours),
+                "updatedAt": now,
+            }},
+        )
+        await self.collection.update_one(owned, {"$unset": unset})
+
+    async def update(self, sr_no, fields: dict):
+        from bson import ObjectId
+
+        values = {}
+        for name, value in fields.items():
+            values[self.FIELD_MAP.get(name, name)] = to_utc(value) if name in TIMESTAMP_COLUMNS else value
+        values["updatedAt"] = datetime.now(timezone.utc)
+        await self.collection.update_one({"_id": ObjectId(sr_no)}, {"$set": values})
+
+    async def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+
+# Factory
+BACKENDS = {
+    "excel": ExcelCallQueue,
+    "sheets": SheetsCallQueue,
+    "sqlite": SQLiteCallQueue,
+    "mongo": MongoCallQueue,
+}
+
+def open_queue(backend, **options) -> CallQueue:
+    try:
+        queue_class = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown call queue backend {backend!r}, expected one of {sorted(BACKENDS)}")
+    return queue_class(**options)
+
+def queue_from_env(default_backend, **options) -> CallQueue:
+    """Build the queue named by CALL_QUEUE_BACKEND (falls back to ``default_backend``)."""
+    backend = os.getenv("CALL_QUEUE_BACKEND", default_backend)
+    eligibility = {k: options[k] for k in ("retry_gap_hours", "max_tries") if k in options}
+    flush_interval = options.get("flush_interval", 5.0)
+
+    if backend == "excel":
+        return ExcelCallQueue(options["path"], options["sheet_name"], flush_interval, **eligibility)
+    if backend == "sheets":
+        return SheetsCallQueue(options["worksheet"], flush_interval, options.get("snapshot_path"), **eligibility)
+    if backend == "sqlite":
+        return SQLiteCallQueue(path=os.getenv("QUEUE_DB_PATH", "call_queue.db"), **eligibility)
+    if backend == "mongo":
+        return MongoCallQueue(
+            uri=os.getenv("MONGO_URI"),
+            db_name=os.getenv("DB_NAME"),
+            collection=os.getenv("OBD_ITEMS"),
+            excel_id=os.getenv("OBD_EXCEL_ID"),
+            **eligibility,
+        )
+    return open_queue(backend, **options)
@@ -0,0 +1,206 @@
+import time
+import heapq
+import asyncio
+import itertools
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from eligibility import TRIES_COLUMN, due_at, tries_series
+
+# Country calling code -> timezone used when the sheet has no timezone column.
+# Multi-zone countries map to their most populous zone; set a column to override.
+PREFIX_TIMEZONES = {
+    "+1": "America/New_York",
+    "+7": "Europe/Moscow",
+    "+33": "Europe/Paris",
+    "+34": "Europe/Madrid",
+    "+39": "Europe/Rome",
+    "+44": "Europe/London",
+    "+49": "Europe/Berlin",
+    "+61": "Australia/Sydney",
+    "+65": "Asia/Singapore",
+    "+81": "Asia/Tokyo",
+    "+86": "Asia/Shanghai",
+    "+91": "Asia/Kolkata",
+    "+92": "Asia/Karachi",
+    "+94": "Asia/Colombo",
+    "+880": "Asia/Dhaka",
+    "+966": "Asia/Riyadh",
+    "+971": "Asia/Dubai",
+    "+977": "Asia/Kathmandu",
+}
+DEFAULT_WINDOW = "09:00-20:00"
+
+
+# Helpers
+def parse_window(text) -> tuple[pd.Timedelta, pd.Timedelta]:
+    """'09:00-20:00' -> (start, end) offsets from local midnight."""
+    try:
+        start, end = (pd.Timedelta(f"{part.strip()}:00") for part in str(text).split("-"))
+    except ValueError:
+        raise ValueError(f"Calling window must look like 09:00-20:00, got {text!r}")
+    if not start < end <= pd.Timedelta(hours=24):
+        raise ValueError(f"Calling window must start before it ends, got {text!r}")
+    return start, end
+
+def contact_timezones(df, default_timezone="UTC", column="timezone") -> pd.Series:
+    """Timezone per row: the ``column`` value if set, else the phone prefix."""
+    zones = pd.Series(default_timezone, index=df.index, dtype=object)
+
+    phones = df["phone"] if "phone" in df.columns else df.get("phone_number")
+    if phones is not None:
+        phones = phones.astype(str).str.strip()
+        phones = phones.where(phones.str.startswith("+"), "+" + phones)
+        # Shortest first so the longest matching prefix wins
+        for prefix in sorted(PREFIX_TIMEZONES, key=len):
+            zones = zones.mask(phones.str.startswith(prefix), PREFIX_TIMEZONES[prefix])
+
+    if column in df.columns:
+        given = df[column].astype(str).str.strip()
+        zones = zones.mask(df[column].notna() & ~given.isin(["", "nan", "None"]), given)
+    return zones
+
+def window_opening(times: pd.Series, zones: pd.Series, windows: pd.Series) -> pd.Series:
+    """Earliest instant at or after each UTC time that falls inside the row's local window."""
+    result = times.copy()
+    for (zone, window), group in times.groupby([zones, windows], sort=False):
+        start, end = parse_window(window)
+        local = group.dt.tz_convert(zone).dt.tz_localize(None)
+        midnight = local.dt.normalize()
+        clock = local - midnight
+
+        inside = (clock >= start) & (clock < end)
+        opening = midnight + start + pd.to_timedelta((clock >= end).astype(int), unit="D")
+        # An opening inside the repeated hour when DST ends is the earlier instant, never NaT
+        earliest = np.ones(len(opening), dtype=bool)
+        opening = opening.dt.tz_localize(
+            zone, ambiguous=earliest, nonexistent="shift_forward"
+        ).dt.tz_convert("UTC")
+        # Times already inside the window keep their own instant
+        result[group.index] = group.where(inside, opening)
+    return result
+
+
+class CallingWindowScheduler:
+    """Heap of rows keyed on the next instant each one may be dialed.
+
+    A row's due time is its retry time pushed forward into the contact's
+    local calling window (timezone from a ``timezone`` column or the phone
+    prefix, window from a ``call_window`` column or ``window``). Rows that
+    are due come out by ``priority`` (high first), then fewest tries, then
+    earliest due, and ``iter_due`` sleeps until exactly the next due time
+    instead of rescanning the queue.
+    """
+
+    def __init__(
+        self,
+        window=DEFAULT_WINDOW,
+        default_timezone="UTC",
+        priority_column="priority",
+        tries_column=TRIES_COLUMN,
+    ):
+        parse_window(window)
+        self.window = window
+        self.default_timezone = default_timezone
+        self.priority_column = priority_column
+        self.tries_column = tries_column
+        self._waiting = []     # (due_at, seq, priority, tries, row)
+        self._ready = []       # (-priority, tries, due_at, seq, row)
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._waiting) + len(self._ready)
+
+    # Loading
+    def in_window(self, df, due: pd.Series) -> pd.Series:
+        """Push each due time forward to the next opening of the row's window."""
+        zones = contact_timezones(df, self.default_timezone)
+        windows = pd.Series(self.window, index=df.index, dtype=object)
+        if "call_window" in df.columns:
+            given = df["call_window"].astype(str).str.strip()
+            windows = windows.mask(given.str.contains("-", regex=False), given)
+
+        due = due.copy()
+        known = due.notna()
+        due[known] = window_opening(due[known], zones[known], windows[known])
+        return due
+
+    def due_times(self, df, now=None, utc=True, retry_gap_hours=24) -> pd.Series:
+        due = due_at(df, now, utc, retry_gap_hours)
+        return due if df.empty else self.in_window(df, due)
+
+    def push_frame(self, df, now=None, utc=True, retry_gap_hours=24) -> int:
+        """Schedule every row of ``df`` that has a due time; returns how many."""
+        due = self.due_times(df, now, utc, retry_gap_hours)
+        priority = pd.to_numeric(df.get(self.priority_column), errors="coerce") if self.priority_column in df.columns else None
+        tries = tries_series(df, self.tries_column)
+
+        pushed = 0
+        for position, (_, row) in enumerate(df.iterrows()):
+            when = due.iloc[position]
+            if pd.isna(when):
+                continue
+            rank = 0.0 if priority is None or pd.isna(priority.iloc[position]) else float(priority.iloc[position])
+            heapq.heappush(self._waiting, (when.timestamp(), next(self._seq), rank, float(tries.iloc[position]), row))
+            pushed += 1
+        return pushed
+
+    # Draining
+    def _promote(self, now):
+        while self._waiting and self._waiting[0][0] <= now:
+            when, seq, rank, tries, row = heapq.heappop(self._waiting)
+            heapq.heappush(self._ready, (-rank, tries, when, seq, row))
+
+    def next_due_at(self) -> float | None:
+        if self._ready:
+            return time.time()
+        return self._waiting[0][0] if self._waiting else None
+
+    def pop_due(self, now=None):
+        self._promote(time.time() if now is None else now)
+        return heapq.heappop(self._ready)[-1] if self._ready else None
+
+    async def iter_due(self, wait_until=None):
+        """Yield rows as they fall due, sleeping until the next due time.
+
+        Stops once nothing is due and ``wait_until`` (an epoch timestamp)
+        has passed; None means only drain what is already due.
+        """
+        while True:
+            row = self.pop_due()
+            if row is not None:
+                yield row
+                continue
+
+            now = time.time()
+            if wait_until is None or now >= wait_until:
+                return
+            next_due = self.next_due_at()
+            wake = wait_until if next_due is None else min(next_due, wait_until)
+            await asyncio.sleep(max(wake - now, 0))
+
+    def deferred(self):
+        """Rows still waiting, with the UTC instant each becomes due."""
+        return [
+            (row, pd.Timestamp(when, unit="s", tz="UTC"))
+            for when, _, _, _, row in sorted(self._waiting, key=lambda item: item[0])
+        ]
+
+    def split(self, df, now=None):
+        """``(due_now, deferred)`` for a claimed batch.
+
+        ``deferred`` maps each key that is outside its calling window to the
+        UTC instant the window opens; lease-based workers hand these back to
+        the queue instead of dialing them.
+        """
+        now = pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now)
+        if df.empty:
+            return df, {}
+
+        # Claimed rows were already due, so only the calling window can hold them back
+        due = self.in_window(df, pd.Series(now, index=df.index, dtype="datetime64[ns, UTC]"))
+        later = due > now + timedelta(seconds=1)
+        deferred = dict(zip(df.loc[later, "sr_no"].astype(str), due[later]))
+        return df.loc[~later], deferred
@@ -0,0 +1,160 @@
+import time
+import asyncio
+
+from metrics import CALLS_IN_FLIGHT, DIALS_TOTAL
+from structured_log import get_logger
+
+log = get_logger(__name__)
+
+
+class TokenBucket:
+    """Calls-per-second limiter: ``rate`` tokens per second, up to ``capacity`` banked."""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def set_rate(self, rate: float):
+        if rate != self.rate:
+            self._refill()
+            self.rate = rate
+
+    async def acquire(self):
+        # Lock keeps waiters in FIFO order so no dial starves
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class DialStats:
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.dispatched = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+
+    @property
+    def elapsed(self) -> float:
+        return max(time.monotonic() - self.started_at, 1e-9)
+
+    @property
+    def calls_per_second(self) -> float:
+        return self.completed / self.elapsed
+
+    def summary(self) -> dict:
+        return {
+            "dispatched": self.dispatched,
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "calls_per_second": round(self.calls_per_second, 2),
+            "calls_per_hour": round(self.calls_per_second * 3600),
+            "elapsed_seconds": round(self.elapsed, 1),
+        }
+
+
+class DialScheduler:
+    """Keeps up to ``max_in_flight`` dials running, paced by a token bucket.
+
+    A slot frees up the moment ``dial(row)`` returns (the call is placed),
+    and the next row starts as soon as both a slot and a token are available,
+    so there is no per-batch barrier and no fixed sleep between batches.
+
+    An optional ``breaker`` (see ``vapi_retry.CircuitBreaker``) scales the
+    token rate by its ``rate_factor`` and can pause dispatch while the API
+    is rate limiting.
+    """
+
+    def __init__(
+        self,
+        dial,
+        max_in_flight: int = 2,
+        calls_per_second: float = 1.0,
+        burst: int = 1,
+        report_interval: float = 10.0,
+        breaker=None,
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.dial = dial
+        self.max_in_flight = max_in_flight
+        self.calls_per_second = calls_per_second
+        self.bucket = TokenBucket(calls_per_second, burst)
+        self.breaker = breaker
+        self.report_interval = report_interval
+        self.stats = DialStats()
+
+    async def _run_one(self, row, slots):
+        self.stats.in_flight += 1
+        CALLS_IN_FLIGHT.inc()
+        try:
+            await self.dial(row)
+            self.stats.completed += 1
+            DIALS_TOTAL.labels("completed").inc()
+        except Exception as e:
+            self.stats.failed += 1
+            DIALS_TOTAL.labels("failed").inc()
+            log.error("Dial failed in scheduler", extra={"error": str(e)})
+        finally:
+            self.stats.in_flight -= 1
+            CALLS_IN_FLIGHT.dec()
+            slots.release()
+
+    async def _report(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            summary = self.stats.summary()
+            if self.breaker is not None:
+                summary.update(self.breaker.summary())
+            log.info("Dial throughput", extra=summary)
+
+    async def run(self, rows) -> DialStats:
+        self.stats = DialStats()
+        slots = asyncio.Semaphore(self.max_in_flight)
+        tasks = set()
+        reporter = asyncio.create_task(self._report()) if self.report_interval > 0 else None
+
+        async def dispatch(row):
+            await slots.acquire()
+            if self.breaker is not None:
+                await self.breaker.wait()
+                self.bucket.set_rate(self.calls_per_second * self.breaker.rate_factor)
+            await self.bucket.acquire()
+
+            task = asyncio.create_task(self._run_one(row, slots))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            self.stats.dispatched += 1
+
+        try:
+            # Async iterables let a producer (e.g. a lease-claiming worker) feed rows on demand
+            if hasattr(rows, "__aiter__"):
+                async for row in rows:
+                    await dispatch(row)
+            else:
+                for row in rows:
+                    await dispatch(row)
+
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            if reporter:
+                reporter.cancel()
+
+        log.info("Dial scheduler finished", extra=self.stats.summary())
+        return self.stats
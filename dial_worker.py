@@ -0,0 +1,161 @@
+import time
+import asyncio
+
+from call_queue import LEASE_SECONDS, default_worker_id
+from dial_scheduler import DialScheduler
+from metrics import ELIGIBILITY_SCAN_SECONDS
+from structured_log import get_logger
+
+log = get_logger(__name__)
+
+
+class LeaseKeeper:
+    """Renews the lease on every row this worker holds until it is released."""
+
+    def __init__(self, queue, worker_id, lease_seconds=LEASE_SECONDS, renew_interval=None):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.renew_interval = renew_interval or lease_seconds / 3
+        self.held = set()
+        self._task = None
+
+    async def _renew_loop(self):
+        while True:
+            await asyncio.sleep(self.renew_interval)
+            if not self.held:
+                continue
+            try:
+                await self.queue.renew(list(self.held), self.worker_id, self.lease_seconds)
+            except Exception as e:
+                log.warning("Lease renewal failed", extra={"rows": len(self.held), "error": str(e)})
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._renew_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+async def run_worker(
+    queue,
+    dial,
+    worker_id=None,
+    claim_size=10,
+    lease_seconds=LEASE_SECONDS,
+    idle_seconds=5.0,
+    max_idle_polls=None,
+    max_rows=None,
+    prepare=None,
+    **scheduler_options,
+):
+    """Claim rows under a lease and dial them until the queue stays empty.
+
+    Several workers (processes or hosts) can share one database-backed
+    queue: a row is only dialed by the worker holding its lease, and rows
+    left behind by a crashed worker are reclaimed once the lease expires.
+    ``max_idle_polls=None`` keeps polling forever; ``max_rows`` caps the run.
+    ``prepare`` is awaited on each claimed batch and returns the rows worth
+    dialing; rows it drops are released without taking a dial slot.
+    """
+    if not queue.supports_leases:
+        raise RuntimeError(f"The {queue.name} queue has no leases; run workers on sqlite or mongo")
+
+    worker_id = worker_id or default_worker_id()
+    keeper = LeaseKeeper(queue, worker_id, lease_seconds)
+
+    async def leased_dial(row):
+        sr_no = str(row["sr_no"])
+        try:
+            await dial(row)
+        finally:
+            keeper.held.discard(sr_no)
+            await queue.release(sr_no, worker_id)
+
+    async def claimed_rows():
+        idle_polls = 0
+        claimed = 0
+        while max_idle_polls is None or idle_polls < max_idle_polls:
+            limit = claim_size if max_rows is None else min(claim_size, max_rows - claimed)
+            if limit <= 0:
+                return
+
+            with ELIGIBILITY_SCAN_SECONDS.labels(queue.name).time():
+                batch = await queue.claim(limit, worker_id=worker_id, lease_seconds=lease_seconds)
+            if batch.empty:
+                idle_polls += 1
+                await asyncio.sleep(idle_seconds)
+                continue
+
+            idle_polls = 0
+            claimed += len(batch)
+            if prepare is not None:
+                ready = await prepare(batch)
+                for sr_no in set(batch["sr_no"].astype(str)) - set(ready["sr_no"].astype(str)):
+                    await queue.release(sr_no, worker_id)
+                batch = ready
+
+            keeper.held.update(batch["sr_no"].astype(str))
+            for _, row in batch.iterrows():
+                yield row
+
+    log.info("Dial worker started", extra={"worker_id": worker_id, "lease_seconds": lease_seconds, "claim_size": claim_size})
+    keeper.start()
+    try:
+        scheduler = DialScheduler(leased_dial, **scheduler_options)
+        return await scheduler.run(claimed_rows())
+    finally:
+        await keeper.close()
+
+
+async def run_scheduled(
+    queue,
+    dial,
+    schedule,
+    horizon_seconds=0,
+    forever=False,
+    max_rows=None,
+    prepare=None,
+    retry_gap_hours=24,
+    **scheduler_options,
+):
+    """Dial a file-backed queue through a ``CallingWindowScheduler``.
+
+    Rows due within ``horizon_seconds`` are claimed once and held in the
+    heap, which wakes exactly when the next one is due. ``forever`` reloads
+    the queue every horizon (to pick up newly due rows) instead of exiting.
+    ``prepare`` works like it does for ``run_worker``.
+    """
+    if forever and horizon_seconds <= 0:
+        raise ValueError("forever needs a horizon_seconds to reload on")
+
+    async def due_rows():
+        dialed = 0
+        while True:
+            with ELIGIBILITY_SCAN_SECONDS.labels(queue.name).time():
+                batch = await queue.claim(None, horizon_seconds=horizon_seconds)
+            if prepare is not None and not batch.empty:
+                batch = await prepare(batch)
+            if not batch.empty:
+                schedule.push_frame(batch, utc=queue.utc, retry_gap_hours=retry_gap_hours)
+
+            log.info("Calling window schedule loaded", extra={"waiting": len(schedule)})
+            wait_until = time.time() + horizon_seconds if horizon_seconds else None
+            async for row in schedule.iter_due(wait_until):
+                yield row
+                dialed += 1
+                if max_rows is not None and dialed >= max_rows:
+                    return
+
+            if not forever:
+                return
+
+    scheduler = DialScheduler(dial, **scheduler_options)
+    return await scheduler.run(due_rows())
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+# Statuses that mean "never called yet" (NaN / empty cells included)
+FRESH_STATUSES = ["", "nan", "queued"]
+RETRY_STATUS = "no-response"
+TRIES_COLUMN = "no_of_tries"   # dials so far; every backend and the gemini dialer use this one
+
+# An offset or Z after the time part marks a timezone-aware timestamp
+_TZ_SUFFIX = r"[T ].*(?:[Zz]|[+-]\d{2}(?::?\d{2})?)$"
+_INTEGER_TEXT = r"\s*[+-]?\d+\s*"
+
+
+# Helpers
+def parse_timestamps(values, index, utc=True):
+    """Parse a whole timestamp column at once.
+
+    utc=True: naive values are taken as UTC, as the Sheets dialer always did.
+    utc=False: naive values stay local wall clock, and aware values are
+    converted to local wall clock, as the Excel dialer compares them.
+    """
+    if values is None:
+        return pd.Series(pd.NaT, index=index, dtype="datetime64[ns, UTC]" if utc else "datetime64[ns]")
+
+    text = values.where(values.notna(), "").astype(str)
+    parsed = pd.to_datetime(text, utc=True, errors="coerce", format="ISO8601")
+    if utc:
+        return parsed
+
+    wall = parsed.dt.tz_localize(None)
+    aware = text.str.contains(_TZ_SUFFIX, regex=True)
+    if aware.any():
+        local_tz = datetime.now().astimezone().tzinfo
+        wall[aware] = parsed[aware].dt.tz_convert(local_tz).dt.tz_localize(None)
+    return wall
+
+def tries_series(df, column):
+    if column not in df.columns:
+        return pd.Series(0, index=df.index)
+
+    raw = df[column]
+    numeric = pd.to_numeric(raw, errors="coerce")
+
+    # int() only accepts integer text ("3"), not "2.5" or "3.0"
+    if not pd.api.types.is_numeric_dtype(raw):
+        is_text = raw.map(type).eq(str)
+        integer_text = raw.astype(str).str.fullmatch(_INTEGER_TEXT)
+        numeric = numeric.where(~is_text | integer_text)
+
+    numeric = numeric.where(np.isfinite(numeric))
+    return np.trunc(numeric).fillna(0)
+
+
+# Eligibility Engine
+def eligible_mask(df, now=None, utc=True, retry_gap_hours=24, max_tries=None, tries_column=TRIES_COLUMN):
+    """Vectorized ``is_valid_for_call`` (kept in bench_eligibility.py): one boolean per row, computed column-wise."""
+    if df.empty:
+        return pd.Series(False, index=df.index, dtype=bool)
+
+    if now is None:
+        now = pd.Timestamp.now(tz="UTC") if utc else pd.Timestamp(datetime.now())
+    else:
+        now = pd.Timestamp(now)
+        if utc:
+            now = now.tz_localize("UTC") if now.tzinfo is None else now.tz_convert("UTC")
+
+    # Status Mask
+    if "status" in df.columns:
+        raw_status = df["status"]
+        status = raw_status.astype(str).str.strip().str.lower()
+        fresh = raw_status.isna() | status.isin(FRESH_STATUSES)
+        retry = status.eq(RETRY_STATUS)
+    else:
+        fresh = pd.Series(True, index=df.index)
+        retry = pd.Series(False, index=df.index)
+
+    # Retry Window Mask: next_try wins, else called_at + gap
+    next_try = parse_timestamps(df.get("next_try"), df.index, utc)
+    called_at = parse_timestamps(df.get("called_at"), df.index, utc)
+    retry_at = next_try.where(next_try.notna(), called_at + pd.Timedelta(hours=retry_gap_hours))
+    due = retry_at.notna() & (retry_at <= now)
+
+    mask = fresh | (retry & due)
+
+    # Retry Count Mask
+    if max_tries is not None:
+        mask &= ~(tries_series(df, tries_column) > max_tries)
+
+    return mask.astype(bool)
+
+def filter_eligible(df, **kwargs):
+    return df[eligible_mask(df, **kwargs)].reset_index(drop=True)
+
+def due_at(df, now=None, utc=True, retry_gap_hours=24):
+    """When each row may be dialed, as UTC instants (NaT = never).
+
+    Fresh rows are due at ``now``; retry rows at ``next_try`` or
+    ``called_at + gap``. With utc=False naive values are local wall clock
+    and are converted, so Excel and Sheets queues compare on one clock.
+    """
+    now = pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now)
+    now = now.tz_localize("UTC") if now.tzinfo is None else now.tz_convert("UTC")
+    if df.empty:
+        return pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns, UTC]")
+
+    def instants(column):
+        parsed = parse_timestamps(df.get(column), df.index, utc)
+        if utc:
+            return parsed
+        local_tz = datetime.now().astimezone().tzinfo
+        # A wall time repeated when DST ends is read as the earlier instant, never NaT
+        earliest = np.ones(len(parsed), dtype=bool)
+        return parsed.dt.tz_localize(local_tz, ambiguous=earliest, nonexistent="shift_forward").dt.tz_convert("UTC")
+
+    next_try = instants("next_try")
+    retry_at = next_try.where(next_try.notna(), instants("called_at") + pd.Timedelta(hours=retry_gap_hours))
+
+    if "status" in df.columns:
+        status = df["status"].astype(str).str.strip().str.lower()
+        fresh = df["status"].isna() | status.isin(FRESH_STATUSES)
+        retry = status.eq(RETRY_STATUS)
+    else:
+        fresh = pd.Series(True, index=df.index)
+        retry = pd.Series(False, index=df.index)
+
+    due = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns, UTC]")
+    due = due.mask(retry, retry_at)
+    return due.mask(fresh, now)
@@ -0,0 +1,185 @@
+import os
+import time
+import asyncio
+import tempfile
+import pandas as pd
+
+from metrics import STORE_FLUSH_SECONDS
+from structured_log import get_logger
+
+log = get_logger(__name__)
+
+_STOP = object()   # queued by close() to end the writer task
+_RELOAD = object() # queued by reload() to re-read the workbook between writes
+MAX_FLUSH_BACKOFF = 60.0   # seconds between save retries while the workbook can't be written
+
+
+class ExcelStateStore:
+    """Single-writer owner of the call-queue workbook.
+
+    The DataFrame is loaded once and only the writer task mutates it:
+    ``update`` just enqueues ``(sr_no, fields)``, so overlapping tasks can
+    no longer lose each other's writes. Dirty state is saved atomically
+    (temp file + rename) at most once per ``flush_interval`` and at close.
+    """
+
+    def __init__(self, path, sheet_name, key_column="sr_no", flush_interval=5.0):
+        self.path = path
+        self.sheet_name = sheet_name
+        self.key_column = key_column
+        self.flush_interval = flush_interval
+        self.df = pd.DataFrame()
+        self.row_index = {}   # str(sr_no) -> DataFrame row position
+        self.flush_count = 0
+        self._queue = asyncio.Queue()
+        self._writer = None
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self._flush_delay = flush_interval   # doubles after each failed save, reset by a good one
+        self._reloads = []                   # reload() callers waiting on the writer
+
+    # Load
+    def load(self) -> pd.DataFrame:
+        self.df = pd.read_excel(self.path, sheet_name=self.sheet_name, dtype=str).astype(object)
+        self.row_index = {}
+        if self.key_column in self.df.columns:
+            for position, key in enumerate(self.df[self.key_column].astype(str)):
+                self.row_index.setdefault(key, position)
+        return self.df
+
+    # Lookups
+    def get(self, sr_no, column, default=None):
+        position = self.row_index.get(str(sr_no))
+        if position is None or column not in self.df.columns:
+            return default
+        value = self.df.iat[position, self.df.columns.get_loc(column)]
+        return default if pd.isna(value) or value == "" else value
+
+    # Writes
+    def update(self, sr_no, fields: dict):
+        self._queue.put_nowait((str(sr_no), dict(fields)))
+
+    def _apply(self, sr_no, fields):
+        position = self.row_index.get(sr_no)
+        if position is None:
+            log.warning("Row not found in Excel", extra={"sr_no": sr_no})
+            return
+
+        for name, value in fields.items():
+            if name not in self.df.columns:
+                self.df[name] = pd.Series(None, index=self.df.index, dtype=object)
+            self.df.iat[position, self.df.columns.get_loc(name)] = value
+        self._dirty = True
+
+    def _save(self):
+        # Write next to the target, then rename over it: readers never see a half-written file
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(suffix=".xlsx", dir=directory)
+        os.close(fd)
+        try:
+            self.df.to_excel(tmp_path, sheet_name=self.sheet_name, index=False)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    async def flush(self):
+        if not self._dirty:
+            return False
+
+        # Only the writer task mutates df, and it waits here, so no copy is needed
+        with STORE_FLUSH_SECONDS.labels("excel").time():
+            await asyncio.to_thread(self._save)
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self._flush_delay = self.flush_interval
+        self.flush_count += 1
+        log.debug("Excel state saved", extra={"flushes": self.flush_count})
+        return True
+
+    def _drain(self) -> bool:
+        """Apply everything queued; True if the stop marker was among it."""
+        stopped = False
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is _STOP:
+                stopped = True
+            elif item is not _RELOAD:
+                self._apply(*item)
+        return stopped
+
+    # Reload
+    async def reload(self):
+        """Save pending writes, then re-read the workbook for rows added or edited since."""
+        if self._writer is None:
+            self._drain()
+            await self._reload()
+            return self.df
+
+        # The writer does it between writes, so no update is applied to a frame being replaced
+        waiter = asyncio.get_running_loop().create_future()
+        self._reloads.append(waiter)
+        self._queue.put_nowait(_RELOAD)
+        await waiter
+        return self.df
+
+    async def _reload(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            # Re-reading now would drop the unsaved writes; keep the frame in memory
+            log.error("Excel reload skipped, pending writes not saved", extra={"error": str(e)})
+        else:
+            await asyncio.to_thread(self.load)
+        finally:
+            waiters, self._reloads = self._reloads, []
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    # Writer Task
+    async def _write_loop(self):
+        while True:
+            wait = max(0, self._last_flush + self._flush_delay - time.monotonic()) if self._dirty else None
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout=wait)
+                if item is _STOP:
+                    return
+                if item is not _RELOAD:
+                    self._apply(*item)
+                if self._drain():
+                    return
+            except asyncio.TimeoutError:
+                pass
+
+            if self._reloads:
+                await self._reload()
+                continue
+
+            if self._dirty and time.monotonic() - self._last_flush >= self._flush_delay:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    # Back off instead of retrying the save in a tight loop (workbook open in Excel, disk full)
+                    self._last_flush = time.monotonic()
+                    self._flush_delay = min(self._flush_delay * 2, max(self.flush_interval, MAX_FLUSH_BACKOFF))
+                    log.error("Excel flush failed", extra={"error": str(e), "retry_in_seconds": self._flush_delay})
+
+    def start(self):
+        if self._writer is None:
+            self._last_flush = time.monotonic()
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def close(self):
+        if self._writer is not None:
+            # A stop marker rather than cancel(): wait_for can swallow a cancel that
+            # lands as get() completes, which left close() waiting forever
+            self._queue.put_nowait(_STOP)
+            await self._writer
+            self._writer = None
+
+        self._drain()
+        await self.flush()
+        if self._reloads:
+            await self._reload()
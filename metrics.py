@@ -0,0 +1,125 @@
+import time
+import contextlib
+import importlib.util
+
+# Prometheus metrics for the dialers and webhook apps. prometheus_client is
+# optional: without it every metric is a no-op and /metrics answers 503.
+PROMETHEUS_AVAILABLE = importlib.util.find_spec("prometheus_client") is not None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BATCH_BUCKETS = (1, 5, 10, 50, 100, 250, 500, 1000, 5000)
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, value):
+        pass
+
+    def time(self):
+        return contextlib.nullcontext()
+
+
+def _metric(kind, name, documentation, labels=(), **kwargs):
+    if not PROMETHEUS_AVAILABLE:
+        return _NoopMetric()
+    import prometheus_client
+
+    return getattr(prometheus_client, kind)(name, documentation, labels, **kwargs)
+
+
+# Dialer
+ELIGIBILITY_SCAN_SECONDS = _metric(
+    "Histogram", "dialer_eligibility_scan_seconds", "Time to claim due rows from the call queue",
+    ["queue"], buckets=LATENCY_BUCKETS,
+)
+VAPI_POST_SECONDS = _metric(
+    "Histogram", "vapi_post_seconds", "VAPI call POST latency per attempt",
+    ["status"], buckets=LATENCY_BUCKETS,
+)
+CALLS_IN_FLIGHT = _metric("Gauge", "dialer_calls_in_flight", "Dials started and not yet returned")
+DIALS_TOTAL = _metric("Counter", "dialer_dials_total", "Dials finished, by outcome", ["outcome"])
+STORE_FLUSH_SECONDS = _metric(
+    "Histogram", "queue_store_flush_seconds", "Excel workbook save / Google Sheet batch_update time",
+    ["store"], buckets=LATENCY_BUCKETS,
+)
+
+# Webhooks
+WEBHOOK_INGEST_SECONDS = _metric(
+    "Histogram", "webhook_ingest_seconds", "Webhook request handling time",
+    ["app", "endpoint", "status"], buckets=LATENCY_BUCKETS,
+)
+MONGO_BATCH_SIZE = _metric(
+    "Histogram", "mongo_batch_size", "Documents per Mongo batch write",
+    ["operation"], buckets=BATCH_BUCKETS,
+)
+
+
+# Exposition
+def start_metrics_server(port: int) -> bool:
+    """Serve /metrics on ``port`` from a background thread (dialers); 0 = off."""
+    if not port:
+        return False
+    if not PROMETHEUS_AVAILABLE:
+        from structured_log import get_logger
+
+        get_logger(__name__).warning("METRICS_PORT set but prometheus_client is not installed")
+        return False
+    import prometheus_client
+
+    prometheus_client.start_http_server(port)
+    return True
+
+class _LatencyMiddleware:
+    """Plain ASGI middleware: BaseHTTPMiddleware would add a task per request."""
+
+    def __init__(self, app, name):
+        self.app = app
+        self.name = name
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The route template, not the raw path, keeps label cardinality bounded
+            endpoint = getattr(scope.get("route"), "path", "unmatched")
+            if endpoint != "/metrics":
+                WEBHOOK_INGEST_SECONDS.labels(self.name, endpoint, str(status)).observe(time.perf_counter() - start)
+
+def instrument_app(app, name: str):
+    """Time every request of a FastAPI app and add a ``/metrics`` route."""
+    from fastapi import Response
+
+    app.add_middleware(_LatencyMiddleware, name=name)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        if not PROMETHEUS_AVAILABLE:
+            return Response("prometheus_client is not installed\n", status_code=503, media_type="text/plain")
+        import prometheus_client
+
+        return Response(prometheus_client.generate_latest(), media_type=prometheus_client.CONTENT_TYPE_LATEST)
+
+    return app
@@ -0,0 +1,137 @@
+import os
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from collections import Counter
+from datetime import datetime, timezone
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Local stand-in for https://api.vapi.ai/call/phone, for benchmarks only.
+# Point the dialers at it with VAPI_URL=http://127.0.0.1:<port>/call/phone
+
+# MOCK CONFIG
+MOCK_LATENCY_MS = float(os.getenv("MOCK_LATENCY_MS", "80"))     # median POST latency
+MOCK_JITTER_MS = float(os.getenv("MOCK_JITTER_MS", "40"))       # spread around the median
+MOCK_ERROR_RATE = float(os.getenv("MOCK_ERROR_RATE", "0"))      # share of 503s
+MOCK_429_RATE = float(os.getenv("MOCK_429_RATE", "0"))          # share of random 429s
+MOCK_MAX_RPS = float(os.getenv("MOCK_MAX_RPS", "0"))            # 429 above this rate, 0 = unlimited
+MOCK_RETRY_AFTER = os.getenv("MOCK_RETRY_AFTER", "1")           # Retry-After sent with 429s
+
+
+class MockVapi:
+    def __init__(self, latency_ms, jitter_ms, error_rate, rate_limit_rate, max_rps, retry_after, seed=None):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.responses = Counter()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def _over_capacity(self) -> bool:
+        if not self.max_rps:
+            return False
+        now = time.monotonic()
+        if now - self._window_start >= 1:
+            self._window_start = now
+            self._window_count = 0
+        self._window_count += 1
+        return self._window_count > self.max_rps
+
+    def _reply(self, status, body):
+        self.responses[status] += 1
+        headers = {"Retry-After": self.retry_after} if status == 429 else None
+        return JSONResponse(body, status_code=status, headers=headers)
+
+    async def place_call(self, payload: dict):
+        if self._over_capacity() or self.rng.random() < self.rate_limit_rate:
+            return self._reply(429, {"message": "Too Many Requests"})
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(max(0.0, self.rng.gauss(self.latency, self.jitter / 2)))
+        finally:
+            self.in_flight -= 1
+
+        if self.rng.random() < self.error_rate:
+            return self._reply(503, {"message": "Service Unavailable"})
+
+        now = datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        return self._reply(201, {
+            "id": str(uuid.uuid4()),
+            "status": "queued",
+            "type": "outboundPhoneCall",
+            "assistantId": payload.get("assistantId"),
+            "phoneNumberId": payload.get("phoneNumberId"),
+            "customer": payload.get("customer"),
+            "createdAt": now,
+            "updatedAt": now,
+        })
+
+    def get_call(self, call_id):
+        # Every polled call has already ended, with a mix of outcomes
+        reason = self.rng.choice(["customer-ended-call", "customer-did-not-answer", "customer-busy", "pipeline-error"])
+        return self._reply(200, {"id": call_id, "status": "ended", "endedReason": reason, "cost": 0.05})
+
+    def stats(self) -> dict:
+        return {
+            "responses": {str(status): count for status, count in self.responses.items()},
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+        }
+
+
+def create_app(mock: MockVapi) -> FastAPI:
+    app = FastAPI(title="Mock VAPI", version="1.0.0")
+
+    @app.post("/call/phone")
+    async def place_call(request: Request):
+        return await mock.place_call(await request.json())
+
+    @app.get("/call/{call_id}")
+    async def get_call(call_id: str):
+        return mock.get_call(call_id)
+
+    @app.get("/stats")
+    async def stats():
+        return mock.stats()
+
+    @app.post("/stats/reset")
+    async def reset():
+        mock.responses.clear()
+        mock.peak_in_flight = mock.in_flight
+        return mock.stats()
+
+    return app
+
+
+# Execution
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local mock of the VAPI call API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9911)
+    parser.add_argument("--latency-ms", type=float, default=MOCK_LATENCY_MS)
+    parser.add_argument("--jitter-ms", type=float, default=MOCK_JITTER_MS)
+    parser.add_argument("--error-rate", type=float, default=MOCK_ERROR_RATE)
+    parser.add_argument("--rate-limit-rate", type=float, default=MOCK_429_RATE)
+    parser.add_argument("--max-rps", type=float, default=MOCK_MAX_RPS)
+    parser.add_argument("--retry-after", default=MOCK_RETRY_AFTER)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    mock = MockVapi(
+        args.latency_ms, args.jitter_ms, args.error_rate,
+        args.rate_limit_rate, args.max_rps, args.retry_after, args.seed,
+    )
+    uvicorn.run(create_app(mock), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,151 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+from datetime import datetime, timezone
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from structured_log import configure_logging, get_logger
+
+log = get_logger(__name__)
+
+# Every index the dialers and webhook apps rely on, in one place. The apps and
+# MongoCallQueue call ensure_indexes on startup; creating an index that already
+# exists is a no-op, so running it on every start is cheap.
+
+# out_bound_call_items
+CALL_ITEM_INDEXES = [
+    # Dialer claim / status queries for one sheet: excel_id equality, one $or branch per status, next_try range + sort
+    IndexModel([("excel_id", ASCENDING), ("status", ASCENDING), ("next_try", ASCENDING)]),
+    # Same, for a MongoCallQueue with no OBD_EXCEL_ID (all sheets)
+    IndexModel([("status", ASCENDING), ("next_try", ASCENDING)]),
+    # VAPI events and dialer responses update items by their call id
+    IndexModel([("request_id", ASCENDING)]),
+    # Unique (excel_id, hash) / (excel_id, event_id) keep replayed webhooks idempotent
+    IndexModel(
+        [("excel_id", ASCENDING), ("hash", ASCENDING)],
+        name="uniq_excel_hash",
+        unique=True,
+        partialFilterExpression={"hash": {"$type": "string"}},
+    ),
+    IndexModel(
+        [("excel_id", ASCENDING), ("event_id", ASCENDING)],
+        name="uniq_excel_event",
+        unique=True,
+        partialFilterExpression={"event_id": {"$type": "string"}},
+    ),
+]
+
+# out_bound_calls is only read and updated by _id, which Mongo always indexes
+CALL_INDEXES = []
+
+
+# Bootstrap
+async def ensure_indexes(call_items=None, calls=None) -> list:
+    """Create the indexes for whichever collections are given; returns their names.
+
+    Indexes are created one at a time so one that can't be built (say a unique
+    index over existing duplicates) is logged and skipped rather than blocking
+    the rest. Connection errors are raised.
+    """
+    names = []
+    for collection, indexes in ((call_items, CALL_ITEM_INDEXES), (calls, CALL_INDEXES)):
+        if collection is None:
+            continue
+        for index in indexes:
+            try:
+                names += await collection.create_indexes([index])
+            except OperationFailure as e:
+                log.warning("Could not create Mongo index", extra={
+                    "collection": collection.name, "index": index.document["name"], "error": str(e),
+                })
+    log.info("Mongo indexes ensured", extra={"indexes": len(names)})
+    return names
+
+
+# Query Plans
+def plan_stages(plan):
+    """Every ``stage`` name in an explain() plan tree (classic and slot-based formats)."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+def winning_plan(explain):
+    return explain.get("queryPlanner", {}).get("winningPlan", {})
+
+def call_item_queries(excel_id=None):
+    """``name -> (filter, sort)`` for the queries the apps run on out_bound_call_items.
+
+    Filters come from the code that issues them, so a changed query shape is
+    checked against the indexes as it is, not as it used to be.
+    """
+    from bson import ObjectId
+
+    from call_queue import MongoCallQueue
+    from call_items import dedup_key
+    from vapi_events import build_call_update
+
+    excel_id = excel_id or str(ObjectId())
+    now = datetime.now(timezone.utc)
+    _, event_filter, _ = build_call_update({"message": {"type": "end-of-call-report", "call": {"id": "plan-check"}}})
+    return {
+        "dialer_claim_one_sheet": (MongoCallQueue(None, None, None, excel_id=excel_id)._eligible_filter(now), [("next_try", 1)]),
+        "dialer_claim_all_sheets": (MongoCallQueue(None, None, None)._eligible_filter(now), [("next_try", 1)]),
+        "vapi_event_by_request_id": (event_filter, None),
+        "dedup_by_hash": (dedup_key({"excel_id": ObjectId(excel_id), "hash": "plan-check"}), None),
+        "dedup_by_event_id": (dedup_key({"excel_id": ObjectId(excel_id), "event_id": "plan-check"}), None),
+    }
+
+async def check_query_plans(collection, excel_id=None) -> dict:
+    """``name -> stages`` for each call-item query; any COLLSCAN is a missing index."""
+    plans = {}
+    for name, (query, sort) in call_item_queries(excel_id).items():
+        cursor = collection.find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plans[name] = sorted(set(plan_stages(winning_plan(await cursor.explain()))))
+    return plans
+
+
+# python mongo_indexes.py            -> create the indexes in MONGO_URI / DB_NAME
+# python mongo_indexes.py --explain  -> also fail if a call-item query plan is a COLLSCAN
+async def main(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(args.mongo_uri)
+    try:
+        db = client[args.db]
+        call_items = db[args.call_items]
+        await ensure_indexes(call_items = call_items, calls = db[args.calls])
+        if not args.explain:
+            return 0
+
+        plans = await check_query_plans(call_items, os.getenv("OBD_EXCEL_ID"))
+        print(json.dumps(plans, indent=2))
+        scans = [name for name, stages in plans.items() if "COLLSCAN" in stages]
+        if scans:
+            log.error("Collection scan in query plan", extra={"queries": ",".join(scans)})
+            return 1
+        return 0
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the Mongo indexes and check the call-item query plans")
+    parser.add_argument("--mongo-uri", default=os.getenv("MONGO_URI"))
+    parser.add_argument("--db", default=os.getenv("DB_NAME"))
+    parser.add_argument("--call-items", default=os.getenv("OBD_ITEMS", "out_bound_call_items"))
+    parser.add_argument("--calls", default=os.getenv("OBD_CALLS", "out_bound_calls"))
+    parser.add_argument("--explain", action="store_true", help="exit 1 if any query plan is a COLLSCAN")
+    args = parser.parse_args()
+
+    configure_logging()
+    sys.exit(asyncio.run(main(args)))
@@ -1,29 +1,46 @@
 import os
+import time
 import uvicorn
 from typing import Dict, Any
 from datetime import datetime
+from contextlib import asynccontextmanager
 
 from bson import ObjectId
 from dotenv import load_dotenv
-from pymongo import MongoClient
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException, Body, Request
+
+from call_items import (
+    build_call_item,
+    iter_ndjson,
+    record_data,
+    write_call_items,
+)
+from metrics import instrument_app
+from mongo_indexes import ensure_indexes
+from structured_log import configure_logging, get_logger
 
 # Load Enviornment Variables
 load_dotenv()
+configure_logging()
+log = get_logger("new-webhook_app")
 
 # Configurations
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
 OBD_ITEMS = os.getenv("OBD_ITEMS")
 OBD_CALLS = os.getenv("OBD_CALLS")
+PARENT_CACHE_SECONDS = float(os.getenv("PARENT_CACHE_SECONDS", "300"))
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1000"))     # records per Mongo bulk write when streaming
 
-# MONGO DB
-db = client[DB_NAME]
-client = MongoClient(MONGO_URI)
-collection_odb_calls = db[OBD_CALLS]
-collection_odb_call_items = db[OBD_ITEMS]
+# MONGO DB (Async): connected on startup, so importing the app does no client work
+client = None
+collection_odb_calls = None
+collection_odb_call_items = None
 mapping = {"main_sheet": "694baa09b068d6e7232dcb8a"}
 
+# Parent out_bound_calls ids seen recently -> cache expiry (monotonic seconds)
+parent_cache = {}
+
 # Helper Functions
 def is_valid_object_id(value: str) -> bool:
     try:
@@ -32,35 +49,84 @@ def is_valid_object_id(value: str) -> bool:
     except Exception:
         return False
 
-# FASTAPI
-app = FastAPI(title= "Webhook Service", version= "1.0.0")
-# Webhook Endpoint
-@app.post("/api/out-bound-call-item")
-async def out_bound_call_item(payload: Dict[str, Any] = Body(...)):
+async def parent_exists(excel_object_id: ObjectId) -> bool:
+    expires_at = parent_cache.get(excel_object_id)
+    if expires_at and expires_at > time.monotonic():
+        return True
 
-    # 1. Extract required fields
-    source = payload.get("source", {})
-    sheet_name = source.get("sheet_name")
-    excel_object_id = ObjectId(mapping[sheet_name])
+    document = await collection_odb_calls.find_one({"_id": excel_object_id}, projection={"_id": 1})
+    if not document:
+        parent_cache.pop(excel_object_id, None)
+        return False
+
+    parent_cache[excel_object_id] = time.monotonic() + PARENT_CACHE_SECONDS
+    return True
 
+async def resolve_sheet(sheet_name) -> ObjectId:
     if not sheet_name:
         raise HTTPException(status_code=400, detail="Sheet Name is required")
 
-    if not is_valid_object_id(mapping[sheet_name]):
+    if sheet_name not in mapping or not is_valid_object_id(mapping[sheet_name]):
         raise HTTPException(status_code=400, detail="Invalid sheet_name ObjectId")
 
-    # 2. Find Parent Document
-    document = collection_odb_calls.find_one({"_id": excel_object_id})
+    excel_object_id = ObjectId(mapping[sheet_name])
 
-    if not document:
+    # Parent lookup is cached, so bursts don't repeat it
+    if not await parent_exists(excel_object_id):
         raise HTTPException(status_code=404, detail= f"Sheet Name {sheet_name} not found in out_bound_calls.")
+    return excel_object_id
 
-    if document["_id"] == excel_object_id:
-        print("Sheet available in out_bound_calls, therefore entry can be done.")
+async def mark_parent_unprocessed(excel_object_id: ObjectId):
+    await collection_odb_calls.update_one(
+        {"_id": excel_object_id},
+        {
+             "$set":{
+                 "processed": False,
+                 "updated_at": datetime.now()
+                 }
+        }
+    )
+
+def connect_mongo():
+    global client, collection_odb_calls, collection_odb_call_items
+    # Collections set beforehand (tests, benchmarks) are kept
+    if collection_odb_call_items is not None:
+        return
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(MONGO_URI)
+    db = client[DB_NAME]
+    collection_odb_calls = db[OBD_CALLS]
+    collection_odb_call_items = db[OBD_ITEMS]
+
+# FASTAPI
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    connect_mongo()
+    # Unique (excel_id, hash) / (excel_id, event_id) keep replayed webhooks idempotent
+    try:
+        await ensure_indexes(call_items = collection_odb_call_items, calls = collection_odb_calls)
+    except Exception as e:
+        log.warning("Could not create Mongo indexes", extra={"error": str(e)})
+    yield
+    if client is not None:
+        client.close()
+
+app = FastAPI(title= "Webhook Service", version= "1.0.0", lifespan= lifespan)
+instrument_app(app, "new-webhook_app")
+# Webhook Endpoint
+@app.post("/api/out-bound-call-item")
+async def out_bound_call_item(payload: Dict[str, Any] = Body(...)):
+
+    # 1. Extract required fields
+    source = payload.get("source") or {}
+    sheet_name = source.get("sheet_name")
+
+    # 2. Find Parent Document
+    excel_object_id = await resolve_sheet(sheet_name)
 
     # 3. Extract and Normalize Records
     records = payload.get("records")
-    print("records: ",records)
     if not records:
         raise HTTPException(status_code=400, detail="records field is required.")
     
@@ -76,60 +142,84 @@ async def out_bound_call_item(payload: Dict[str, Any] = Body(...)):
     now = datetime.now()
 
     for record in records:
-        if not isinstance(record, dict):
-            raise HTTPException(status_code=400, detail="Each record must be a dictionary.")
-        
-        data = record.get("data")
-        print("data: ", data)
-
-        if not isinstance(data, dict):
-            raise HTTPException(status_code=400, detail= "record data must be dictionary.")
-        
-        doc ={
-             "excel_id": excel_object_id,
-             "name" : data.get("Name"),
-             "phone" : str(data.get("Phone")),
-             "email" : data.get("Email"),
-             "row_number" : record.get("row_number"),
-             "event_id" : record.get("event_id"),
-             "sheet_name" : source.get("sheet_name"),
-             "hash" : record.get("hash"),
-             "status" :"queued",
-             "no_of_conversation": 0,
-             "cost": 0,
-             "count_status": False,
-             "isDeleted": False,
-             "createdAt": now,
-             "updatedAt": now
-        }
-        documents.append(doc)
-
-    # 5. Insert Into Mongo DB       
-    if len(documents) == 1:
-        collection_odb_call_items.insert_one(documents[0])
-        inserted_count = 1
-    else:
-        result = collection_odb_call_items.insert_many(documents)
-        inserted_count = len(result.inserted_ids)
-
-    # 6. Update Parent Collection field after Data Inserted into the Mong DB Collections
-    collection_odb_calls.update_one(
-        {"_id": excel_object_id},
-        {
-             "$set":{
-                 "processed": False,
-                 "updated_at": datetime.now()
-                 }
-        }
-        
-    )
-    print("Parent out_bound_calls updated: processed = false.")
-    
+        try:
+            data = record_data(record)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail= str(e))
+
+        documents.append(build_call_item(record, data, excel_object_id, sheet_name, now))
+
+    # 5. Upsert Into Mongo DB: replayed records (same hash / event_id) are skipped
+    counts = await write_call_items(collection_odb_call_items, documents)
+
+    # 6. Update Parent Collection field only when there is new work to process
+    if counts["inserted"] or counts["updated"]:
+        await mark_parent_unprocessed(excel_object_id)
+        log.debug("Parent out_bound_calls updated: processed = false", extra={"sheet_name": sheet_name})
+
     # 7. Response
     return {
         "message" : "Records inserted and Parent updated succesfully",
         "sheet_name" : sheet_name,
-        "inserted_records" : inserted_count,
+        "inserted_records" : counts["inserted"],
+        "updated_records" : counts["updated"],
+        "skipped_records" : counts["skipped"],
+        "processed" : False
+    }
+
+# Streaming Endpoint: one NDJSON record per line, written in INGEST_CHUNK_SIZE chunks
+@app.post("/api/out-bound-call-item/stream")
+async def out_bound_call_item_stream(request: Request, sheet_name: str):
+    excel_object_id = await resolve_sheet(sheet_name)
+
+    totals = {"records": 0, "inserted": 0, "updated": 0, "skipped": 0, "rejected": 0}
+    chunks = []
+    errors = []
+    documents = []
+
+    async def flush():
+        counts = await write_call_items(collection_odb_call_items, documents)
+        chunks.append({"chunk": len(chunks) + 1, "records": len(documents), **counts})
+        for key, value in counts.items():
+            totals[key] += value
+        documents.clear()
+
+    try:
+        async for line_number, record in iter_ndjson(request.stream()):
+            totals["records"] += 1
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                data = record_data(record)
+            except ValueError as e:
+                totals["rejected"] += 1
+                if len(errors) < 20:
+                    errors.append({"line": line_number, "error": str(e)})
+                continue
+
+            documents.append(build_call_item(record, data, excel_object_id, sheet_name, datetime.now()))
+            if len(documents) >= INGEST_CHUNK_SIZE:
+                await flush()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail= str(e))
+    finally:
+        # Chunks already accepted stay written; resending is safe because writes are idempotent
+        if documents:
+            await flush()
+        # Even when the stream fails part way, the rows written so far need dialing
+        if totals["inserted"] or totals["updated"]:
+            await mark_parent_unprocessed(excel_object_id)
+
+    return {
+        "message" : "Records streamed",
+        "sheet_name" : sheet_name,
+        "records" : totals["records"],
+        "inserted_records" : totals["inserted"],
+        "updated_records" : totals["updated"],
+        "skipped_records" : totals["skipped"],
+        "rejected_records" : totals["rejected"],
+        "chunks" : chunks,
+        "errors" : errors,
         "processed" : False
     }
 
@@ -1,11 +1,127 @@
-from playwright.sync_api import sync_playwright
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 import json
 
+from scrape_cache import open_cache, route_handler
+
+# Header cells that start a section ("Basic Details", "Covers Information", ...)
+SECTION_KEYWORDS = ("Details", "Covers", "Information", "Instruments")
+SECTION_SELECTOR = ", ".join(f"td:has-text('{keyword}')" for keyword in SECTION_KEYWORDS)
+SECTION_WAIT_MS = 30_000   # the section tables are all we read, so they are all we wait for
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+# Same matching as the td:has-text(...) locators below (case-insensitive substring
+# of the whitespace-normalized textContent), but every section table is read in
+# one page.evaluate instead of a round trip per row and cell. Raw textContent is
+# returned so the stripping happens in Python exactly as before.
+EXTRACT_SECTIONS_JS = """
+(keywords) => {
+    const words = keywords.map((word) => word.toLowerCase());
+    const tables = [];
+    const tableIndex = new Map();
+
+    const serialize = (table) => {
+        if (!tableIndex.has(table)) {
+            const rows = Array.from(table.querySelectorAll("tr"), (row, i) => {
+                const cells = Array.from(row.querySelectorAll("td"), (cell) => cell.textContent);
+                if (i > 0) return {cells};
+                return {cells, head: Array.from(row.querySelectorAll("td, th"), (cell) => cell.textContent)};
+            });
+            tableIndex.set(table, tables.length);
+            tables.push({rows, text: table.textContent});
+        }
+        return tableIndex.get(table);
+    };
+
+    const sections = [];
+    for (const cell of document.querySelectorAll("td")) {
+        const text = cell.textContent.replace(/\\s+/g, " ").trim().toLowerCase();
+        if (!words.some((word) => text.includes(word))) continue;
+
+        // ancestor::table[1], then its following-sibling::table[1] if there is one
+        const parent = cell.closest("table");
+        let sibling = parent ? parent.nextElementSibling : null;
+        while (sibling && sibling.localName !== "table") sibling = sibling.nextElementSibling;
+        const table = sibling || parent;
+        sections.push({header: cell.textContent, table: table ? serialize(table) : null});
+    }
+    return {sections, tables};
+}
+"""
+
+def parse_table(rows, table_text):
+    """Key-value dict, list of row dicts, or the table's text, from serialized rows."""
+    # First, try key-value extraction (most sections)
+    kv_data = {}
+    current_key = None
+
+    for row in rows:
+        cells = row["cells"]
+
+        if len(cells) == 2:
+            key = cells[0].strip().rstrip(":").strip()
+            value = cells[1].strip()
+            if key:
+                kv_data[key] = value
+                current_key = key
+        elif len(cells) == 1 and current_key:
+            extra = cells[0].strip()
+            if extra:
+                kv_data[current_key] += " " + extra
+
+    if kv_data:
+        return kv_data
+
+    # If not key-value, try tabular data (multi-row with headers)
+    tabular_data = []
+    if len(rows) >= 2:
+        headers = [cell.strip() for cell in rows[0]["head"]]
+
+        if headers:
+            for row in rows[1:]:  # Skip header
+                cells = row["cells"]
+                if len(cells) == len(headers):
+                    tabular_data.append({header: cell.strip() for header, cell in zip(headers, cells)})
+
+    if tabular_data:
+        return tabular_data
+    # Fallback: raw text of the table
+    return table_text.strip()
+
+def parse_sections(snapshot, verbose=True):
+    """Section name -> data from the structure EXTRACT_SECTIONS_JS returns."""
+    data = {}
+    sections = snapshot["sections"]
+
+    if verbose:
+        print(f"Found {len(sections)} potential sections")
+
+    for section in sections:
+        # Clean section name (remove extra after comma or [brackets])
+        section_name = section["header"].strip().split(',')[0].split('[')[0].strip()
+
+        if not section_name:
+            continue
+
+        if verbose:
+            print(f"Processing section: {section_name}")
+
+        if section["table"] is None:
+            continue
+
+        table = snapshot["tables"][section["table"]]
+        data[section_name] = parse_table(table["rows"], table["text"])
+
+    return data
+
+def extract_sections(page):
+    """Same output as extract_with_playwright_only, in a single browser round trip."""
+    return parse_sections(page.evaluate(EXTRACT_SECTIONS_JS, list(SECTION_KEYWORDS)))
+
 def extract_with_playwright_only(page):
     data = {}
     
     # Find all potential section headers (orange boxed <td> with "Details" etc.)
-    header_locators = page.locator("td:has-text('Details'), td:has-text('Covers'), td:has-text('Information'), td:has-text('Instruments')")
+    header_locators = page.locator(SECTION_SELECTOR)
     
     print(f"Found {header_locators.count()} potential sections")
     
@@ -80,27 +196,44 @@ def extract_with_playwright_only(page):
             data[section_name] = tabular_data
         elif not kv_data:
             # Fallback: raw text of the table
-            data[section_name] = table_elem.text_content(strip=True)
+            data[section_name] = table_elem.text_content().strip()
     
     return data
 
-def scrape_tender_pure_playwright(url):
+def wait_for_sections(page, timeout=SECTION_WAIT_MS):
+    """Wait until a section header is in the DOM instead of for networkidle."""
+    try:
+        page.wait_for_selector(SECTION_SELECTOR, state="attached", timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        print(f"No section tables after {timeout} ms - extracting whatever loaded")
+        return False
+
+def scrape_tender_pure_playwright(url, extract=extract_sections, cache=None):
+    cache = open_cache() if cache is None else cache
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=False)  # False to see what's happening!
         page = browser.new_page()
         
-        page.set_extra_http_headers({"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"})
+        page.set_extra_http_headers({"User-Agent": USER_AGENT})
+        # Images / CSS / fonts are aborted; the tender HTML comes from the on-disk cache when fresh
+        page.route("**/*", route_handler(cache))
         
         print(f"Going to: {url}")
-        page.goto(url)
-        page.wait_for_load_state("networkidle")
+        page.goto(url, wait_until="domcontentloaded")
+        wait_for_sections(page)
         
         # Debug: Screenshot and title
         print("Page title:", page.title())
         page.screenshot(path="playwright_debug_screenshot.png")
         print("Screenshot saved - check if it shows tender details or error!")
         
-        extracted_data = extract_with_playwright_only(page)
+        extracted_data = extract(page)
+        # Only a page with sections is cached; an expired session or captcha is fetched again
+        if cache is not None and extracted_data:
+            cache.keep(url)
+        elif cache is not None:
+            cache.drop(url)
         
         browser.close()
     
@@ -112,14 +245,15 @@ def scrape_tender_pure_playwright(url):
 # 3. IMMEDIATELY copy the new URL
 # 4. Paste here and run FAST:
 
-url = "https://mahatenders.gov.in/nicgep/app?component=%24DirectLink&page=FrontEndLatestActiveTenders&service=direct&session=T&sp=Snrmrdvnsc9i50BLybgChRA%3D%3D"
+if __name__ == "__main__":
+    url = "https://mahatenders.gov.in/nicgep/app?component=%24DirectLink&page=FrontEndLatestActiveTenders&service=direct&session=T&sp=Snrmrdvnsc9i50BLybgChRA%3D%3D"
 
-data = scrape_tender_pure_playwright(url)
+    data = scrape_tender_pure_playwright(url)
 
-print("\nExtracted Data:")
-print(json.dumps(data, indent=4, ensure_ascii=False))
+    print("\nExtracted Data:")
+    print(json.dumps(data, indent=4, ensure_ascii=False))
 
-with open("tender_playwright_only.json", "w", encoding="utf-8") as f:
-    json.dump(data, f, indent=4, ensure_ascii=False)
+    with open("tender_playwright_only.json", "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
 
-print("\nSaved to tender_playwright_only.json")
+    print("\nSaved to tender_playwright_only.json")
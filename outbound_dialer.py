@@ -0,0 +1,219 @@
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from vapi_client import get_vapi_client, close_vapi_client
+from vapi_retry import RETRYABLE_STATUS
+from vapi_events import wait_for_outcome
+from call_queue import RETRY_STATUS
+from dial_worker import run_worker, run_scheduled
+from calling_window import CallingWindowScheduler
+from payload_prep import prepare_calls, write_quarantine_report, QUARANTINE_STATUS
+from eligibility import TRIES_COLUMN
+from metrics import start_metrics_server
+from structured_log import get_logger
+
+load_dotenv()
+log = get_logger(__name__)
+
+# The dial loop both dialer scripts run; they only choose the queue it reads.
+
+# Required Configurations
+VAPI_API_KEY = os.getenv("VAPI_API_KEY")
+ASSISTANT_ID = os.getenv("ASSISTANT_ID")
+PHONE_NUMBER_ID = os.getenv("PHONE_NUMBER_ID")
+
+# DIAL CONFIG
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", "2"))            # concurrent lines on the VAPI plan
+CALLS_PER_SECOND = float(os.getenv("CALLS_PER_SECOND", "1"))    # VAPI plan rate limit
+CALL_BURST = int(os.getenv("CALL_BURST", "1"))                  # calls allowed back-to-back
+MAX_CALLS_PER_RUN = int(os.getenv("MAX_CALLS_PER_RUN", "6"))    # 2 lines x 3 batches, as before; 0 = dial every due row
+THROUGHPUT_REPORT_SECONDS = float(os.getenv("THROUGHPUT_REPORT_SECONDS", "10"))
+LEASE_SECONDS = int(os.getenv("LEASE_SECONDS", "300"))                  # row lease for sqlite/mongo queues
+WORKER_IDLE_SECONDS = float(os.getenv("WORKER_IDLE_SECONDS", "30"))     # --worker poll gap when nothing is due
+RETRY_GAP_HOURS = 24 # 24 Hours time gap
+BUSY_RETRY_MINUTES = int(os.getenv("BUSY_RETRY_MINUTES", "5"))  # VAPI still 429/5xx after retries
+QUARANTINE_FILE = os.getenv("QUARANTINE_FILE", "quarantine_report.csv")  # rows with unusable numbers
+CALL_WINDOW = os.getenv("CALL_WINDOW", "09:00-20:00")               # contact's local hours we may ring
+CALL_TIMEZONE = os.getenv("CALL_TIMEZONE", "Asia/Kolkata")          # numbers with no known country prefix
+SCHEDULE_HORIZON_SECONDS = float(os.getenv("SCHEDULE_HORIZON_SECONDS", "3600"))  # --worker on excel/sheets: reload gap
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))                  # Prometheus /metrics, 0 = off
+OUTCOME_POLL_SECONDS = float(os.getenv("OUTCOME_POLL_SECONDS", "15"))       # non-Mongo queues: VAPI poll gap, 0 = off
+OUTCOME_TIMEOUT_SECONDS = float(os.getenv("OUTCOME_TIMEOUT_SECONDS", "1800")) # stop polling a call after this
+OUTCOME_SHUTDOWN_SECONDS = float(os.getenv("OUTCOME_SHUTDOWN_SECONDS", "30"))  # wait at exit for open polls, 0 = none
+
+# VALIDATIONS
+# Checked when dialing starts, so `vapi_cli.py status` can read the queue without credentials
+def require_credentials():
+    if not VAPI_API_KEY or not ASSISTANT_ID or not PHONE_NUMBER_ID:
+        raise RuntimeError(
+            "Missing VAPI credentials. "
+            "Set VAPI_API_KEY, ASSISTANT_ID, PHONE_NUMBER_ID"
+        )
+
+
+class OutboundDialer:
+    """Dials the due rows of one ``CallQueue`` and writes each call's state back.
+
+    Leased queues (SQLite, Mongo) are claimed with ``run_worker``; Excel and
+    Sheets rows wait in the calling-window heap of ``run_scheduled``. With
+    ``count_tries`` every placed call increments the row's tries column.
+    """
+
+    def __init__(self, call_queue, count_tries=False, quarantine_file=QUARANTINE_FILE):
+        self.call_queue = call_queue
+        self.count_tries = count_tries
+        self.quarantine_file = quarantine_file
+        self.schedule = CallingWindowScheduler(window = CALL_WINDOW, default_timezone = CALL_TIMEZONE)
+        self.outcome_tasks = set()
+
+    # PREPARE CLAIMED ROWS
+    async def prepare_batch(self, batch):
+        # Normalize numbers and render request bodies once, before any row takes a dial slot
+        ready, quarantined = prepare_calls(batch, ASSISTANT_ID, PHONE_NUMBER_ID)
+        write_quarantine_report(quarantined, self.quarantine_file)
+        for sr_no, reason in zip(quarantined["sr_no"], quarantined["reason"]):
+            await self.call_queue.update(sr_no, {"status": QUARANTINE_STATUS, "quarantine_reason": reason})
+        return ready
+
+    async def prepare_leased_batch(self, batch):
+        # Rows outside the contact's calling window go back to the queue, due when it opens
+        ready, deferred = self.schedule.split(await self.prepare_batch(batch))
+        for sr_no, opens_at in deferred.items():
+            await self.call_queue.update(sr_no, {"status": RETRY_STATUS, "next_try": opens_at.isoformat()})
+        return ready
+
+    # CALL OUTCOMES
+    # Mongo items are updated by webhook_app's /api/vapi/webhook; Excel, Sheets and
+    # SQLite are owned by this process, so it polls VAPI and writes the outcome itself
+    async def record_outcome(self, sr_no, request_id):
+        fields = await wait_for_outcome(
+            get_vapi_client(), request_id, OUTCOME_POLL_SECONDS, OUTCOME_TIMEOUT_SECONDS, RETRY_GAP_HOURS
+        )
+        if fields is None:
+            log.warning("No call outcome before the timeout, row left in-progress", extra={"sr_no": sr_no, "request_id": request_id})
+            return
+        await self.call_queue.update(sr_no, fields)
+        log.info("Call outcome recorded", extra={"sr_no": sr_no, "request_id": request_id, "status": fields["status"]})
+
+    def track_outcome(self, sr_no, request_id):
+        if self.call_queue.name == "mongo" or not OUTCOME_POLL_SECONDS:
+            return
+        task = asyncio.create_task(self.record_outcome(sr_no, request_id))
+        self.outcome_tasks.add(task)
+        task.add_done_callback(self.outcome_tasks.discard)
+
+    async def drain_outcomes(self):
+        # A call can run for half an hour; exit after a short wait instead. Rows whose
+        # poll is dropped stay in-progress, as after an OUTCOME_TIMEOUT_SECONDS timeout
+        if not self.outcome_tasks:
+            return
+        log.info("Waiting for call outcomes", extra={"calls": len(self.outcome_tasks), "timeout": OUTCOME_SHUTDOWN_SECONDS})
+        _, pending = await asyncio.wait(set(self.outcome_tasks), timeout = OUTCOME_SHUTDOWN_SECONDS)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions = True)
+            log.warning("Call outcomes still pending at exit, left in-progress", extra={"calls": len(pending)})
+
+    # MAKE SINGLE CALL
+    async def make_call(self, row):
+        # Errors are raised, not logged: the scheduler logs each failed dial once and counts it
+        sr_no = row["sr_no"]
+        log.debug("Placing VAPI call", extra={"sr_no": sr_no})
+
+        response = await get_vapi_client().place_call(content = row["body"])
+        response_data = response.json()
+        request_id = response_data.get("id")
+        log.info("VAPI call response", extra={
+            "sr_no": sr_no,
+            "http_status": response.status_code,
+            "request_id": request_id,
+        })
+
+        updates = {
+            "called_at": response_data.get("createdAt"),
+            "request_id": request_id,
+            "updated_at": response_data.get("updatedAt"),
+        }
+        if self.count_tries:
+            tries = row.get(TRIES_COLUMN)
+            updates[TRIES_COLUMN] = (int(tries) if tries and not pd.isna(tries) else 0) + 1
+
+        # A created call is in flight; without an id the row keeps its status and is retried
+        if request_id:
+            updates["status"] = "in-progress"
+        elif response.status_code in RETRYABLE_STATUS:
+            # Rate limited past the retry budget: try again shortly, not in 24h
+            next_try = datetime.now(timezone.utc) + timedelta(minutes = BUSY_RETRY_MINUTES)
+            updates["status"] = RETRY_STATUS
+            updates["next_try"] = next_try.isoformat()
+        await self.call_queue.update(sr_no, updates)
+
+        if not request_id:
+            raise RuntimeError(f"VAPI returned HTTP {response.status_code} without a call id for sr_no {sr_no}")
+        # The outcome (status, cost, next_try) comes from the webhook (Mongo) or a poll
+        self.track_outcome(sr_no, request_id)
+
+    # DIAL QUEUE
+    def _scheduler_options(self):
+        return {
+            "max_rows": MAX_CALLS_PER_RUN or None,
+            "max_in_flight": MAX_IN_FLIGHT,
+            "calls_per_second": CALLS_PER_SECOND,
+            "burst": CALL_BURST,
+            "report_interval": THROUGHPUT_REPORT_SECONDS,
+            "breaker": get_vapi_client().breaker,
+        }
+
+    async def run_leased(self, worker_mode = False):
+        # Database queues: claim under renewed leases so several dialers can share one queue
+        return await run_worker(
+            self.call_queue,
+            self.make_call,
+            claim_size = MAX_IN_FLIGHT,
+            lease_seconds = LEASE_SECONDS,
+            idle_seconds = WORKER_IDLE_SECONDS if worker_mode else 0,
+            max_idle_polls = None if worker_mode else 1,
+            prepare = self.prepare_leased_batch,
+            **self._scheduler_options(),
+        )
+
+    async def run_schedule(self, worker_mode = False):
+        # Excel / Sheets: rows wait in the calling-window heap until they are due
+        return await run_scheduled(
+            self.call_queue,
+            self.make_call,
+            self.schedule,
+            horizon_seconds = SCHEDULE_HORIZON_SECONDS if worker_mode else 0,
+            forever = worker_mode,
+            prepare = self.prepare_batch,
+            retry_gap_hours = RETRY_GAP_HOURS,
+            **self._scheduler_options(),
+        )
+
+    # MAIN EXECUTION
+    async def main(self, worker_mode = False):
+        require_credentials()
+        log.info("Call dialer started", extra={
+            "queue": self.call_queue.name, "worker_mode": worker_mode,
+            "max_in_flight": MAX_IN_FLIGHT, "call_window": CALL_WINDOW,
+        })
+        start_metrics_server(METRICS_PORT)
+        try:
+            await self.call_queue.start()
+            if self.call_queue.supports_leases:
+                await self.run_leased(worker_mode)
+            else:
+                await self.run_schedule(worker_mode)
+            log.info("All calls dispatched", extra={"queue": self.call_queue.name})
+
+        except Exception:
+            log.exception("Dial run failed", extra={"queue": self.call_queue.name})
+        finally:
+            await self.drain_outcomes()
+            await self.call_queue.close()
+            await close_vapi_client()
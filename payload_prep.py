@@ -0,0 +1,91 @@
+import os
+import json
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from structured_log import get_logger
+
+log = get_logger(__name__)
+
+MIN_PHONE_LENGTH = 11   # "+" and at least 10 digits
+QUARANTINE_STATUS = "invalid-number"
+QUARANTINE_COLUMNS = ["sr_no", "user_name", "phone_number", "reason", "quarantined_at"]
+
+
+# Phone Numbers
+def normalize_phones(values: pd.Series):
+    """Vectorized ``normalize_phone``: returns ``(phones, reasons)``.
+
+    ``phones`` holds the E.164-style number for every row; ``reasons`` is
+    None for good rows and the rejection reason otherwise (scientific
+    notation from Excel, non-numeric, too short).
+    """
+    raw = values.astype("string").str.strip()
+    phones = raw.str.replace(" ", "", regex=False).str.replace("-", "", regex=False)
+    phones = phones.where(phones.str.startswith("+"), "+" + phones)
+
+    reasons = pd.Series(None, index=values.index, dtype=object)
+    checks = [
+        (raw.isna() | raw.eq("") | raw.str.lower().eq("nan"), "missing phone number"),
+        (raw.str.contains("e+", case=False, regex=False), "scientific notation from Excel"),
+        (~phones.str.fullmatch(r"\+\d+"), "non-numeric phone number"),
+        (phones.str.len() < MIN_PHONE_LENGTH, "phone number too short"),
+    ]
+    # Earlier checks win, matching the order normalize_phone raised in
+    for failed, reason in reversed(checks):
+        reasons = reasons.mask(failed.fillna(True).astype(bool), reason)
+
+    return phones.astype(object), reasons.where(reasons.notna(), None)
+
+
+# Request Bodies
+def _plain(values: pd.Series) -> list:
+    # Python scalars with None for gaps, so json.dumps never sees NaN or numpy types
+    return values.astype(object).where(values.notna(), None).tolist()
+
+def render_bodies(df: pd.DataFrame, phones, assistant_id, phone_number_id) -> list:
+    names = _plain(df["user_name"]) if "user_name" in df.columns else [None] * len(df)
+    emails = _plain(df["email"]) if "email" in df.columns else [None] * len(df)
+
+    bodies = []
+    for phone, name, email in zip(phones, names, emails):
+        payload = {
+            "assistantId": assistant_id,
+            "phoneNumberId": phone_number_id,
+            "customer": {"number": phone},
+            "assistantOverrides": {
+                "variableValues": {"username": name, "userEmail": email},
+            },
+        }
+        bodies.append(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    return bodies
+
+def prepare_calls(df: pd.DataFrame, assistant_id, phone_number_id):
+    """Split claimed rows into ``(ready, quarantined)``.
+
+    ``ready`` gains a normalized ``phone`` column and a ``body`` column with
+    the JSON request bytes, so the dial path only sends them. ``quarantined``
+    lists the rejected rows with a ``reason``.
+    """
+    if df.empty:
+        return df.assign(phone=[], body=[]), pd.DataFrame(columns=QUARANTINE_COLUMNS)
+
+    phones, reasons = normalize_phones(df["phone_number"])
+    bad = reasons.notna()
+
+    quarantined = df.loc[bad].assign(
+        reason=reasons[bad],
+        quarantined_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    )
+    ready = df.loc[~bad].assign(phone=phones[~bad])
+    ready["body"] = render_bodies(ready, ready["phone"], assistant_id, phone_number_id)
+    return ready, quarantined.reindex(columns=QUARANTINE_COLUMNS)
+
+
+# Quarantine Report
+def write_quarantine_report(quarantined: pd.DataFrame, path):
+    if quarantined.empty:
+        return
+    quarantined.to_csv(path, mode="a", index=False, header=not os.path.exists(path))
+    log.warning("Rows quarantined", extra={"rows": len(quarantined), "report": path})
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+from structured_log import get_logger
+
+log = get_logger(__name__)
+
+# Route filter + on-disk HTML cache for the tender scrapers. Images, CSS, fonts
+# and media are never needed to read the section tables; the tender HTML itself
+# is cached so re-scraping an unchanged tender never leaves the machine. A
+# fetched page is only held until the scraper finds section tables in it, so
+# session-expired, captcha and error pages are never stored.
+SCRAPE_BLOCK_RESOURCES = os.getenv("SCRAPE_BLOCK_RESOURCES", "image,stylesheet,font,media")  # "" = load everything
+SCRAPE_CACHE_DIR = os.getenv("SCRAPE_CACHE_DIR", ".scrape_cache")
+SCRAPE_CACHE_TTL_SECONDS = float(os.getenv("SCRAPE_CACHE_TTL_SECONDS", "21600"))  # 6h, 0 = no cache
+SCRAPE_CACHE_MAX_MB = float(os.getenv("SCRAPE_CACHE_MAX_MB", "200"))             # oldest entries go first
+
+BLOCKED_RESOURCE_TYPES = frozenset(t.strip() for t in SCRAPE_BLOCK_RESOURCES.split(",") if t.strip())
+
+
+class HtmlCache:
+    """Content-addressed HTML store with a per-URL TTL and a size cap.
+
+    Bodies are stored once under their sha256 (``blobs/ab/abcd...``) however
+    many URLs return them; ``index.json`` maps each URL to a digest and the
+    time it was fetched. Expired entries are dropped on read, and ``evict``
+    removes the least recently stored ones until the blobs fit ``max_bytes``.
+
+    Fetches are ``hold``-ed in memory; the scraper then calls ``keep`` once
+    the page had section tables, or ``drop`` so the next attempt refetches.
+    """
+
+    def __init__(self, root=SCRAPE_CACHE_DIR, ttl_seconds=SCRAPE_CACHE_TTL_SECONDS, max_bytes=SCRAPE_CACHE_MAX_MB * 1024 * 1024):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.pending = {}   # url -> (status, content_type, body) waiting for keep / drop
+        self.index_path = os.path.join(root, "index.json")
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        try:
+            with open(self.index_path, encoding="utf-8") as index_file:
+                self.index = json.load(index_file)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def _blob_path(self, digest):
+        return os.path.join(self.root, "blobs", digest[:2], digest)
+
+    def _save_index(self):
+        # Written to a temp file and renamed, so a killed scrape never leaves half an index
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+            json.dump(self.index, tmp)
+        os.replace(tmp_path, self.index_path)
+
+    # Reads / writes
+    def get(self, url):
+        """``(status, content_type, body)`` for a fresh entry, else None."""
+        entry = self.index.get(url)
+        if entry and time.time() - entry["stored_at"] > self.ttl_seconds:
+            del self.index[url]
+            self._save_index()
+            entry = None
+        if entry:
+            try:
+                with open(self._blob_path(entry["digest"]), "rb") as blob:
+                    body = blob.read()
+                self.hits += 1
+                return entry["status"], entry["content_type"], body
+            except OSError:
+                del self.index[url]
+        self.misses += 1
+        return None
+
+    def put(self, url, status, content_type, body):
+        # Only complete HTML pages; errors and redirects are fetched again next time
+        if status != 200 or "html" not in (content_type or ""):
+            return False
+
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(body)
+            os.replace(tmp_path, path)
+
+        self.index[url] = {"digest": digest, "status": status, "content_type": content_type,
+                           "size": len(body), "stored_at": time.time()}
+        self.evict()
+        self._save_index()
+        return True
+
+    def hold(self, url, status, content_type, body):
+        self.pending[url] = (status, content_type, body)
+
+    def keep(self, url):
+        """Store the page held for ``url``; True if it was stored."""
+        held = self.pending.pop(url, None)
+        return self.put(url, *held) if held else False
+
+    def drop(self, url):
+        """Forget ``url``, held or stored, so the next fetch goes to the site."""
+        self.pending.pop(url, None)
+        entry = self.index.pop(url, None)
+        if entry is None:
+            return
+        if all(other["digest"] != entry["digest"] for other in self.index.values()):
+            try:
+                os.remove(self._blob_path(entry["digest"]))
+            except FileNotFoundError:
+                pass
+        self._save_index()
+
+    def evict(self):
+        """Drop expired entries, then the oldest until the blobs fit ``max_bytes``."""
+        now = time.time()
+        dropped = [url for url, entry in self.index.items() if now - entry["stored_at"] > self.ttl_seconds]
+
+        # A blob shared by several URLs counts once
+        sizes = {entry["digest"]: entry["size"] for url, entry in self.index.items() if url not in dropped}
+        total = sum(sizes.values())
+        live = sorted((entry["stored_at"], url) for url, entry in self.index.items() if url not in dropped)
+        for _, url in live:
+            if total <= self.max_bytes:
+                break
+            dropped.append(url)
+            total -= sizes.pop(self.index[url]["digest"], 0)
+
+        digests = {self.index.pop(url)["digest"] for url in dropped}
+        digests -= {entry["digest"] for entry in self.index.values()}
+        for digest in digests:
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+        if dropped:
+            log.info("Scrape cache evicted entries", extra={"entries": len(dropped), "blobs": len(digests)})
+
+def open_cache():
+    """The cache configured by SCRAPE_CACHE_*, or None when the TTL is 0."""
+    if SCRAPE_CACHE_TTL_SECONDS <= 0:
+        return None
+    return HtmlCache()
+
+
+# Route handlers: page.route("**/*", ...) / context.route("**/*", ...)
+def _cacheable(cache, request):
+    # Main-frame documents only: the URL passed to goto is what keep / drop are called with
+    return (cache is not None and request.resource_type == "document" and request.method == "GET"
+            and request.frame.parent_frame is None)
+
+def route_handler(cache=None, blocked=BLOCKED_RESOURCE_TYPES):
+    """Handler for the sync Playwright API."""
+
+    def handle(route, request):
+        if request.resource_type in blocked:
+            return route.abort()
+        if not _cacheable(cache, request):
+            return route.fallback()
+
+        cached = cache.get(request.url)
+        if cached:
+            status, content_type, body = cached
+            return route.fulfill(status=status, content_type=content_type, body=body)
+
+        response = route.fetch()
+        body = response.body()
+        cache.hold(request.url, response.status, response.headers.get("content-type"), body)
+        route.fulfill(response=response, body=body)
+
+    return handle
+
+def async_route_handler(cache=None, blocked=BLOCKED_RESOURCE_TYPES):
+    """Handler for the async Playwright API."""
+
+    async def handle(route, request):
+        if request.resource_type in blocked:
+            return await route.abort()
+        if not _cacheable(cache, request):
+            return await route.fallback()
+
+        cached = cache.get(request.url)
+        if cached:
+            status, content_type, body = cached
+            return await route.fulfill(status=status, content_type=content_type, body=body)
+
+        response = await route.fetch()
+        body = await response.body()
+        cache.hold(request.url, response.status, response.headers.get("content-type"), body)
+        await route.fulfill(response=response, body=body)
+
+    return handle
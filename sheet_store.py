@@ -0,0 +1,349 @@
+import os
+import asyncio
+import hashlib
+import pandas as pd
+from gspread.utils import rowcol_to_a1, numericise_all
+
+from metrics import STORE_FLUSH_SECONDS
+from structured_log import get_logger
+
+log = get_logger(__name__)
+
+# Narrow columns diffed on every sync; "hash" is the per-row content hash the
+# sheet's webhook script writes, so edits to any column move it
+SYNC_COLUMNS = ("sr_no", "status", "next_try", "hash")
+FULL_RELOAD_SHARE = 0.5     # more rows changed than this (rows inserted / sorted): read everything
+
+
+# Helpers
+def column_letter(col: int) -> str:
+    return rowcol_to_a1(1, col)[:-1]
+
+def fingerprint(values) -> str:
+    text = "\x1f".join("" if value is None else str(value) for value in values)
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+def spans(positions):
+    """Sorted row positions -> ``(first, last)`` runs of consecutive positions."""
+    runs = []
+    for position in positions:
+        if runs and position == runs[-1][1] + 1:
+            runs[-1][1] = position
+        else:
+            runs.append([position, position])
+    return [tuple(run) for run in runs]
+
+
+class SheetStore:
+    """In-memory view of a call-queue worksheet with buffered row-level writes.
+
+    The sheet is read once; ``sr_no -> sheet row`` and ``header -> column``
+    lookups are then served from memory. ``update`` only queues the changed
+    cells, and ``flush`` sends everything queued since the last flush as a
+    single ``batch_update``.
+
+    ``sync`` keeps the frame current without re-reading the whole sheet:
+    each row has a fingerprint over the narrow ``sync_columns``, and only
+    rows whose fingerprint moved are downloaded. Without a "hash" column an
+    edit to any other column (phone, name, email) is not seen until the next
+    full read. With ``snapshot_path`` the frame and fingerprints survive
+    between runs, so a restart costs a sync rather than a full read; a
+    snapshot is only used when the sheet has the "hash" column.
+    """
+
+    def __init__(self, worksheet, key_column="sr_no", flush_interval=5.0, snapshot_path=None, sync_columns=SYNC_COLUMNS):
+        self.worksheet = worksheet
+        self.key_column = key_column
+        self.flush_interval = flush_interval
+        self.snapshot_path = snapshot_path
+        self.sync_columns = [key_column, *(c for c in sync_columns if c != key_column)]
+        self.df = pd.DataFrame()
+        self.headers = []
+        self.col_index = {}      # header -> 1-based column
+        self.row_index = {}      # str(sr_no) -> 1-based sheet row
+        self.fingerprints = []   # per data row, over the watched columns
+        self.fetched_rows = 0    # rows downloaded by the last load / sync
+        self._watched = []
+        self._pending = {}       # (row, col) -> value
+        self._flusher = None
+
+    # Load
+    def load(self) -> pd.DataFrame:
+        """Full read, or an incremental sync when a snapshot of this sheet exists."""
+        if self._restore():
+            self.sync()
+        else:
+            self._load_all()
+        return self.df
+
+    def _load_all(self):
+        # get_all_values + numericise is what get_all_records does, minus its second header read
+        values = self.worksheet.get_all_values()
+        self.headers = values[0] if values else []
+        width = len(self.headers)
+        raw = [list(row[:width]) + [""] * (width - len(row)) for row in values[1:]]
+
+        self.col_index = {name: idx for idx, name in enumerate(self.headers, start=1)}
+        self.df = pd.DataFrame([numericise_all(row) for row in raw], columns=self.headers or None, dtype=object)
+        self._watched = [name for name in self.sync_columns if name in self.col_index]
+        # Fingerprints are over the sheet's text, so a sync can diff without numericising
+        watched = [self.col_index[name] - 1 for name in self._watched]
+        self.fingerprints = [fingerprint([row[col] for col in watched]) for row in raw]
+        self._overlay_pending()
+        self._reindex()
+
+        self.fetched_rows = len(self.df)
+        log.info("Google Sheet read in full", extra={"rows": len(self.df)})
+
+    def _overlay_pending(self):
+        # Unflushed writes, and the columns they add, stay on top of a fresh read
+        for (row, col), value in sorted(self._pending.items()):
+            if row == 1 and col == len(self.headers) + 1:
+                self.headers.append(value)
+                self.col_index[value] = col
+                self.df[value] = pd.Series("", index=self.df.index, dtype=object)
+            elif row >= 2 and row - 2 < len(self.df) and col <= len(self.headers):
+                self.df.iat[row - 2, self.df.columns.get_loc(self.headers[col - 1])] = value
+        for position in {row - 2 for row, _ in self._pending if 2 <= row < len(self.df) + 2}:
+            self.fingerprints[position] = fingerprint(self.df.iloc[position][self._watched])
+
+    def _reindex(self):
+        self.row_index = {}
+        if self.key_column in self.df.columns:
+            # Data starts on sheet row 2, directly under the header
+            for position, key in enumerate(self.df[self.key_column].astype(str), start=2):
+                self.row_index.setdefault(key, position)
+
+    # Incremental Sync
+    def sync(self) -> int:
+        """Merge rows changed on the sheet since the last load; returns rows downloaded.
+
+        One ``batch_get`` reads the header row and the watched columns, a
+        second fetches the changed rows as contiguous ranges. Rows with
+        unflushed writes keep their local values. A new header row, or a
+        change touching most rows, falls back to a full read.
+        """
+        if not self._watched:
+            self._load_all()
+            return self.fetched_rows
+
+        ranges = ["1:1"] + [f"{column_letter(self.col_index[name])}2:{column_letter(self.col_index[name])}" for name in self._watched]
+        header, *columns = self.worksheet.batch_get(ranges)
+        # Columns added locally reach the header row on the next flush
+        flushed_headers = [name for col, name in enumerate(self.headers, start=1) if (1, col) not in self._pending]
+        if (header[0] if header else []) != flushed_headers:
+            log.info("Google Sheet header changed, reading in full")
+            self._load_all()
+            return self.fetched_rows
+
+        rows = max((len(column) for column in columns), default=0)
+        cells = [[row[0] if row else "" for row in column] + [""] * (rows - len(column)) for column in columns]
+        current = [fingerprint(values) for values in zip(*cells)]
+
+        pending_rows = {row - 2 for row, _ in self._pending if row >= 2}
+        changed = [
+            position for position, value in enumerate(current)
+            if position not in pending_rows and (position >= len(self.fingerprints) or value != self.fingerprints[position])
+        ]
+        if len(changed) > FULL_RELOAD_SHARE * max(rows, 1) and rows > 1:
+            self._load_all()
+            return self.fetched_rows
+
+        resized = rows != len(self.df)
+        self._resize(rows)
+        last = column_letter(len(self.headers))
+        runs = spans(changed)
+        fetched = self.worksheet.batch_get([f"A{first + 2}:{last}{end + 2}" for first, end in runs]) if runs else []
+        width = len(self.headers)
+        for (first, end), values in zip(runs, fetched):
+            block = [numericise_all(list(row[:width]) + [""] * (width - len(row))) for row in values]
+            block += [[""] * width] * (end - first + 1 - len(block))
+            self.df.iloc[first:end + 1, :width] = block
+            for position in range(first, end + 1):
+                self.fingerprints[position] = current[position]
+
+        if changed or resized:
+            self._reindex()
+        self.fetched_rows = len(changed)
+        log.info("Google Sheet synced", extra={"rows": rows, "changed": len(changed), "ranges": len(runs)})
+        return self.fetched_rows
+
+    def _resize(self, rows):
+        """Grow (blank rows) or trim the frame to ``rows`` data rows."""
+        if rows < len(self.df):
+            self.df = self.df.iloc[:rows].copy()
+            del self.fingerprints[rows:]
+        elif rows > len(self.df):
+            blank = pd.DataFrame("", index=range(len(self.df), rows), columns=self.df.columns, dtype=object)
+            self.df = pd.concat([self.df, blank])
+            self.fingerprints += [None] * (rows - len(self.fingerprints))
+
+    def apply_records(self, records) -> int:
+        """Merge webhook-shaped ``{"row_number", "hash", "data"}`` records; no sheet reads.
+
+        These are the per-row payloads new-webhook_app receives, so a process
+        fed by the sheet webhook keeps the frame current for free. Records
+        whose ``hash`` matches the cached row are skipped. Returns rows changed.
+        """
+        pending_rows = {row for row, _ in self._pending}
+        applied = 0
+        for record in records:
+            data = record.get("data")
+            try:
+                row = int(record.get("row_number"))
+            except (TypeError, ValueError):
+                continue
+            if not isinstance(data, dict) or row < 2 or row in pending_rows:
+                continue
+
+            position = row - 2
+            if position >= len(self.df):
+                self._resize(position + 1)
+            elif record.get("hash") and self.get_at(position, "hash") == record["hash"]:
+                continue
+
+            for name, value in {**data, "hash": record.get("hash")}.items():
+                if name in self.col_index and value is not None:
+                    self.df.iat[position, self.df.columns.get_loc(name)] = value
+            self.fingerprints[position] = fingerprint(self.df.iloc[position][self._watched])
+            applied += 1
+
+        if applied:
+            self._reindex()
+        return applied
+
+    # Snapshot
+    def _sheet_key(self) -> str:
+        return f"{getattr(self.worksheet, 'spreadsheet_id', '')}:{getattr(self.worksheet, 'id', '')}"
+
+    def save_snapshot(self):
+        if not self.snapshot_path:
+            return
+        snapshot = {
+            "sheet": self._sheet_key(),
+            "headers": self.headers,
+            "df": self.df,
+            "fingerprints": self.fingerprints,
+            "watched": self._watched,
+        }
+        # Write aside, then rename: a crash mid-write never leaves a torn snapshot
+        tmp_path = f"{self.snapshot_path}.tmp"
+        pd.to_pickle(snapshot, tmp_path)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _restore(self) -> bool:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            snapshot = pd.read_pickle(self.snapshot_path)
+        except Exception as e:
+            log.warning("Google Sheet snapshot unreadable, reading in full", extra={"error": str(e)})
+            return False
+        if snapshot.get("sheet") != self._sheet_key() or snapshot.get("watched") != [
+            name for name in self.sync_columns if name in snapshot.get("headers", [])
+        ]:
+            return False
+        if "hash" not in snapshot["watched"]:
+            # Nothing would show rows edited outside the watched columns since the snapshot
+            log.info("Google Sheet has no hash column, snapshot ignored")
+            return False
+
+        self.headers = snapshot["headers"]
+        self.col_index = {name: idx for idx, name in enumerate(self.headers, start=1)}
+        self.df = snapshot["df"]
+        self.fingerprints = snapshot["fingerprints"]
+        self._watched = snapshot["watched"]
+        self._reindex()
+        return True
+
+    # Lookups
+    def get(self, sr_no, column, default=None):
+        row = self.row_index.get(str(sr_no))
+        return default if row is None else self.get_at(row - 2, column, default)
+
+    def get_at(self, position, column, default=None):
+        if column not in self.df.columns or position >= len(self.df):
+            return default
+        value = self.df.iat[position, self.df.columns.get_loc(column)]
+        return default if pd.isna(value) or value == "" else value
+
+    def _column(self, name) -> int:
+        col = self.col_index.get(name)
+        if col is None:
+            # Unknown column: append it to the header row on the next flush
+            col = len(self.headers) + 1
+            self.headers.append(name)
+            self.col_index[name] = col
+            self._pending[(1, col)] = name
+        if name not in self.df.columns:
+            self.df[name] = pd.Series("", index=self.df.index, dtype=object)
+        return col
+
+    # Writes
+    def update(self, sr_no, fields: dict) -> bool:
+        row = self.row_index.get(str(sr_no))
+        if row is None:
+            log.warning("Row not found in Google Sheet", extra={"sr_no": sr_no})
+            return False
+
+        for name, value in fields.items():
+            col = self._column(name)
+            value = "" if value is None else value
+            if hasattr(value, "item"):
+                value = value.item()  # numpy scalars are not JSON serializable
+            self.df.iat[row - 2, self.df.columns.get_loc(name)] = value
+            self._pending[(row, col)] = value
+
+        # Our own writes are not sheet changes: keep the next sync from re-fetching them
+        if any(name in self._watched for name in fields):
+            self.fingerprints[row - 2] = fingerprint(self.df.iloc[row - 2][self._watched])
+        return True
+
+    def _write(self, pending):
+        if len(self.headers) > self.worksheet.col_count:
+            self.worksheet.add_cols(len(self.headers) - self.worksheet.col_count)
+
+        data = [
+            {"range": rowcol_to_a1(row, col), "values": [[value]]}
+            for (row, col), value in sorted(pending.items())
+        ]
+        self.worksheet.batch_update(data, value_input_option="RAW")
+
+    async def flush(self):
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, {}
+        try:
+            with STORE_FLUSH_SECONDS.labels("sheets").time():
+                await asyncio.to_thread(self._write, pending)
+        except Exception as e:
+            # Keep unsent cells, but never overwrite values queued meanwhile
+            for cell, value in pending.items():
+                self._pending.setdefault(cell, value)
+            log.error("Google Sheet flush failed", extra={"cells": len(pending), "error": str(e)})
+            return 0
+
+        log.debug("Google Sheet flushed", extra={"cells": len(pending)})
+        return len(pending)
+
+    # Background Flush
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+        self.save_snapshot()
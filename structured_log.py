@@ -0,0 +1,68 @@
+import os
+import sys
+import json
+import logging
+
+# LOG_LEVEL=DEBUG|INFO|WARNING|ERROR, LOG_FORMAT=text|json
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+
+# Libraries that log every request at INFO; one line per dial is what we're replacing
+QUIET_LOGGERS = ("httpx", "httpcore")
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+# (uvicorn's color_message just repeats the message with ANSI codes)
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "color_message"}
+
+
+def _fields(record) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_FIELDS}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and ``extra`` fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+            **_fields(record),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """``time level logger message key=value ...`` for reading in a terminal."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = _fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+def configure_logging(level=None, fmt=None):
+    """Route the root logger to stderr; safe to call more than once."""
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter() if (fmt or LOG_FORMAT) == "json" else TextFormatter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        if getattr(existing, "_structured", False):
+            root.removeHandler(existing)
+    handler._structured = True
+    root.addHandler(handler)
+    root.setLevel((level or LOG_LEVEL).upper())
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime, timezone
+
+from new_plywright import EXTRACT_SECTIONS_JS, SECTION_KEYWORDS, SECTION_SELECTOR, USER_AGENT, parse_sections
+from scrape_cache import async_route_handler, open_cache
+from structured_log import configure_logging, get_logger
+
+log = get_logger("tender_batch")
+
+# Batch scraping: one headless Chromium, a fixed pool of contexts (one page
+# each), and every result appended to a JSON Lines file as soon as it is done.
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "4"))          # pages open at once
+SCRAPE_TIMEOUT_SECONDS = float(os.getenv("SCRAPE_TIMEOUT_SECONDS", "60"))  # per attempt: load + extract
+SCRAPE_RETRIES = int(os.getenv("SCRAPE_RETRIES", "2"))                  # extra attempts per URL
+SCRAPE_BACKOFF_SECONDS = float(os.getenv("SCRAPE_BACKOFF_SECONDS", "2"))  # doubled after every failed attempt
+
+
+# Helpers
+def read_urls(sources):
+    """URLs from arguments and files (one per line, # comments), de-duplicated in order."""
+    urls = []
+    for source in sources:
+        if source == "-":
+            lines = sys.stdin.read().splitlines()
+        elif os.path.isfile(source):
+            with open(source, encoding="utf-8") as url_file:
+                lines = url_file.read().splitlines()
+        else:
+            lines = [source]
+        urls.extend(line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#"))
+    return list(dict.fromkeys(urls))
+
+async def scrape_page(page, url, timeout):
+    await page.goto(url, wait_until = "domcontentloaded", timeout = timeout * 1000)
+    # The section tables are all we read; a page without any fails the attempt and is retried
+    await page.wait_for_selector(SECTION_SELECTOR, state = "attached", timeout = timeout * 1000)
+    snapshot = await page.evaluate(EXTRACT_SECTIONS_JS, list(SECTION_KEYWORDS))
+    return parse_sections(snapshot, verbose = False)
+
+
+# Pool
+class TenderBatch:
+    """Scrape URLs with ``concurrency`` pages in one browser; ``on_result`` gets each record."""
+
+    def __init__(self, browser, on_result, concurrency = SCRAPE_CONCURRENCY, timeout = SCRAPE_TIMEOUT_SECONDS,
+                 retries = SCRAPE_RETRIES, backoff = SCRAPE_BACKOFF_SECONDS, cache = None, launch = None):
+        self.browser = browser
+        self.launch = launch     # async () -> browser, used when the browser process dies
+        self.cache = cache
+        self.route = async_route_handler(cache)
+        self.on_result = on_result
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.done = 0
+        self.failed = 0
+        self._relaunching = asyncio.Lock()
+
+    async def _new_page(self):
+        context = await self.browser.new_context(user_agent = USER_AGENT)
+        await context.route("**/*", self.route)
+        return context, await context.new_page()
+
+    async def _recycle(self, slot):
+        """Replace the slot's context, relaunching the browser first if it has gone away."""
+        context, slot["context"], slot["page"] = slot["context"], None, None
+        if context is not None:
+            try:
+                await context.close()
+            except Exception as e:
+                log.warning("Could not close tender page context", extra={"error": str(e)})
+
+        if not self.browser.is_connected() and self.launch is not None:
+            async with self._relaunching:
+                # Another worker may have relaunched it while this one waited
+                if not self.browser.is_connected():
+                    log.warning("Browser disconnected, relaunching")
+                    self.browser = await self.launch()
+        try:
+            slot["context"], slot["page"] = await self._new_page()
+        except Exception as e:
+            # Left empty; the next attempt opens the page and fails (and backs off) if it still can't
+            log.warning("Could not open tender page context", extra={"error": str(e)})
+
+    async def _scrape(self, slot, url):
+        started = time.perf_counter()
+        error = None
+        for attempt in range(1, self.retries + 2):
+            try:
+                if slot["page"] is None:
+                    slot["context"], slot["page"] = await self._new_page()
+                # wait_for bounds the whole attempt, Playwright's own timeouts only single calls
+                data = await asyncio.wait_for(scrape_page(slot["page"], url, self.timeout), timeout = self.timeout)
+                if self.cache is not None:
+                    # Sections were found, so the page is worth keeping; failed attempts are refetched
+                    self.cache.keep(url)
+                return {"url": url, "ok": True, "data": data, "attempts": attempt,
+                        "elapsed_seconds": round(time.perf_counter() - started, 3)}
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+                log.warning("Tender scrape attempt failed", extra={"url": url, "attempt": attempt, "error": error})
+                if self.cache is not None:
+                    self.cache.drop(url)
+                # A timed-out or crashed page may be mid-navigation; the next attempt gets a fresh context
+                await self._recycle(slot)
+                if attempt <= self.retries:
+                    await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+        return {"url": url, "ok": False, "error": error, "attempts": self.retries + 1,
+                "elapsed_seconds": round(time.perf_counter() - started, 3)}
+
+    async def _worker(self, urls):
+        slot = {"context": None, "page": None}
+        await self._recycle(slot)
+        try:
+            while True:
+                try:
+                    url = urls.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                result = await self._scrape(slot, url)
+                result["scraped_at"] = datetime.now(timezone.utc).isoformat()
+                self.done += 1
+                self.failed += not result["ok"]
+                self.on_result(result)
+        finally:
+            if slot["context"] is not None:
+                try:
+                    await slot["context"].close()
+                except Exception as e:
+                    log.warning("Could not close tender page context", extra={"error": str(e)})
+
+    async def run(self, urls):
+        queue = asyncio.Queue()
+        for url in urls:
+            queue.put_nowait(url)
+        workers = min(self.concurrency, len(urls))
+        await asyncio.gather(*(self._worker(queue) for _ in range(workers)))
+
+
+async def scrape_batch(urls, output, concurrency = SCRAPE_CONCURRENCY, timeout = SCRAPE_TIMEOUT_SECONDS,
+                       retries = SCRAPE_RETRIES, headless = True, cache = True, backoff = SCRAPE_BACKOFF_SECONDS):
+    """Scrape ``urls`` into the JSON Lines file ``output`` ("-" = stdout); returns (done, failed)."""
+    from playwright.async_api import async_playwright
+
+    started = time.perf_counter()
+    cache = open_cache() if cache else None
+    sink = sys.stdout if output == "-" else open(output, "a", encoding = "utf-8")
+
+    def write(result):
+        # One line per tender, flushed, so an interrupted batch keeps everything finished so far
+        sink.write(json.dumps(result, ensure_ascii = False) + "\n")
+        sink.flush()
+        log.info("Tender scraped", extra={"url": result["url"], "ok": result["ok"], "attempts": result["attempts"]})
+
+    try:
+        async with async_playwright() as p:
+            async def launch():
+                return await p.chromium.launch(headless = headless)
+
+            batch = TenderBatch(await launch(), write, concurrency, timeout, retries, backoff, cache = cache, launch = launch)
+            try:
+                await batch.run(urls)
+            finally:
+                await batch.browser.close()
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - started
+    log.info("Tender batch finished", extra={
+        "urls": len(urls), "failed": batch.failed, "elapsed_seconds": round(elapsed, 1),
+        "per_minute": round(batch.done / max(elapsed, 1e-9) * 60, 1),
+        "cache_hits": cache.hits if cache else 0,
+    })
+    return batch.done, batch.failed
+
+
+# python tender_batch.py urls.txt                     -> tenders.jsonl
+# python tender_batch.py URL URL --output - | jq .   -> stream to stdout
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape many tender pages with one pooled browser")
+    parser.add_argument("sources", nargs="+", help="tender URLs, files of URLs, or - for stdin")
+    parser.add_argument("--output", default="tenders.jsonl", help="JSON Lines file to append to, - for stdout")
+    parser.add_argument("--concurrency", type=int, default=SCRAPE_CONCURRENCY)
+    parser.add_argument("--timeout", type=float, default=SCRAPE_TIMEOUT_SECONDS, help="seconds per attempt")
+    parser.add_argument("--retries", type=int, default=SCRAPE_RETRIES)
+    parser.add_argument("--backoff", type=float, default=SCRAPE_BACKOFF_SECONDS, help="seconds before the first retry, doubled after each")
+    parser.add_argument("--headed", action="store_true", help="show the browser")
+    parser.add_argument("--no-cache", action="store_true", help="always fetch the tender HTML")
+    args = parser.parse_args()
+
+    configure_logging()
+    urls = read_urls(args.sources)
+    if not urls:
+        sys.exit("No tender URLs given")
+    _, failed = asyncio.run(scrape_batch(
+        urls, args.output, args.concurrency, args.timeout, args.retries, not args.headed, not args.no_cache, args.backoff,
+    ))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,194 @@
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime, timezone
+
+import httpx
+import lxml.html
+
+from new_plywright import SECTION_KEYWORDS, USER_AGENT, parse_sections
+from scrape_cache import open_cache
+from tender_batch import (
+    SCRAPE_BACKOFF_SECONDS, SCRAPE_CONCURRENCY, SCRAPE_RETRIES, SCRAPE_TIMEOUT_SECONDS, read_urls, scrape_batch,
+)
+from structured_log import configure_logging, get_logger
+
+log = get_logger("tender_static")
+
+# Fast path for server-rendered tender pages: fetch the HTML with httpx and
+# read the section tables with lxml, no browser. Pages where no section header
+# is found (JavaScript-rendered, captcha, session expired) go to tender_batch.
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+# Parsing
+def snapshot_from_html(html):
+    """Build the ``{"sections", "tables"}`` structure EXTRACT_SECTIONS_JS returns, using lxml."""
+    document = lxml.html.fromstring(html)
+    words = [keyword.lower() for keyword in SECTION_KEYWORDS]
+    tables = []
+    table_index = {}
+
+    def serialize(table):
+        if table not in table_index:
+            rows = []
+            for i, row in enumerate(table.iter("tr")):
+                cells = {"cells": [cell.text_content() for cell in row.iter("td")]}
+                if i == 0:
+                    cells["head"] = [cell.text_content() for cell in row.iter("td", "th")]
+                rows.append(cells)
+            table_index[table] = len(tables)
+            tables.append({"rows": rows, "text": table.text_content()})
+        return table_index[table]
+
+    sections = []
+    for cell in document.iter("td"):
+        text = _WHITESPACE.sub(" ", cell.text_content()).strip().lower()
+        if not any(word in text for word in words):
+            continue
+
+        # ancestor::table[1], then its following-sibling::table[1] if there is one
+        parent = next(cell.iterancestors("table"), None)
+        sibling = parent.getnext() if parent is not None else None
+        while sibling is not None and sibling.tag != "table":
+            sibling = sibling.getnext()
+        table = sibling if sibling is not None else parent
+        sections.append({"header": cell.text_content(), "table": serialize(table) if table is not None else None})
+    return {"sections": sections, "tables": tables}
+
+def extract_static(html):
+    """Section name -> data, same as extract_sections on the rendered page."""
+    return parse_sections(snapshot_from_html(html), verbose=False)
+
+
+# Fetching
+def error_text(e):
+    return f"{type(e).__name__}: {str(e).splitlines()[0]}" if str(e) else type(e).__name__
+
+async def fetch_html(client, url, cache=None):
+    """The page body; a fetched page is only held, scrape_one keeps it once it has sections."""
+    cached = cache.get(url) if cache is not None else None
+    if cached:
+        return cached[2]
+    response = await client.get(url)
+    response.raise_for_status()
+    if cache is not None:
+        cache.hold(url, response.status_code, response.headers.get("content-type"), response.content)
+    return response.content
+
+async def scrape_one(client, url, cache, retries, backoff = SCRAPE_BACKOFF_SECONDS):
+    started = time.perf_counter()
+    for attempt in range(1, retries + 2):
+        try:
+            html = await fetch_html(client, url, cache)
+            break
+        except httpx.HTTPError as e:
+            error = error_text(e)
+            log.warning("Tender fetch attempt failed", extra={"url": url, "attempt": attempt, "error": error})
+            # 4xx (other than 429) and a URL with no http(s) scheme will not change on a retry
+            permanent = isinstance(e, httpx.UnsupportedProtocol) or (
+                isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500 and e.response.status_code != 429
+            )
+            if permanent or attempt > retries:
+                return {"url": url, "ok": False, "error": error, "attempts": attempt, "via": "static"}
+            await asyncio.sleep(backoff * 2 ** (attempt - 1))
+        except Exception as e:
+            # Not a network error (httpx.InvalidURL, a bad scheme): a retry gets the same
+            error = error_text(e)
+            log.warning("Tender fetch failed", extra={"url": url, "error": error})
+            return {"url": url, "ok": False, "error": error, "attempts": attempt, "via": "static"}
+
+    # Parsing is CPU work; off the loop so fetches keep overlapping
+    try:
+        data = await asyncio.to_thread(extract_static, html) if html.strip() else {}
+    except Exception as e:
+        # An empty or malformed body (lxml's ParserError "Document is empty") fails this URL only
+        if cache is not None:
+            cache.drop(url)
+        return {"url": url, "ok": False, "error": error_text(e), "attempts": attempt, "via": "static"}
+
+    if cache is not None:
+        # Only pages with sections are cached, so the Playwright fallback never gets a stale shell
+        if data:
+            cache.keep(url)
+        else:
+            cache.drop(url)
+    return {"url": url, "ok": bool(data), "data": data, "attempts": attempt, "via": "static",
+            "elapsed_seconds": round(time.perf_counter() - started, 3)}
+
+async def scrape_static(urls, output, concurrency = SCRAPE_CONCURRENCY * 4, timeout = SCRAPE_TIMEOUT_SECONDS,
+                        retries = SCRAPE_RETRIES, fallback = True, cache = True, backoff = SCRAPE_BACKOFF_SECONDS):
+    """Scrape ``urls`` to JSON Lines; pages with no sections are re-scraped with Playwright.
+
+    Returns ``(static, fallback, failed)`` counts.
+    """
+    started = time.perf_counter()
+    cache = open_cache() if cache else None
+    sink = sys.stdout if output == "-" else open(output, "a", encoding = "utf-8")
+    needs_browser = []
+    failed = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def scrape(client, url):
+        nonlocal failed
+        async with semaphore:
+            result = await scrape_one(client, url, cache, retries, backoff)
+        # Fetched but no sections: the tables are probably rendered by JavaScript
+        if not result["ok"] and "error" not in result and fallback:
+            needs_browser.append(url)
+            return
+        failed += not result["ok"]
+        result["scraped_at"] = datetime.now(timezone.utc).isoformat()
+        sink.write(json.dumps(result, ensure_ascii = False) + "\n")
+        sink.flush()
+
+    try:
+        limits = httpx.Limits(max_connections = concurrency, max_keepalive_connections = concurrency)
+        async with httpx.AsyncClient(headers = {"User-Agent": USER_AGENT}, timeout = timeout,
+                                     limits = limits, follow_redirects = True) as client:
+            await asyncio.gather(*(scrape(client, url) for url in urls))
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
+
+    static_done = len(urls) - len(needs_browser)
+    log.info("Static tender scrape finished", extra={
+        "urls": len(urls), "static": static_done, "needs_browser": len(needs_browser),
+        "elapsed_seconds": round(time.perf_counter() - started, 1),
+    })
+
+    if needs_browser:
+        _, browser_failed = await scrape_batch(
+            needs_browser, output, timeout = timeout, retries = retries, cache = cache is not None, backoff = backoff,
+        )
+        failed += browser_failed
+    return static_done, len(needs_browser), failed
+
+
+# python tender_static.py urls.txt                 -> tenders.jsonl, Playwright only where needed
+# python tender_static.py URL --no-fallback -o -   -> static parse only, to stdout
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape tender pages with lxml, falling back to Playwright")
+    parser.add_argument("sources", nargs="+", help="tender URLs, files of URLs, or - for stdin")
+    parser.add_argument("-o", "--output", default="tenders.jsonl", help="JSON Lines file to append to, - for stdout")
+    parser.add_argument("--concurrency", type=int, default=SCRAPE_CONCURRENCY * 4, help="concurrent HTTP fetches")
+    parser.add_argument("--timeout", type=float, default=SCRAPE_TIMEOUT_SECONDS)
+    parser.add_argument("--retries", type=int, default=SCRAPE_RETRIES)
+    parser.add_argument("--backoff", type=float, default=SCRAPE_BACKOFF_SECONDS, help="seconds before the first retry, doubled after each")
+    parser.add_argument("--no-fallback", action="store_true", help="never start a browser")
+    parser.add_argument("--no-cache", action="store_true", help="always fetch the tender HTML")
+    args = parser.parse_args()
+
+    configure_logging()
+    urls = read_urls(args.sources)
+    if not urls:
+        sys.exit("No tender URLs given")
+    _, _, failed = asyncio.run(scrape_static(
+        urls, args.output, args.concurrency, args.timeout, args.retries,
+        fallback = not args.no_fallback, cache = not args.no_cache, backoff = args.backoff,
+    ))
+    sys.exit(1 if failed else 0)
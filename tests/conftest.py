@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules live flat in the repo root; make them importable however pytest is started
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,57 @@
+import asyncio
+from datetime import datetime
+
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from call_items import build_call_item, write_call_items
+
+EXCEL_ID = ObjectId()
+NOW = datetime(2026, 6, 1, 12, 0)
+
+
+def item(row_number, hash=None, event_id=None, phone="+919000000001"):
+    record = {"row_number": row_number, "hash": hash, "event_id": event_id,
+              "data": {"Name": f"user {row_number}", "Phone": phone}}
+    return build_call_item(record, record["data"], EXCEL_ID, "main_sheet", NOW)
+
+
+def write(collection, documents):
+    return asyncio.run(write_call_items(collection, documents))
+
+
+def test_replayed_records_are_skipped_and_moved_rows_updated():
+    collection = AsyncMongoMockClient()["calls"]["out_bound_call_items"]
+    first = [item(1, hash="h1"), item(2, hash="h2"), item(3, event_id="e3")]
+    assert write(collection, first) == {"inserted": 3, "updated": 0, "skipped": 0}
+
+    # Same hash / event_id again: nothing new
+    assert write(collection, first) == {"inserted": 0, "updated": 0, "skipped": 3}
+
+    # A known hash on a new row is an update, not a new item
+    moved = [item(5, hash="h1"), item(2, hash="h2"), item(4, hash="h4")]
+    assert write(collection, moved) == {"inserted": 1, "updated": 1, "skipped": 1}
+
+    docs = asyncio.run(collection.find({}, {"_id": 0, "hash": 1, "row_number": 1, "status": 1}).to_list(None))
+    assert sorted((d["row_number"], d.get("hash")) for d in docs) == [
+        (2, "h2"), (3, None), (4, "h4"), (5, "h1"),
+    ]
+    assert {d["status"] for d in docs} == {"queued"}
+
+
+def test_queue_state_survives_a_replay():
+    collection = AsyncMongoMockClient()["calls"]["out_bound_call_items"]
+    write(collection, [item(1, hash="h1")])
+    asyncio.run(collection.update_one({"hash": "h1"}, {"$set": {"status": "success", "no_of_conversation": 1}}))
+
+    assert write(collection, [item(1, hash="h1")])["skipped"] == 1
+    doc = asyncio.run(collection.find_one({"hash": "h1"}))
+    assert doc["status"] == "success" and doc["no_of_conversation"] == 1
+
+
+def test_duplicates_in_one_batch_and_unkeyed_records():
+    collection = AsyncMongoMockClient()["calls"]["out_bound_call_items"]
+    batch = [item(1, hash="h1"), item(1, hash="h1"), item(2), item(2)]
+    # Records with neither hash nor event_id can't be deduplicated: both go in
+    assert write(collection, batch) == {"inserted": 3, "updated": 0, "skipped": 1}
+    assert write(collection, []) == {"inserted": 0, "updated": 0, "skipped": 0}
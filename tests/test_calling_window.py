@@ -0,0 +1,26 @@
+import pandas as pd
+
+from calling_window import CallingWindowScheduler
+
+# Europe/London falls back on 2026-10-25: 01:00-02:00 local happens twice
+FALL_BACK = [
+    # due 00:00 BST, before the window: opens at the first 01:00 (00:00 UTC)
+    ("2026-10-24T23:00:00+00:00", "2026-10-25T00:00:00+00:00"),
+    # due at the first 01:30 (BST), inside the window
+    ("2026-10-25T00:30:00+00:00", "2026-10-25T00:30:00+00:00"),
+    # due at the second 01:30 (GMT), inside the window: kept, not moved an hour back
+    ("2026-10-25T01:30:00+00:00", "2026-10-25T01:30:00+00:00"),
+]
+
+
+def test_rows_in_the_fall_back_hour_are_scheduled():
+    df = pd.DataFrame([
+        {"sr_no": str(i), "status": "no-response", "next_try": next_try, "timezone": "Europe/London"}
+        for i, (next_try, _) in enumerate(FALL_BACK)
+    ])
+    now = pd.Timestamp("2026-10-24T22:00:00+00:00").to_pydatetime()
+    scheduler = CallingWindowScheduler(window="01:00-05:00")
+
+    due = scheduler.due_times(df, now=now, utc=True)
+    assert due.tolist() == [pd.Timestamp(expected) for _, expected in FALL_BACK]
+    assert scheduler.push_frame(df, now=now, utc=True) == len(FALL_BACK)
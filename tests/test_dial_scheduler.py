@@ -0,0 +1,24 @@
+import asyncio
+import logging
+
+from dial_scheduler import DialScheduler
+from vapi_retry import CircuitBreaker
+
+
+def test_scheduler_logs_its_stats_as_fields(caplog):
+    async def dial(row):
+        await asyncio.sleep(0.05)
+        if row == 2:
+            raise RuntimeError("no call id")
+
+    scheduler = DialScheduler(dial, max_in_flight=2, calls_per_second=1000, burst=10, report_interval=0.01, breaker=CircuitBreaker())
+
+    with caplog.at_level(logging.INFO, logger="dial_scheduler"):
+        asyncio.run(scheduler.run([1, 2, 3]))
+
+    finished = [r for r in caplog.records if r.getMessage() == "Dial scheduler finished"]
+    assert len(finished) == 1
+    assert (finished[0].dispatched, finished[0].completed, finished[0].failed) == (3, 2, 1)
+    throughput = [r for r in caplog.records if r.getMessage() == "Dial throughput"]
+    assert throughput and throughput[0].rate_factor == 1.0
+    assert [r.error for r in caplog.records if r.getMessage() == "Dial failed in scheduler"] == ["no call id"]
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+from bench_eligibility import MODES, build_queue, is_valid_for_call
+from eligibility import eligible_mask
+
+NOW_UTC = datetime(2026, 6, 1, 12, 0, tzinfo=timezone.utc)
+NOW_LOCAL = datetime(2026, 6, 1, 12, 0)
+
+
+def mixed_rows(now):
+    past, future = now - timedelta(hours=1), now + timedelta(hours=1)
+    naive = lambda dt: dt.replace(tzinfo=None).isoformat()
+    return pd.DataFrame([
+        # Fresh: empty, NaN, None, queued (any case / padding)
+        {"status": "", "next_try": None, "called_at": None, "no_of_tries": ""},
+        {"status": float("nan"), "next_try": None, "called_at": None, "no_of_tries": "0"},
+        {"status": None, "next_try": pd.NaT, "called_at": None, "no_of_tries": None},
+        {"status": " Queued ", "next_try": naive(future), "called_at": None, "no_of_tries": "1"},
+        # Retries: next_try wins, else called_at + 24h, else never
+        {"status": "no-response", "next_try": naive(past), "called_at": None, "no_of_tries": "1"},
+        {"status": "no-response", "next_try": naive(future), "called_at": naive(now - timedelta(days=3)), "no_of_tries": "1"},
+        {"status": "no-response", "next_try": pd.NaT, "called_at": naive(now - timedelta(hours=25)), "no_of_tries": 1},
+        {"status": "no-response", "next_try": None, "called_at": naive(now - timedelta(hours=23)), "no_of_tries": 1.0},
+        {"status": "no-response", "next_try": None, "called_at": None, "no_of_tries": "2"},
+        {"status": "no-response", "next_try": "not a date", "called_at": None, "no_of_tries": "2"},
+        # Everything else is terminal
+        {"status": "success", "next_try": naive(past), "called_at": None, "no_of_tries": "1"},
+        {"status": "failure", "next_try": naive(past), "called_at": None, "no_of_tries": "1"},
+        {"status": "in-progress", "next_try": None, "called_at": naive(past), "no_of_tries": "1"},
+        # Try cap: integer text, floats, and text int() rejects
+        {"status": "queued", "next_try": None, "called_at": None, "no_of_tries": "3"},
+        {"status": "queued", "next_try": None, "called_at": None, "no_of_tries": 2.9},
+        {"status": "queued", "next_try": None, "called_at": None, "no_of_tries": "3.0"},
+        {"status": "no-response", "next_try": naive(past), "called_at": None, "no_of_tries": 5},
+    ])
+
+def tz_aware_rows(now):
+    past, future = now - timedelta(hours=1), now + timedelta(hours=1)
+    return pd.DataFrame([
+        {"status": "no-response", "next_try": past.isoformat().replace("+00:00", "Z"), "no_of_tries": "1"},
+        {"status": "no-response", "next_try": future.isoformat(), "no_of_tries": "1"},
+        {"status": "no-response", "next_try": past.astimezone(timezone(timedelta(hours=5, minutes=30))).isoformat(), "no_of_tries": "1"},
+        {"status": "no-response", "next_try": future.astimezone(timezone(timedelta(hours=-7))).isoformat(), "no_of_tries": "1"},
+    ])
+
+def per_row(df, now, **kwargs):
+    return df.apply(is_valid_for_call, axis=1, now=now, **kwargs).astype(bool)
+
+
+@pytest.mark.parametrize("mode", sorted(MODES))
+def test_mask_matches_per_row_check(mode):
+    kwargs = MODES[mode]
+    now = NOW_UTC if kwargs["utc"] else NOW_LOCAL
+    df = mixed_rows(now)
+
+    expected = per_row(df, now, **kwargs)
+    assert eligible_mask(df, now=now, **kwargs).tolist() == expected.tolist()
+    # Fresh rows, the past retries, and nothing terminal
+    assert expected.sum() > 0 and not expected.all()
+
+@pytest.mark.parametrize("max_tries", [None, 0, 1, 2])
+def test_try_cap_matches_per_row_check(max_tries):
+    df = mixed_rows(NOW_UTC)
+    expected = per_row(df, NOW_UTC, utc=True, max_tries=max_tries)
+    assert eligible_mask(df, now=NOW_UTC, utc=True, max_tries=max_tries).tolist() == expected.tolist()
+
+def test_tz_aware_next_try_utc():
+    df = tz_aware_rows(NOW_UTC)
+    assert eligible_mask(df, now=NOW_UTC, utc=True).tolist() == [True, False, True, False]
+    assert per_row(df, NOW_UTC, utc=True).tolist() == [True, False, True, False]
+
+def test_tz_aware_next_try_local_wall_clock():
+    # Excel compares in local wall clock; aware values are converted to it first
+    now = datetime.now()
+    df = tz_aware_rows(now.astimezone(timezone.utc))
+    assert eligible_mask(df, now=now, utc=False).tolist() == per_row(df, now, utc=False).tolist()
+
+@pytest.mark.parametrize("mode", sorted(MODES))
+def test_synthetic_queue_matches(mode):
+    kwargs = MODES[mode]
+    df = build_queue(2_000, utc=kwargs["utc"])
+    now = pd.Timestamp.now(tz="UTC").to_pydatetime() if kwargs["utc"] else datetime.now()
+    assert eligible_mask(df, now=now, **kwargs).tolist() == per_row(df, now, **kwargs).tolist()
@@ -0,0 +1,72 @@
+import json
+import asyncio
+import importlib
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+ingest = importlib.import_module("new-webhook_app")
+SHEET = "main_sheet"
+PARENT_ID = ObjectId(ingest.mapping[SHEET])
+
+
+def ndjson(*records):
+    return [json.dumps(record).encode() + b"\n" for record in records]
+
+def record(n):
+    return {"row_number": n, "hash": f"h{n}", "data": {"Name": f"user {n}", "Phone": f"+9190000{n:05d}"}}
+
+
+@pytest.fixture
+def app(monkeypatch):
+    db = AsyncMongoMockClient()["calls"]
+    asyncio.run(db.out_bound_calls.insert_one({"_id": PARENT_ID, "processed": True}))
+    monkeypatch.setattr(ingest, "collection_odb_calls", db.out_bound_calls)
+    monkeypatch.setattr(ingest, "collection_odb_call_items", db.out_bound_call_items)
+    monkeypatch.setattr(ingest, "INGEST_CHUNK_SIZE", 2)
+    ingest.parent_cache.clear()
+    return TestClient(ingest.app), db
+
+def parent_processed(db):
+    return asyncio.run(db.out_bound_calls.find_one({"_id": PARENT_ID}))["processed"]
+
+def post(client, body):
+    return client.post(f"/api/out-bound-call-item/stream?sheet_name={SHEET}", content=iter(body))
+
+
+def test_stream_flushes_in_chunks_and_reports_bad_lines(app):
+    client, db = app
+    body = ndjson(record(1), record(2), record(3)) + [b"{not json\n", b'{"row_number": 9}\n'] + ndjson(record(4), record(5))
+
+    response = post(client, body)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["records"] == 7
+    assert result["inserted_records"] == 5
+    assert result["rejected_records"] == 2
+    assert [error["line"] for error in result["errors"]] == [4, 5]
+    assert [chunk["records"] for chunk in result["chunks"]] == [2, 2, 1]
+    assert asyncio.run(db.out_bound_call_items.count_documents({})) == 5
+    assert parent_processed(db) is False
+
+def test_replayed_stream_leaves_the_parent_processed(app):
+    client, db = app
+    post(client, ndjson(record(1), record(2)))
+    asyncio.run(db.out_bound_calls.update_one({"_id": PARENT_ID}, {"$set": {"processed": True}}))
+
+    result = post(client, ndjson(record(1), record(2))).json()
+    assert result["skipped_records"] == 2
+    assert parent_processed(db) is True
+
+def test_stream_failing_part_way_still_marks_the_parent(app, monkeypatch):
+    client, db = app
+    # Two chunks are written before a line overruns the limit
+    oversized = b'{"row_number": 99, "data": {"Name": "' + b"x" * 1_100_000
+    response = post(client, ndjson(record(1), record(2), record(3), record(4)) + [oversized])
+
+    assert response.status_code == 400
+    assert "exceeds" in response.json()["detail"]
+    assert asyncio.run(db.out_bound_call_items.count_documents({})) == 4
+    assert parent_processed(db) is False
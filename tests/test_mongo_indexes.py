@@ -0,0 +1,29 @@
+import os
+import asyncio
+
+import pytest
+
+# Needs a real mongod (mongomock has no explain); its throwaway database is dropped after
+MONGO_URI = os.getenv("MONGO_URI")
+pytestmark = pytest.mark.skipif(not MONGO_URI, reason="set MONGO_URI to a throwaway mongod")
+
+
+def test_call_item_queries_use_an_index():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from mongo_indexes import CALL_ITEM_INDEXES, check_query_plans, ensure_indexes
+
+    async def run():
+        client = AsyncIOMotorClient(MONGO_URI)
+        db = client[f"index_check_{os.getpid()}"]
+        try:
+            names = await ensure_indexes(call_items = db.out_bound_call_items, calls = db.out_bound_calls)
+            return names, await check_query_plans(db.out_bound_call_items)
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+
+    names, plans = asyncio.run(run())
+    assert len(names) == len(CALL_ITEM_INDEXES)
+    scans = {name: stages for name, stages in plans.items() if "COLLSCAN" in stages}
+    assert not scans, f"collection scans: {scans}"
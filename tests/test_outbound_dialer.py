@@ -0,0 +1,24 @@
+import asyncio
+
+import outbound_dialer
+from outbound_dialer import OutboundDialer
+
+
+class NamedQueue:
+    name = "sqlite"
+
+
+def test_exit_drops_outcome_polls_after_shutdown_timeout(monkeypatch):
+    monkeypatch.setattr(outbound_dialer, "OUTCOME_SHUTDOWN_SECONDS", 0.05)
+    dialer = OutboundDialer(NamedQueue())
+
+    async def scenario():
+        done = asyncio.create_task(asyncio.sleep(0))
+        stuck = asyncio.create_task(asyncio.sleep(3600))
+        dialer.outcome_tasks.update({done, stuck})
+        await asyncio.wait_for(dialer.drain_outcomes(), timeout=5)
+        return done, stuck
+
+    done, stuck = asyncio.run(scenario())
+    assert done.done() and not done.cancelled()
+    assert stuck.cancelled()
@@ -0,0 +1,89 @@
+import json
+import asyncio
+
+import pandas as pd
+
+from eligibility import eligible_mask
+from outbound_dialer import OutboundDialer
+from payload_prep import QUARANTINE_COLUMNS, QUARANTINE_STATUS, normalize_phones, prepare_calls, write_quarantine_report
+
+PHONES = [
+    ("+91 90000-00001", "+919000000001", None),
+    ("919000000002", "+919000000002", None),
+    (" +14155550123 ", "+14155550123", None),
+    ("9.19E+11", None, "scientific notation from Excel"),
+    ("91900000000x", None, "non-numeric phone number"),
+    ("+91900", None, "phone number too short"),
+    ("", None, "missing phone number"),
+    (None, None, "missing phone number"),
+    (float("nan"), None, "missing phone number"),
+]
+
+
+def claimed_rows():
+    return pd.DataFrame({
+        "sr_no": [str(i) for i in range(1, len(PHONES) + 1)],
+        "user_name": [f"user {i}" for i in range(len(PHONES))],
+        "email": [None] * len(PHONES),
+        "phone_number": [raw for raw, _, _ in PHONES],
+        "status": ["queued"] * len(PHONES),
+    })
+
+
+def test_normalize_phones():
+    phones, reasons = normalize_phones(pd.Series([raw for raw, _, _ in PHONES], dtype=object))
+    assert reasons.tolist() == [reason for _, _, reason in PHONES]
+    good = reasons.isna()
+    assert phones[good].tolist() == [phone for _, phone, reason in PHONES if reason is None]
+
+
+def test_prepare_calls_splits_and_renders_bodies():
+    ready, quarantined = prepare_calls(claimed_rows(), "assistant", "number")
+
+    assert ready["sr_no"].tolist() == ["1", "2", "3"]
+    body = json.loads(ready["body"].iloc[0])
+    assert body["customer"] == {"number": "+919000000001"}
+    assert body["assistantId"] == "assistant" and body["phoneNumberId"] == "number"
+    assert body["assistantOverrides"]["variableValues"] == {"username": "user 0", "userEmail": None}
+
+    assert list(quarantined.columns) == QUARANTINE_COLUMNS
+    assert quarantined["sr_no"].tolist() == ["4", "5", "6", "7", "8", "9"]
+
+    ready, quarantined = prepare_calls(claimed_rows().iloc[:0], "assistant", "number")
+    assert ready.empty and quarantined.empty
+
+
+def test_quarantined_rows_are_reported_and_never_dialed(tmp_path):
+    report = tmp_path / "quarantine.csv"
+
+    class RecordingQueue:
+        name = "excel"
+
+        def __init__(self):
+            self.updates = {}
+
+        async def update(self, sr_no, fields):
+            self.updates[sr_no] = fields
+
+    queue = RecordingQueue()
+    dialer = OutboundDialer(queue, quarantine_file=str(report))
+    ready = asyncio.run(dialer.prepare_batch(claimed_rows()))
+    asyncio.run(dialer.prepare_batch(claimed_rows()))
+
+    assert ready["sr_no"].tolist() == ["1", "2", "3"]
+    assert set(queue.updates) == {"4", "5", "6", "7", "8", "9"}
+    assert {fields["status"] for fields in queue.updates.values()} == {QUARANTINE_STATUS}
+
+    # Appended per batch under a single header
+    written = pd.read_csv(report, dtype=str)
+    assert list(written.columns) == QUARANTINE_COLUMNS
+    assert len(written) == 12
+
+    # A quarantined row is terminal for eligibility
+    rows = claimed_rows().set_index("sr_no")
+    for sr_no, fields in queue.updates.items():
+        rows.loc[sr_no, "status"] = fields["status"]
+    assert eligible_mask(rows.reset_index(), utc=True).tolist() == [True] * 3 + [False] * 6
+
+    write_quarantine_report(pd.DataFrame(columns=QUARANTINE_COLUMNS), str(tmp_path / "empty.csv"))
+    assert not (tmp_path / "empty.csv").exists()
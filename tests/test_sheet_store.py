@@ -0,0 +1,187 @@
+import re
+import asyncio
+
+from gspread.utils import a1_to_rowcol
+
+from sheet_store import SheetStore
+
+HEADERS = ["sr_no", "user_name", "phone_number", "status", "next_try", "hash"]
+
+
+class FakeWorksheet:
+    """Just enough of gspread.Worksheet for SheetStore, counting the cells it reads."""
+
+    spreadsheet_id = "sheet-1"
+    id = 0
+
+    def __init__(self, rows):
+        self.rows = [list(row) for row in rows]
+        self.col_count = len(self.rows[0])
+        self.full_reads = 0
+        self.cells_read = 0
+        self.updates = []
+
+    def cell(self, row, col):
+        if row > len(self.rows) or col > len(self.rows[row - 1]):
+            return ""
+        return self.rows[row - 1][col - 1]
+
+    def _read(self, a1):
+        if re.fullmatch(r"\d+:\d+", a1):
+            first, last = (int(n) for n in a1.split(":"))
+            first_col, last_col = 1, self.col_count
+        else:
+            start, end = a1.split(":")
+            first, first_col = a1_to_rowcol(start)
+            if end.isalpha():
+                last, last_col = len(self.rows), first_col
+            else:
+                last, last_col = a1_to_rowcol(end)
+        block = [[self.cell(row, col) for col in range(first_col, last_col + 1)] for row in range(first, min(last, len(self.rows)) + 1)]
+        self.cells_read += sum(len(row) for row in block)
+        # The Sheets API drops trailing empty cells and rows
+        block = [row[:max([i + 1 for i, v in enumerate(row) if v != ""], default=0)] for row in block]
+        while block and not block[-1]:
+            block.pop()
+        return block
+
+    def get_all_values(self):
+        self.full_reads += 1
+        return [list(row) for row in self.rows]
+
+    def batch_get(self, ranges):
+        return [self._read(a1) for a1 in ranges]
+
+    def batch_update(self, data, value_input_option=None):
+        self.updates.append(data)
+        for item in data:
+            row, col = a1_to_rowcol(item["range"])
+            while len(self.rows) < row:
+                self.rows.append([""] * self.col_count)
+            self.rows[row - 1] += [""] * (col - len(self.rows[row - 1]))
+            self.rows[row - 1][col - 1] = item["values"][0][0]
+
+    def add_cols(self, count):
+        self.col_count += count
+
+
+def sheet(rows=20, headers=HEADERS):
+    body = [[str(n), f"user {n}", f"+9190000{n:05d}", "queued", "", f"h{n}"] for n in range(1, rows + 1)]
+    return FakeWorksheet([headers] + [row[:len(headers)] for row in body])
+
+
+def test_sync_downloads_only_changed_rows():
+    worksheet = sheet()
+    store = SheetStore(worksheet)
+    store.load()
+    assert worksheet.full_reads == 1
+
+    # Edited outside the watched columns, but the row hash moved
+    worksheet.rows[3][1], worksheet.rows[3][5] = "renamed", "h3-new"
+    worksheet.rows[10][3] = "success"
+    worksheet.rows.append(["21", "user 21", "+919000000021", "queued", "", "h21"])
+
+    assert store.sync() == 3
+    assert worksheet.full_reads == 1
+    assert store.get(3, "user_name") == "renamed"
+    assert store.get(10, "status") == "success"
+    # Values are numericised like get_all_records
+    assert store.get(21, "phone_number") == 919000000021
+    assert len(store.df) == 21
+
+    assert store.sync() == 0
+
+def test_unflushed_writes_win_over_the_sheet():
+    worksheet = sheet()
+    store = SheetStore(worksheet)
+    store.load()
+
+    store.update(5, {"status": "in-progress", "request_id": "call-5"})
+    worksheet.rows[5][3] = "queued-again"
+    assert store.sync() == 0
+    assert worksheet.full_reads == 1
+    assert store.get(5, "status") == "in-progress"
+
+    assert asyncio.run(store.flush()) == 3   # two cells plus the new request_id header
+    assert worksheet.rows[0][-1] == "request_id"
+    assert worksheet.rows[5][3] == "in-progress"
+    # Our own flushed write is not re-fetched
+    assert store.sync() == 0
+
+def test_full_read_keeps_unflushed_writes():
+    worksheet = sheet()
+    store = SheetStore(worksheet)
+    store.load()
+    store.update(5, {"status": "in-progress", "request_id": "call-5"})
+
+    for row in worksheet.rows[1:]:
+        row[3] = "no-response"
+    store.sync()
+    assert worksheet.full_reads == 2
+    assert store.get(5, "status") == "in-progress"
+    assert store.get(5, "request_id") == "call-5"
+    assert store.get(6, "status") == "no-response"
+
+    asyncio.run(store.flush())
+    assert worksheet.rows[0][-1] == "request_id"
+    assert worksheet.rows[5][3] == "in-progress"
+
+def test_header_change_or_mass_change_reads_in_full():
+    worksheet = sheet()
+    store = SheetStore(worksheet)
+    store.load()
+
+    worksheet.rows[0].append("timezone")
+    worksheet.col_count += 1
+    store.sync()
+    assert worksheet.full_reads == 2
+
+    for row in worksheet.rows[1:]:
+        row[3] = "no-response"
+    store.sync()
+    assert worksheet.full_reads == 3
+    assert set(store.df["status"]) == {"no-response"}
+
+def test_snapshot_restores_without_a_full_read(tmp_path):
+    path = str(tmp_path / "snapshot.pkl")
+    worksheet = sheet()
+    store = SheetStore(worksheet, snapshot_path=path)
+    store.load()
+    store.update(2, {"status": "success"})
+    asyncio.run(store.close())
+
+    worksheet.rows[7][5] = "h7-new"
+    worksheet.rows[7][2] = "+919999999999"
+    restarted = SheetStore(worksheet, snapshot_path=path)
+    restarted.load()
+
+    assert worksheet.full_reads == 1
+    assert restarted.fetched_rows == 1
+    assert restarted.get(2, "status") == "success"
+    assert restarted.get(7, "phone_number") == 919999999999
+
+def test_snapshot_ignored_without_a_hash_column(tmp_path):
+    path = str(tmp_path / "snapshot.pkl")
+    worksheet = sheet(headers=HEADERS[:-1])
+    store = SheetStore(worksheet, snapshot_path=path)
+    store.load()
+    asyncio.run(store.close())
+
+    # A phone edit leaves the watched columns alone; only a full read can see it
+    worksheet.rows[4][2] = "+919999999999"
+    restarted = SheetStore(worksheet, snapshot_path=path)
+    restarted.load()
+
+    assert worksheet.full_reads == 2
+    assert restarted.get(4, "phone_number") == 919999999999
+
+def test_snapshot_of_another_sheet_is_ignored(tmp_path):
+    path = str(tmp_path / "snapshot.pkl")
+    store = SheetStore(sheet(), snapshot_path=path)
+    store.load()
+    asyncio.run(store.close())
+
+    other = sheet()
+    other.spreadsheet_id = "sheet-2"
+    SheetStore(other, snapshot_path=path).load()
+    assert other.full_reads == 1
@@ -0,0 +1,12 @@
+import pytest
+
+import vapi_cli
+
+
+def test_status_without_a_workbook_exits_with_one_line(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("CALL_QUEUE_BACKEND", "excel")
+
+    with pytest.raises(SystemExit) as exit_info:
+        vapi_cli.main(["status", "--backend", "excel"])
+    assert exit_info.value.code == "Call queue file not found: call_data.xlsx"
@@ -0,0 +1,68 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import webhook_app
+from call_queue import MongoCallQueue
+from eligibility import eligible_mask
+from vapi_events import queue_outcome
+
+REQUEST_ID = "call-1"
+
+# endedReason -> still due for a redial once the retry gap has passed
+REASONS = [
+    ("customer-ended-call", False),
+    ("customer-did-not-answer", True),
+    ("voicemail", True),
+    ("twilio-failed-to-connect-call", True),
+    ("pipeline-error-openai-llm-failed", True),
+    ("assistant-not-found", False),
+    (None, False),
+]
+
+
+def end_of_call_report(ended_reason):
+    return {"message": {
+        "type": "end-of-call-report",
+        "endedReason": ended_reason,
+        "cost": 0.12,
+        "call": {"id": REQUEST_ID},
+    }}
+
+
+@pytest.mark.parametrize("ended_reason, redialed", REASONS)
+def test_webhook_outcome_drives_mongo_eligibility(monkeypatch, ended_reason, redialed):
+    collection = AsyncMongoMockClient()["calls"]["out_bound_call_items"]
+    monkeypatch.setattr(webhook_app, "collection_call_items", collection)
+    monkeypatch.setattr(webhook_app, "VAPI_SERVER_SECRET", None)
+    queue = MongoCallQueue(None, "calls", "out_bound_call_items", retry_gap_hours=webhook_app.RETRY_GAP_HOURS)
+
+    async def scenario():
+        called_at = datetime.now(timezone.utc)
+        await collection.insert_one({"status": "in-progress", "request_id": REQUEST_ID, "called_at": called_at})
+        result = await webhook_app.vapi_event(end_of_call_report(ended_reason), None)
+        later = called_at + timedelta(hours=webhook_app.RETRY_GAP_HOURS + 1)
+        return (
+            result,
+            await collection.count_documents(queue._eligible_filter(called_at)),
+            await collection.count_documents(queue._eligible_filter(later)),
+        )
+
+    result, due_now, due_later = asyncio.run(scenario())
+    assert result["matched"] == 1
+    assert due_now == 0
+    assert due_later == int(redialed)
+
+
+@pytest.mark.parametrize("ended_reason, redialed", REASONS)
+def test_polled_outcome_drives_frame_eligibility(ended_reason, redialed):
+    now = datetime.now(timezone.utc)
+    fields = queue_outcome({"status": "ended", "endedReason": ended_reason}, retry_gap_hours=24, now=now)
+    assert (fields["next_try"] is not None) == redialed
+
+    df = pd.DataFrame([{"called_at": now.isoformat(), "no_of_tries": 1, **fields}])
+    assert not eligible_mask(df, now=now, utc=True).any()
+    assert eligible_mask(df, now=now + timedelta(hours=25), utc=True).tolist() == [redialed]
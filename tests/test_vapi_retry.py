@@ -0,0 +1,123 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from vapi_client import VapiClient
+from vapi_retry import CircuitBreaker, RetryBudget, RetryPolicy, retry_after_seconds
+
+
+def client_for(statuses, headers=None, max_retries=3, budget=None, breaker=None):
+    """VapiClient whose POSTs get ``statuses`` in turn; returns (client, requests seen)."""
+    seen = []
+
+    def handler(request):
+        status = statuses[min(len(seen), len(statuses) - 1)]
+        seen.append(request)
+        if isinstance(status, Exception):
+            raise status
+        return httpx.Response(status, headers=headers or {}, json={"id": "call-1"} if status == 201 else {})
+
+    retry = RetryPolicy(max_retries=max_retries, backoff_base=0, backoff_max=0, budget=budget)
+    client = VapiClient(api_key="test", url="https://vapi.test/call/phone", http2=False, retry=retry, breaker=breaker)
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client, seen
+
+def place(client):
+    async def run():
+        try:
+            return await client.place_call(content=b"{}")
+        finally:
+            await client.aclose()
+    return asyncio.run(run())
+
+
+# Retry-After
+def test_retry_after_seconds_and_http_date():
+    assert retry_after_seconds(httpx.Response(429, headers={"Retry-After": "7"})) == 7.0
+    assert retry_after_seconds(httpx.Response(429, headers={"Retry-After": "-3"})) == 0.0
+    when = datetime.now(timezone.utc) + timedelta(seconds=120)
+    assert 110 < retry_after_seconds(httpx.Response(429, headers={"Retry-After": format_datetime(when, usegmt=True)})) <= 120
+    past = datetime.now(timezone.utc) - timedelta(seconds=120)
+    assert retry_after_seconds(httpx.Response(429, headers={"Retry-After": format_datetime(past, usegmt=True)})) == 0.0
+    assert retry_after_seconds(httpx.Response(429, headers={"Retry-After": "soon"})) is None
+    assert retry_after_seconds(httpx.Response(429)) is None
+    assert retry_after_seconds(None) is None
+
+def test_delay_honors_retry_after_up_to_the_cap():
+    policy = RetryPolicy(backoff_base=1, backoff_max=30)
+    assert policy.delay(0, httpx.Response(429, headers={"Retry-After": "12"})) == 12
+    assert policy.delay(0, httpx.Response(429, headers={"Retry-After": "600"})) == 30
+    assert 0 <= policy.delay(3) <= 8
+
+
+# Which responses are retried
+@pytest.mark.parametrize("status", [429, 502, 503, 504])
+def test_transient_statuses_are_retried(status):
+    client, seen = client_for([status, status, 201])
+    assert place(client).status_code == 201
+    assert len(seen) == 3
+
+@pytest.mark.parametrize("status", [400, 401, 404, 500])
+def test_other_statuses_are_returned_at_once(status):
+    # A plain 500 may have created the call, so it is never re-posted
+    client, seen = client_for([status, 201])
+    assert place(client).status_code == status
+    assert len(seen) == 1
+
+def test_retries_stop_at_max_retries():
+    client, seen = client_for([503], max_retries=2)
+    assert place(client).status_code == 503
+    assert len(seen) == 3
+
+def test_connect_errors_are_retried_read_timeouts_are_not():
+    client, seen = client_for([httpx.ConnectError("refused"), 201])
+    assert place(client).status_code == 201
+    assert len(seen) == 2
+
+    client, seen = client_for([httpx.ReadTimeout("slow"), 201])
+    with pytest.raises(httpx.ReadTimeout):
+        place(client)
+    assert len(seen) == 1
+
+
+# Budget and breaker
+def test_spent_budget_returns_the_failure():
+    budget = RetryBudget(ratio=0, min_retries=1)
+    client, seen = client_for([429], budget=budget)
+    assert place(client).status_code == 429
+    assert len(seen) == 2   # the one budgeted retry
+
+    client, seen = client_for([429], budget=budget)
+    assert place(client).status_code == 429
+    assert len(seen) == 1
+
+def test_breaker_scales_down_on_429s_and_recovers():
+    breaker = CircuitBreaker(window=10, threshold=0.1, min_samples=4, min_factor=0.25, recovery=0.1)
+    client, seen = client_for([429], headers={"Retry-After": "0"}, max_retries=3, breaker=breaker)
+    place(client)
+    assert breaker.rate_limited == 4
+    assert breaker.rate_factor == 0.5
+
+    for _ in range(12):
+        breaker.record(429)
+    assert breaker.rate_factor == 0.25   # floored at min_factor
+
+    breaker.record(201)
+    assert breaker.rate_factor == pytest.approx(0.35)
+    breaker.record(503)
+    assert breaker.rate_factor == pytest.approx(0.35)
+
+def test_breaker_pauses_for_retry_after():
+    breaker = CircuitBreaker()
+    breaker.record(429, retry_after=0.2)
+
+    async def timed_wait():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await breaker.wait()
+        return loop.time() - start
+
+    assert asyncio.run(timed_wait()) >= 0.15
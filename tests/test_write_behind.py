@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from write_behind import WriteBehindBuffer
+
+
+class FailingCollection:
+    name = "webhook_events"
+
+    async def insert_many(self, events, ordered=True):
+        raise RuntimeError("mongo is down")
+
+
+def test_close_writes_every_queued_event(tmp_path):
+    async def run():
+        collection = mongomock_motor.AsyncMongoMockClient()["bench"]["webhook_events"]
+        buffer = WriteBehindBuffer(collection, max_batch=50, flush_interval_ms=5_000, spill_path=str(tmp_path / "spill.jsonl"))
+        await buffer.start()
+        for i in range(1_234):
+            await buffer.put({"i": i})
+        # Close lands while the flusher is still collecting a batch
+        await buffer.close()
+        return buffer, await collection.count_documents({})
+
+    buffer, stored = asyncio.run(run())
+    assert buffer.written + buffer.spilled == 1_234
+    assert stored == buffer.written
+    assert buffer.queue.empty()
+
+
+def test_close_spills_what_mongo_rejects(tmp_path):
+    spill_path = tmp_path / "spill.jsonl"
+
+    async def run():
+        buffer = WriteBehindBuffer(FailingCollection(), max_batch=100, spill_path=str(spill_path))
+        await buffer.start()
+        for i in range(250):
+            await buffer.put({"i": i})
+        await buffer.close()
+        return buffer
+
+    buffer = asyncio.run(run())
+    assert buffer.written == 0
+    assert buffer.spilled == 250
+    assert len(spill_path.read_text().splitlines()) == 250
@@ -0,0 +1,115 @@
+import os
+import sys
+import json
+import argparse
+
+# One entry point for the dialers, webhook apps and benchmarks. Every
+# subcommand imports what it needs inside its handler, so `status` never
+# loads uvicorn and `ingest` never loads pandas or gspread.
+DIALERS = {
+    "vapi": "vapi_outbound_call",          # excel queue by default
+    "gemini": "gemini_outbound_calling",   # google sheet queue by default
+}
+APPS = {
+    "events": "webhook_app:app",           # /api/webhook, /api/vapi/webhook
+    "items": "new-webhook_app:app",        # /api/out-bound-call-item
+}
+BENCHMARKS = {
+    "dialer": "bench_dialer",
+    "webhooks": "bench_webhooks",
+    "eligibility": "bench_eligibility",
+    "scraper": "bench_scraper",
+}
+BACKENDS = ["excel", "sheets", "sqlite", "mongo"]
+
+
+# Helpers
+def load_dialer(name, backend):
+    # CALL_QUEUE_BACKEND is read when the dialer module builds its queue
+    if backend:
+        os.environ["CALL_QUEUE_BACKEND"] = backend
+    import importlib
+
+    return importlib.import_module(DIALERS[name])
+
+
+# Subcommands
+def dial(args):
+    import asyncio
+    from structured_log import configure_logging
+
+    configure_logging()
+    dialer = load_dialer(args.dialer, args.backend)
+    asyncio.run(dialer.main(worker_mode = args.worker))
+
+def ingest(args):
+    import uvicorn
+    from structured_log import configure_logging
+
+    configure_logging()
+    uvicorn.run(APPS[args.app], host = args.host, port = args.port, log_config = None)
+
+def status(args):
+    import asyncio
+
+    # The dialer module builds its queue at import but connects in start(); no VAPI call is made
+    call_queue = load_dialer(args.dialer, args.backend).call_queue
+
+    async def summarize():
+        await call_queue.start()
+        try:
+            return {"queue": call_queue.name, **await call_queue.summary()}
+        finally:
+            await call_queue.close()
+
+    try:
+        summary = asyncio.run(summarize())
+    except FileNotFoundError as e:
+        # Excel queue with no workbook yet
+        sys.exit(f"Call queue file not found: {e.filename or e}")
+    print(json.dumps(summary, indent=2, default=str))
+
+def bench(args):
+    import runpy
+
+    sys.argv = [f"{BENCHMARKS[args.benchmark]}.py", *args.bench_args]
+    runpy.run_module(BENCHMARKS[args.benchmark], run_name = "__main__")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog = "vapi_cli.py", description = "VAPI outbound calling")
+    commands = parser.add_subparsers(dest = "command", required = True)
+
+    dial_cmd = commands.add_parser("dial", help = "dial the rows that are due")
+    dial_cmd.add_argument("--dialer", choices = sorted(DIALERS), default = "vapi")
+    dial_cmd.add_argument("--backend", choices = BACKENDS, help = "overrides CALL_QUEUE_BACKEND")
+    dial_cmd.add_argument("--worker", action = "store_true", help = "keep dialing as rows come due")
+    dial_cmd.set_defaults(handler = dial)
+
+    ingest_cmd = commands.add_parser("ingest", help = "serve a webhook app")
+    ingest_cmd.add_argument("--app", choices = sorted(APPS), default = "events")
+    ingest_cmd.add_argument("--host", default = "0.0.0.0")
+    ingest_cmd.add_argument("--port", type = int, default = 8000)
+    ingest_cmd.set_defaults(handler = ingest)
+
+    status_cmd = commands.add_parser("status", help = "row counts by status and how many are due")
+    status_cmd.add_argument("--dialer", choices = sorted(DIALERS), default = "vapi")
+    status_cmd.add_argument("--backend", choices = BACKENDS, help = "overrides CALL_QUEUE_BACKEND")
+    status_cmd.set_defaults(handler = status)
+
+    bench_cmd = commands.add_parser("bench", help = "run a benchmark; remaining arguments go to it")
+    bench_cmd.add_argument("benchmark", choices = sorted(BENCHMARKS))
+    bench_cmd.add_argument("bench_args", nargs = argparse.REMAINDER)
+    bench_cmd.set_defaults(handler = bench)
+    return parser
+
+def main(argv = None):
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+# python vapi_cli.py dial --backend sqlite          -> one pass over the due rows, then exit
+# python vapi_cli.py status --dialer gemini         -> queue summary as JSON
+# python vapi_cli.py ingest --app items --port 8001
+# python vapi_cli.py bench dialer --sizes 200
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import os
+import time
+import importlib.util
+import httpx
+from dotenv import load_dotenv
+
+from vapi_retry import RetryPolicy, RetryBudget, CircuitBreaker
+from metrics import VAPI_POST_SECONDS
+from structured_log import get_logger
+
+log = get_logger(__name__)
+
+# Load Dotenv
+load_dotenv()
+
+# Required Configurations
+VAPI_API_KEY = os.getenv("VAPI_API_KEY")
+VAPI_URL = os.getenv("VAPI_URL", "https://api.vapi.ai/call/phone")
+
+# POOL CONFIG
+VAPI_HTTP2 = os.getenv("VAPI_HTTP2", "1") != "0"                        # HTTP/2 when h2 is installed
+VAPI_MAX_CONNECTIONS = int(os.getenv("VAPI_MAX_CONNECTIONS", "20"))     # open sockets in the pool
+VAPI_MAX_KEEPALIVE = int(os.getenv("VAPI_MAX_KEEPALIVE", "10"))         # idle sockets kept warm
+VAPI_KEEPALIVE_EXPIRY = float(os.getenv("VAPI_KEEPALIVE_EXPIRY", "60")) # seconds before idle socket closes
+VAPI_CONNECT_TIMEOUT = float(os.getenv("VAPI_CONNECT_TIMEOUT", "5"))
+VAPI_REQUEST_TIMEOUT = float(os.getenv("VAPI_REQUEST_TIMEOUT", "30"))
+
+# RETRY CONFIG
+VAPI_MAX_RETRIES = int(os.getenv("VAPI_MAX_RETRIES", "3"))              # per call, on 429/502/503/504
+VAPI_BACKOFF_BASE = float(os.getenv("VAPI_BACKOFF_BASE", "0.5"))        # seconds, doubled per attempt
+VAPI_BACKOFF_MAX = float(os.getenv("VAPI_BACKOFF_MAX", "30"))
+VAPI_RETRY_BUDGET = float(os.getenv("VAPI_RETRY_BUDGET", "0.2"))        # retries per request, per minute
+
+
+# Helpers
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class VapiClient:
+    """Long-lived async client for the VAPI call API.
+
+    One instance keeps a single pooled ``httpx.AsyncClient`` so every call
+    reuses warm keep-alive (and, when ``h2`` is installed, multiplexed HTTP/2)
+    connections instead of paying a TLS handshake per dial.
+
+    Transient failures (429/502/503/504, connection errors) are retried by
+    ``retry``; every response also feeds ``breaker`` so a rising 429 rate
+    slows the dial scheduler that shares it.
+    """
+
+    def __init__(
+        self,
+        api_key=None,
+        url=None,
+        http2=VAPI_HTTP2,
+        max_connections=VAPI_MAX_CONNECTIONS,
+        max_keepalive=VAPI_MAX_KEEPALIVE,
+        keepalive_expiry=VAPI_KEEPALIVE_EXPIRY,
+        connect_timeout=VAPI_CONNECT_TIMEOUT,
+        request_timeout=VAPI_REQUEST_TIMEOUT,
+        retry=None,
+        breaker=None,
+    ):
+        self.api_key = api_key or VAPI_API_KEY
+        self.url = url or VAPI_URL
+        self.http2 = http2 and http2_available()
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(request_timeout, connect=connect_timeout)
+        self.retry = retry or RetryPolicy(
+            max_retries=VAPI_MAX_RETRIES,
+            backoff_base=VAPI_BACKOFF_BASE,
+            backoff_max=VAPI_BACKOFF_MAX,
+            budget=RetryBudget(ratio=VAPI_RETRY_BUDGET),
+        )
+        self.breaker = breaker or CircuitBreaker()
+        self._client = None
+
+        if http2 and not self.http2:
+            log.warning("VAPI client: 'h2' not installed, falling back to HTTP/1.1 keep-alive")
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Built lazily so the pool binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=self.timeout,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                },
+            )
+        return self._client
+
+    async def place_call(self, payload=None, timeout=None, content=None) -> httpx.Response:
+        """POST one call; ``content`` sends pre-rendered JSON bytes as-is."""
+        client = self._get_client()
+        body = {"content": content} if content is not None else {"json": payload}
+
+        async def send():
+            start = time.perf_counter()
+            status = "error"
+            try:
+                response = await client.post(
+                    self.url,
+                    timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+                    **body,
+                )
+                status = str(response.status_code)
+                return response
+            finally:
+                # Per attempt, so retried 429/5xx show up under their own status
+                VAPI_POST_SECONDS.labels(status).observe(time.perf_counter() - start)
+
+        return await self.retry.run(send, self.breaker)
+
+    async def get_call(self, call_id) -> dict:
+        """GET one call (status, endedReason, cost); VAPI_URL's /call/phone becomes /call/<id>."""
+        response = await self._get_client().get(f"{self.url.rsplit('/', 1)[0]}/{call_id}")
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    async def __aenter__(self):
+        self._get_client()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+# Shared Client
+_shared_client = None
+
+def get_vapi_client() -> VapiClient:
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = VapiClient()
+    return _shared_client
+
+async def close_vapi_client():
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
@@ -0,0 +1,147 @@
+import time
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from structured_log import get_logger
+
+log = get_logger(__name__)
+
+# endedReason -> queue status. "no-response" is eligibility's RETRY_STATUS (not
+# imported, so the webhook app never loads pandas): the row is redialed at
+# next_try. Anything else unlisted is a terminal "failure".
+ANSWERED_REASONS = {
+    "customer-ended-call",
+    "assistant-ended-call",
+    "assistant-said-end-call-phrase",
+    "assistant-forwarded-call",
+    "exceeded-max-duration",
+    "silence-timed-out",
+}
+NO_ANSWER_REASONS = {
+    "customer-did-not-answer",
+    "customer-busy",
+    "voicemail",
+}
+# Telephony / platform faults on VAPI's side: the number may still be fine
+RETRYABLE_REASON_PREFIXES = (
+    "twilio-failed-to-connect-call",
+    "vonage-failed-to-connect-call",
+    "phone-call-provider-closed-websocket",
+    "call.start.error",
+    "pipeline-error",
+    "worker-shutdown",
+    "unknown-error",
+)
+LIVE_STATUSES = {"queued", "ringing", "in-progress", "forwarding"}
+
+
+# Helpers
+def call_id(message) -> str | None:
+    call = message.get("call") or {}
+    return call.get("id") or message.get("callId")
+
+def outcome_status(ended_reason) -> str:
+    if ended_reason in ANSWERED_REASONS:
+        return "success"
+    if ended_reason in NO_ANSWER_REASONS:
+        return "no-response"
+    if ended_reason and ended_reason.startswith(RETRYABLE_REASON_PREFIXES):
+        return "no-response"
+    return "failure"
+
+def next_try_at(status, now, retry_gap_hours) -> datetime | None:
+    # Only "no-response" rows are redialed; success and failure are final
+    if status != "no-response":
+        return None
+    return now + timedelta(hours=retry_gap_hours)
+
+
+# Event -> Queue Update
+def build_call_update(payload, retry_gap_hours=24, now=None):
+    """Turn a VAPI server message into ``(request_id, filter, update)``.
+
+    Returns None for events that don't change queue state. The filter only
+    matches an item whose current ``request_id`` is this call and whose end
+    was not recorded yet, so a redelivered end-of-call-report is a no-op
+    and a late event from an older attempt can't overwrite a newer one.
+    """
+    message = payload.get("message") or payload
+    request_id = call_id(message)
+    if not request_id:
+        return None
+
+    now = now or datetime.now(timezone.utc)
+    event_type = message.get("type")
+    query = {"request_id": request_id, "ended_request_id": {"$ne": request_id}}
+
+    if event_type == "status-update" and message.get("status") in LIVE_STATUSES:
+        return request_id, query, {"$set": {"status": "in-progress", "updatedAt": now}}
+
+    if event_type != "end-of-call-report" and not (event_type == "status-update" and message.get("status") == "ended"):
+        return None
+
+    ended_reason = message.get("endedReason") or (message.get("call") or {}).get("endedReason")
+    status = outcome_status(ended_reason)
+    cost = message.get("cost") or (message.get("call") or {}).get("cost") or 0
+
+    update = {
+        "$set": {
+            "status": status,
+            "ended_reason": ended_reason,
+            "ended_request_id": request_id,
+            "updatedAt": now,
+        },
+        "$inc": {"cost": cost},
+    }
+    if status == "success":
+        update["$inc"]["no_of_conversation"] = 1
+    update["$set"]["next_try"] = next_try_at(status, now, retry_gap_hours)
+    return request_id, query, update
+
+async def apply_call_event(collection, payload, retry_gap_hours=24) -> dict:
+    built = build_call_update(payload, retry_gap_hours)
+    if built is None:
+        return {"matched": 0, "ignored": True}
+
+    request_id, query, update = built
+    # Served by the request_id index: one indexed write per event
+    result = await collection.update_one(query, update)
+    return {"request_id": request_id, "matched": result.matched_count, "ignored": False}
+
+
+# Polled Call -> Queue Update
+def queue_outcome(call, retry_gap_hours=24, now=None) -> dict | None:
+    """``CallQueue.update`` fields for a VAPI call object, or None while it is still live.
+
+    The same outcome build_call_update writes to Mongo, flattened for the
+    Excel, Sheets and SQLite queues; ``cost`` is the call's total.
+    """
+    if call.get("status") != "ended":
+        return None
+
+    now = now or datetime.now(timezone.utc)
+    status = outcome_status(call.get("endedReason"))
+    next_try = next_try_at(status, now, retry_gap_hours)
+    return {
+        "status": status,
+        "ended_reason": call.get("endedReason"),
+        "cost": call.get("cost") or 0,
+        "next_try": next_try and next_try.isoformat(),
+        "updated_at": now.isoformat(),
+    }
+
+async def wait_for_outcome(client, request_id, poll_seconds, timeout_seconds, retry_gap_hours=24) -> dict | None:
+    """Poll ``client.get_call`` until the call ends; None if it is still live at the timeout."""
+    deadline = time.monotonic() + timeout_seconds
+    while time.monotonic() < deadline:
+        await asyncio.sleep(poll_seconds)
+        try:
+            call = await client.get_call(request_id)
+        except Exception as e:
+            # A failed poll is retried on the next tick
+            log.warning("Could not poll VAPI call", extra={"request_id": request_id, "error": str(e)})
+            continue
+        fields = queue_outcome(call, retry_gap_hours)
+        if fields is not None:
+            return fields
+    return None
@@ -0,0 +1,166 @@
+import time
+import random
+import asyncio
+from collections import deque
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+import httpx
+
+from structured_log import get_logger
+
+log = get_logger(__name__)
+
+# Statuses where VAPI did not create the call, so posting again can't double-dial.
+# A plain 500 or a read timeout may have created it, so those are not retried.
+RETRYABLE_STATUS = {429, 502, 503, 504}
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+# Helpers
+def retry_after_seconds(response) -> float | None:
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryBudget:
+    """Caps retries at ``ratio`` of requests (plus ``min_retries`` per window).
+
+    Keeps a rate-limited API from being hit with a retry storm: once the
+    budget is spent, failures are returned to the caller instead of retried.
+    """
+
+    def __init__(self, ratio=0.2, min_retries=10, window_seconds=60.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window_seconds = window_seconds
+        self.requests = deque()
+        self.retries = deque()
+
+    def _trim(self, now):
+        for events in (self.requests, self.retries):
+            while events and now - events[0] > self.window_seconds:
+                events.popleft()
+
+    def record_request(self):
+        self.requests.append(time.monotonic())
+
+    def try_spend(self) -> bool:
+        now = time.monotonic()
+        self._trim(now)
+        if len(self.retries) >= self.min_retries + self.ratio * len(self.requests):
+            return False
+        self.retries.append(now)
+        return True
+
+
+class CircuitBreaker:
+    """Watches the 429 share of recent responses and throttles dialing globally.
+
+    When more than ``threshold`` of the last ``window`` responses were 429s,
+    ``rate_factor`` is halved (down to ``min_factor``); every accepted call
+    wins back ``recovery`` of the rate. A ``Retry-After`` pauses every dial
+    until it has passed. The dial scheduler scales its token bucket by
+    ``rate_factor`` and awaits ``wait()`` before each dial.
+    """
+
+    def __init__(self, window=50, threshold=0.1, min_samples=10, min_factor=0.1, recovery=0.02):
+        self.outcomes = deque(maxlen=window)
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.min_factor = min_factor
+        self.recovery = recovery
+        self.rate_factor = 1.0
+        self.paused_until = 0.0
+        self.rate_limited = 0
+
+    @property
+    def limited_ratio(self) -> float:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def record(self, status_code, retry_after=None):
+        limited = status_code == 429
+        self.outcomes.append(limited)
+
+        if not limited:
+            if status_code < 500:
+                self.rate_factor = min(1.0, self.rate_factor + self.recovery)
+            return
+
+        self.rate_limited += 1
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        if len(self.outcomes) >= self.min_samples and self.limited_ratio > self.threshold:
+            factor = max(self.min_factor, self.rate_factor / 2)
+            if factor < self.rate_factor:
+                log.warning("VAPI rate limiting: dial rate scaled down", extra={"rate_factor": round(factor, 3)})
+            self.rate_factor = factor
+            # Judge the new rate on fresh responses only
+            self.outcomes.clear()
+
+    async def wait(self):
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def summary(self) -> dict:
+        return {"rate_factor": round(self.rate_factor, 2), "rate_limited": self.rate_limited}
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, honoring ``Retry-After``."""
+
+    def __init__(self, max_retries=3, backoff_base=0.5, backoff_max=30.0, budget=None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.budget = budget or RetryBudget()
+
+    def delay(self, attempt, response=None) -> float:
+        retry_after = retry_after_seconds(response)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def run(self, send, breaker=None) -> httpx.Response:
+        """Call ``send()`` until it succeeds, fails permanently, or retries run out.
+
+        Returns the last response (which may still be a 429/5xx) and re-raises
+        the last connection error when no response was ever received.
+        """
+        self.budget.record_request()
+        attempt = 0
+        while True:
+            if breaker is not None:
+                await breaker.wait()
+
+            try:
+                response = await send()
+            except RETRYABLE_ERRORS:
+                if attempt >= self.max_retries or not self.budget.try_spend():
+                    raise
+                await asyncio.sleep(self.delay(attempt))
+                attempt += 1
+                continue
+
+            if breaker is not None:
+                breaker.record(response.status_code, retry_after_seconds(response))
+            if response.status_code not in RETRYABLE_STATUS:
+                return response
+            if attempt >= self.max_retries or not self.budget.try_spend():
+                return response
+
+            await asyncio.sleep(self.delay(attempt, response))
+            attempt += 1
@@ -1,7 +1,8 @@
-import httpx
 import os
+import asyncio
 from datetime import datetime
 from dotenv import load_dotenv
+from vapi_client import get_vapi_client, close_vapi_client
 
 load_dotenv()
 
@@ -25,8 +26,6 @@ print("Calling Sam: ", TO_PHONE_NUMBER)
 print("Time: ", datetime.utcnow().isoformat())
 
 #API CALL
-url = "https://api.vapi.ai/call/phone"
-
 payload = {
     "assistantId": ASSISTANT_ID,
     "phoneNumberId": PHONE_NUMBER_ID,
@@ -41,18 +40,17 @@ payload = {
     }
 }
 
-headers ={
-    "Authorization" : f"Bearer {VAPI_API_KEY}",
-    "Conetent-Type" : "applications/json"
-}
+async def main():
+    try:
+        response = await get_vapi_client().place_call(payload)
+
+        print("HTTP Status: ", response.status_code)
+        print("Response JSON")
+        print(response.json())
 
-try:
-    with httpx.Client(timeout= 30) as client:
-        response = client.post(url, json=payload, headers=headers)
-    
-    print("HTTP Status: ", response.status_code)
-    print("Response JSON")
-    print(response.json())
+    except Exception as e:
+        print("Exception while making call: ",str(e))
+    finally:
+        await close_vapi_client()
 
-except Exception as e:
-    print("Exception while making call: ",str(e))
+asyncio.run(main())
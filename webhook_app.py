@@ -1,28 +1,82 @@
 import os
+import hmac
 import uvicorn
 from datetime import datetime
 from typing import Dict, Any
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request, HTTPException, Body
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi import FastAPI, Request, HTTPException, Body, Header
 from pydantic import BaseModel , Field
 from dotenv import load_dotenv
 
+from write_behind import WriteBehindBuffer, BufferFull
+from vapi_events import apply_call_event
+from metrics import instrument_app
+from mongo_indexes import ensure_indexes
+from structured_log import configure_logging, get_logger
+
 load_dotenv()
+configure_logging()
+log = get_logger("webhook_app")
 
 # Configurations
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
 COLLECTION_NAME_1 = os.getenv("COLLECTION_NAME_1")
 COLLECTION_NAME_2 = os.getenv("COLLECTION_NAME_2")
+OBD_ITEMS = os.getenv("OBD_ITEMS", "out_bound_call_items")
+RETRY_GAP_HOURS = int(os.getenv("RETRY_GAP_HOURS", "24"))
+VAPI_SERVER_SECRET = os.getenv("VAPI_SERVER_SECRET")   # sent by VAPI as x-vapi-secret; unset = not checked
+
+# WRITE-BEHIND CONFIG
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "500"))        # events per insert_many
+WEBHOOK_FLUSH_MS = int(os.getenv("WEBHOOK_FLUSH_MS", "200"))            # max wait before a partial batch is written
+WEBHOOK_BUFFER_MAX = int(os.getenv("WEBHOOK_BUFFER_MAX", "10000"))      # pending events before backpressure
+WEBHOOK_SPILL_FILE = os.getenv("WEBHOOK_SPILL_FILE", "webhook_spill.jsonl")
+
+# Database (mongoDB - Async): connected on startup, so importing the app does no client work
+mongo_client = None
+collcetion = None
+collection_call_items = None
+
+webhook_buffer = WriteBehindBuffer(
+    None,
+    max_batch = WEBHOOK_BATCH_SIZE,
+    flush_interval_ms = WEBHOOK_FLUSH_MS,
+    max_pending = WEBHOOK_BUFFER_MAX,
+    spill_path = WEBHOOK_SPILL_FILE,
+)
+
+def connect_mongo():
+    global mongo_client, collcetion, collection_call_items
+    # Collections set beforehand (tests, benchmarks) are kept
+    if collection_call_items is None:
+        from motor.motor_asyncio import AsyncIOMotorClient
 
-# Database (mongoDB - Async)
-mongo_client = AsyncIOMotorClient(MONGO_URI)
-db = mongo_client[DB_NAME]
-collcetion = db[COLLECTION_NAME_1]
+        mongo_client = AsyncIOMotorClient(MONGO_URI)
+        db = mongo_client[DB_NAME]
+        collcetion = db[COLLECTION_NAME_1]
+        collection_call_items = db[OBD_ITEMS]
+    if webhook_buffer.collection is None:
+        webhook_buffer.collection = collcetion
 
 # FastAPI App
-app = FastAPI(title= "Webhook Service", version= "1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    connect_mongo()
+    try:
+        # VAPI events look items up by request_id; without it every event is a scan
+        await ensure_indexes(call_items = collection_call_items)
+    except Exception as e:
+        log.warning("Could not create Mongo indexes", extra={"error": str(e)})
+    await webhook_buffer.start()
+    yield
+    await webhook_buffer.close()
+    if mongo_client is not None:
+        mongo_client.close()
+
+app = FastAPI(title= "Webhook Service", version= "1.0.0", lifespan= lifespan)
+instrument_app(app, "webhook_app")
 
 # Data Model
 class WebhookEvent(BaseModel):
@@ -33,20 +87,37 @@ class WebhookEvent(BaseModel):
 # Webhook Endpoint
 @app.post("/api/webhook")
 async def received_webhook(payload : dict = Body(...)):
+    if not payload:
+        raise HTTPException(status_code= 400, detail="Empty Payload")
+
+    payload["received_at"] = datetime.utcnow()
+    payload["source"] = "swagger-ui"
+
+    # Queued for the next batched insert_many; Mongo is off the request path
     try:
-        payload["received_at"] = datetime.utcnow()
-        payload["source"] = "swagger-ui"
+        await webhook_buffer.put(payload)
+    except BufferFull:
+        raise HTTPException(status_code= 503, detail="Webhook buffer full, retry later")
 
-        await collcetion.insert_one(payload)
+    return {"message": "Webhook received"}
 
-        # return {"message": "Webhook received."}
-    except Exception:
-        raise HTTPException(status_code=400, detail = "Invalid JSON payload")
-    
+# VAPI Server Events (status-update / end-of-call-report)
+@app.post("/api/vapi/webhook")
+async def vapi_event(payload : dict = Body(...), x_vapi_secret : str | None = Header(None)):
+    if VAPI_SERVER_SECRET and not hmac.compare_digest((x_vapi_secret or "").encode(), VAPI_SERVER_SECRET.encode()):
+        raise HTTPException(status_code= 401, detail="Invalid server secret")
     if not payload:
         raise HTTPException(status_code= 400, detail="Empty Payload")
 
-    return {"message": "Webhook received"}
+    # One indexed update_one on the call item; unrelated event types are acknowledged and ignored
+    try:
+        result = await apply_call_event(collection_call_items, payload, RETRY_GAP_HOURS)
+    except Exception:
+        # Details stay in the log; VAPI retries on a 500 either way
+        log.exception("Could not update call item from VAPI event")
+        raise HTTPException(status_code= 500, detail= "Could not update call item")
+
+    return {"message": "Event processed", **result}
 
 # Health Check (optional but recommeded)
 @app.get("/health")
@@ -0,0 +1,143 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import multiprocessing
+from collections import Counter
+
+import pandas as pd
+
+from call_queue import SQLiteCallQueue
+from dial_worker import run_worker
+
+# Local multi-process check that leased claiming never dials a row twice.
+# Workers share one SQLite queue and a fake dial; one worker crashes while
+# holding leases, and some calls outlive the lease so renewal is exercised.
+
+
+# Worker Process
+async def _worker(db_path, log_path, worker_id, lease_seconds, slow_call_seconds, crash_after):
+    queue = SQLiteCallQueue(db_path)
+    await queue.start()
+    placed = 0
+    marking = 0        # dials past their POST, not yet updated and logged
+    crashing = False
+
+    async def fake_dial(row):
+        nonlocal placed, marking, crashing
+        if crashing or (crash_after is not None and placed >= crash_after):
+            # Die holding leases, but only once every finished POST is marked and
+            # logged. A crash after the POST and before update() is not exercised:
+            # that row would be reclaimed and dialed again, which leases cannot prevent
+            crashing = True
+            while marking:
+                await asyncio.sleep(0.001)
+            os._exit(1)
+
+        # Most POSTs are quick; a few run longer than the lease itself
+        slow = random.random() < 0.02
+        await asyncio.sleep(slow_call_seconds if slow else random.uniform(0.001, 0.01))
+        if crashing:
+            await asyncio.Event().wait()  # the POST never returned; the worker is going down
+
+        marking += 1
+        await queue.update(row["sr_no"], {"status": "in-progress", "request_id": f"{worker_id}-{row['sr_no']}"})
+        with open(log_path, "a") as log:
+            log.write(f"{row['sr_no']},{worker_id}\n")
+        marking -= 1
+        placed += 1
+
+    try:
+        await run_worker(
+            queue,
+            fake_dial,
+            worker_id=worker_id,
+            claim_size=8,
+            lease_seconds=lease_seconds,
+            idle_seconds=0.25,
+            max_idle_polls=int(lease_seconds * 4 / 0.25) + 4,
+            max_in_flight=8,
+            calls_per_second=2000,
+            burst=50,
+            report_interval=0,
+        )
+    finally:
+        await queue.close()
+
+def worker_process(db_path, log_path, worker_id, lease_seconds, slow_call_seconds, crash_after):
+    asyncio.run(_worker(db_path, log_path, worker_id, lease_seconds, slow_call_seconds, crash_after))
+
+
+# Harness
+def run(rows, workers, lease_seconds):
+    workdir = tempfile.mkdtemp(prefix="dial_harness_")
+    db_path = os.path.join(workdir, "queue.db")
+    log_path = os.path.join(workdir, "dials.log")
+
+    seed = SQLiteCallQueue(db_path)
+    seed.import_dataframe(pd.DataFrame({
+        "sr_no": [str(i) for i in range(1, rows + 1)],
+        "user_name": [f"user {i}" for i in range(rows)],
+        "phone_number": [f"+9190000{i:05d}" for i in range(rows)],
+        "email": [f"user{i}@test.com" for i in range(rows)],
+        "status": ["queued"] * rows,
+    }))
+    asyncio.run(seed.close())
+
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(
+            target=worker_process,
+            args=(db_path, log_path, f"worker-{n}", lease_seconds, lease_seconds * 1.5,
+                  rows // (workers * 4) if n == 0 else None),
+        )
+        for n in range(workers)
+    ]
+
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    with open(log_path) as log:
+        dials = [line.strip().split(",") for line in log if line.strip()]
+    per_row = Counter(sr_no for sr_no, _ in dials)
+    duplicates = {sr_no: count for sr_no, count in per_row.items() if count > 1}
+
+    check = SQLiteCallQueue(db_path)
+    conn = check._connect()
+    statuses = dict(conn.execute("SELECT status, COUNT(*) FROM call_queue GROUP BY status").fetchall())
+    conn.close()
+
+    return {
+        "rows": rows,
+        "workers": workers,
+        "lease_seconds": lease_seconds,
+        "dials": len(dials),
+        "rows_dialed": len(per_row),
+        "double_dials": len(duplicates),
+        "crashed_workers": sum(1 for p in processes if p.exitcode != 0),
+        "statuses": statuses,
+        "elapsed_seconds": round(elapsed, 2),
+        "workdir": workdir,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-process lease test for dial workers")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--lease-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    report = run(args.rows, args.workers, args.lease_seconds)
+    print(json.dumps(report, indent=2))
+
+    if report["double_dials"] or report["rows_dialed"] != report["rows"]:
+        sys.exit(1)
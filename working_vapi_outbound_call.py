@@ -1,10 +1,14 @@
 import pandas as pd
 import os
-import httpx
+import asyncio
 from datetime import datetime
 from dotenv import load_dotenv
+from vapi_client import get_vapi_client, close_vapi_client
+from structured_log import configure_logging, get_logger
 
 load_dotenv()
+configure_logging()
+log = get_logger("working_vapi_outbound_call")
 
 # Required Configurations
 VAPI_API_KEY = os.getenv("VAPI_API_KEY")
@@ -14,9 +18,6 @@ PHONE_NUMBER_ID =  os.getenv("PHONE_NUMBER_ID")
 EXCEL_FILE = "call_data.xlsx"
 SHEET_NAME = "call_queue"
 
-#API CALL
-url = "https://api.vapi.ai/call/phone"
-
 TO_PHONE_NUMBER = "YOUR NUMBER"
 
 # VALIDATIONS
@@ -28,63 +29,54 @@ if not VAPI_API_KEY or not ASSISTANT_ID or not PHONE_NUMBER_ID:
 
 df = pd.read_excel(EXCEL_FILE, sheet_name=SHEET_NAME, dtype=str)
 
-print("\n📄 Excel Data Read Successfully")
-print(df)
-print("-" * 50)
+log.info("Excel Data Read Successfully", extra={"rows": len(df)})
 
 # Process Rows
+# One event loop and one shared VAPI client for the whole run, as in the other dialers
+async def main():
+    try:
+        for _, rows in df.iterrows():
+            status = str(rows.get("status", "")).strip().lower()
+            if status != "queued":
+                continue
 
-for _, rows in df.iterrows():
-    status = str(rows.get("status", "")).strip().lower()
-    if status != "queued":
-        continue
-
-    raw_phone = str(rows["phone_number"]).strip()
-    phone = raw_phone.replace(" ", "").replace("-", "")
+            raw_phone = str(rows["phone_number"]).strip()
+            phone = raw_phone.replace(" ", "").replace("-", "")
 
-    if not phone.startswith("+"):
-        phone = "+" + phone
+            if not phone.startswith("+"):
+                phone = "+" + phone
 
 
-    print("Starting VAPI outbound Call Test")
-    print("Calling Sam: ")
-    print("Name: ", rows["user_name"])
-    print("Email: ", rows["email"])
-    print("Phone: ", phone)
-    print("Time: ", datetime.utcnow().isoformat())
+            log.info("Starting VAPI outbound Call Test", extra={"sr_no": rows.get("sr_no"), "time": datetime.utcnow().isoformat()})
 
 
-    payload = {
-        "assistantId": ASSISTANT_ID,
-        "phoneNumberId": PHONE_NUMBER_ID,
-        "customer": {
-            "number" : phone
-        },
-        "assistantOverrides" : {
-            "variableValues" : {
-                "username" : rows["user_name"],
-                "userEmail" :rows["email"]
+            payload = {
+                "assistantId": ASSISTANT_ID,
+                "phoneNumberId": PHONE_NUMBER_ID,
+                "customer": {
+                    "number" : phone
+                },
+                "assistantOverrides" : {
+                    "variableValues" : {
+                        "username" : rows["user_name"],
+                        "userEmail" :rows["email"]
+                    }
+                }
             }
-        }
-    }
 
-    headers ={
-        "Authorization" : f"Bearer {VAPI_API_KEY}",
-        "Conetent-Type" : "applications/json"
-    }
+            try:
+                response = await get_vapi_client().place_call(payload)
 
-    try:
-        with httpx.Client(timeout= 30) as client:
-            response = client.post(url, json=payload, headers=headers)
-        
-        print("HTTP Status: ", response.status_code)
-        print("Response JSON")
-        print(response.json())
+                log.info("VAPI call response", extra={"http_status": response.status_code, "response": response.json()})
+
+            except Exception as e:
+                log.error("Exception while making call", extra={"error": str(e)})
 
-    except Exception as e:
-        print("Exception while making call: ",str(e))
+            finally:
+                log.info("Complete with calling Sam!")
 
+                break
     finally:
-        print("Complete with calling Sam!")
+        await close_vapi_client()
 
-        break
+asyncio.run(main())
@@ -0,0 +1,160 @@
+import os
+import time
+import asyncio
+
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError
+
+from metrics import MONGO_BATCH_SIZE
+from structured_log import get_logger
+
+log = get_logger(__name__)
+
+DUPLICATE_KEY = 11000
+_STOP = object()   # queued by close() to end the flusher task
+
+
+class BufferFull(Exception):
+    pass
+
+
+class WriteBehindBuffer:
+    """Batches events into ``insert_many`` off the request path.
+
+    ``put`` returns as soon as the event is queued; a flusher task writes a
+    batch every ``flush_interval_ms`` or every ``max_batch`` events, whichever
+    comes first. When ``max_pending`` events are waiting, ``put`` blocks for
+    up to ``put_timeout`` seconds and then raises ``BufferFull``.
+
+    Events get their ``_id`` when queued, so a batch written twice (retry or
+    spill replay) is deduplicated by Mongo. ``close`` writes whatever is
+    still queued; any batch Mongo rejected goes to ``spill_path`` and is
+    replayed on the next start.
+    """
+
+    def __init__(
+        self,
+        collection,
+        max_batch=500,
+        flush_interval_ms=200,
+        max_pending=10_000,
+        spill_path="webhook_spill.jsonl",
+        put_timeout=1.0,
+    ):
+        self.collection = collection
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval_ms / 1000
+        self.spill_path = spill_path
+        self.put_timeout = put_timeout
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.written = 0
+        self.spilled = 0
+        self._inflight = []
+        self._flusher = None
+
+    # Producer
+    async def put(self, event: dict):
+        event.setdefault("_id", ObjectId())
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self.queue.put(event), timeout=self.put_timeout)
+            except asyncio.TimeoutError:
+                raise BufferFull(f"{self.queue.maxsize} events waiting to be written")
+
+    # Writes
+    async def _insert(self, events):
+        MONGO_BATCH_SIZE.labels("webhook_insert_many").observe(len(events))
+        try:
+            await self.collection.insert_many(events, ordered=False)
+        except BulkWriteError as e:
+            # Already-written events (replays) are fine; anything else is a real failure
+            if any(error.get("code") != DUPLICATE_KEY for error in e.details.get("writeErrors", [])):
+                raise
+
+    def _spill(self, events):
+        if not events:
+            return
+        with open(self.spill_path, "a", encoding="utf-8") as spill:
+            for event in events:
+                spill.write(json_util.dumps(event) + "\n")
+        self.spilled += len(events)
+        log.warning("Webhook buffer spilled events", extra={"events": len(events), "path": self.spill_path})
+
+    async def _collect(self):
+        """Next batch, and whether the stop marker ended it."""
+        first = await self.queue.get()
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(self.queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if event is _STOP:
+                return batch, True
+            batch.append(event)
+        return batch, False
+
+    async def _flush_loop(self):
+        while True:
+            self._inflight, stopped = await self._collect()
+            if self._inflight:
+                try:
+                    await self._insert(self._inflight)
+                    self.written += len(self._inflight)
+                except Exception as e:
+                    log.error("Webhook batch insert failed, spilling to disk", extra={"error": str(e)})
+                    self._spill(self._inflight)
+            self._inflight = []
+            if stopped:
+                return
+
+    async def replay_spill(self):
+        if not os.path.exists(self.spill_path):
+            return 0
+
+        # Move the file aside first so a failed replay can't be appended to and lost
+        replay_path = f"{self.spill_path}.replay"
+        os.replace(self.spill_path, replay_path)
+        with open(replay_path, encoding="utf-8") as spill:
+            events = [json_util.loads(line) for line in spill if line.strip()]
+
+        try:
+            for start in range(0, len(events), self.max_batch):
+                await self._insert(events[start:start + self.max_batch])
+        except Exception as e:
+            log.error("Webhook spill replay failed, keeping it for the next start", extra={"error": str(e)})
+            self._spill(events)
+        os.remove(replay_path)
+        log.info("Webhook buffer replayed spilled events", extra={"events": len(events)})
+        return len(events)
+
+    # Lifecycle
+    async def start(self):
+        await self.replay_spill()
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._flusher is not None:
+            # A stop marker rather than cancel(): events queued ahead of it are still
+            # written, and wait_for can swallow a cancel that lands as get() completes
+            await self.queue.put(_STOP)
+            await self._flusher
+            self._flusher = None
+
+        # Only events put after the stop marker are left
+        remaining = []
+        while not self.queue.empty():
+            event = self.queue.get_nowait()
+            if event is not _STOP:
+                remaining.append(event)
+        self._spill(remaining)